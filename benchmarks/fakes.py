@@ -0,0 +1,314 @@
+'''
+Deterministic local stand-ins for YouTube, Spotify and Discord voice used by the offline benchmarks.
+
+Every fake sleeps for a configurable latency to simulate network time and fails a configurable share of calls. Whether a call fails only depends on the seed and the query, so runs are repeatable.
+'''
+
+import asyncio
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+
+from typing import Optional, Any, List, Dict, Iterator
+
+import discord
+import pisslink.workers
+
+from pisslink.sources import PlaybackSource
+
+def _fails(seed: int, query: str, failure_rate: float) -> bool:
+    return failure_rate > 0 and random.Random(f'{seed}:{query}').random() < failure_rate
+
+def _playlist_size(url: str, default: int) -> int:
+    # Playlist ids look like BENCH<guild>x<size>, so every guild can request its own playlist of a given size.
+    name = url.rstrip('/').rsplit('/', 1)[-1].rsplit('=', 1)[-1]
+    try:
+        return int(name.rsplit('x', 1)[1])
+    except (IndexError, ValueError):
+        return default
+
+class Counter:
+    '''A thread safe call counter, the fakes are called from worker threads.'''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def add(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def get(self, name: str) -> int:
+        return self.counts.get(name, 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+class FakeYoutubeDL:
+    '''
+    Replaces :class:`youtube_dl.YoutubeDL`. Configure the class attributes before the first extractor is created.
+
+    Attributes:
+        latency: The time in seconds every call blocks its worker thread.
+        failure_rate: The share of calls that raise.
+        playlist_size: The size of playlists whose url does not encode a size.
+        seed: The seed that decides which calls fail.
+        calls: The calls made so far, by kind.
+    '''
+
+    latency: float = 0.02
+    failure_rate: float = 0.0
+    playlist_size: int = 500
+    seed: int = 0
+    calls: Counter = Counter()
+
+    def __init__(self, options: Optional[dict] = None) -> None:
+        self.options = options or {}
+
+    @staticmethod
+    def video(identifier: str, title: Optional[str] = None) -> dict:
+        return {
+            'id': identifier,
+            'title': title or f'Video {identifier}',
+            'duration': 180 + zlib.crc32(identifier.encode()) % 120,
+            'thumbnail': f'https://i.ytimg.com/vi/{identifier}/hqdefault.jpg',
+            'url': f'https://rr1.googlevideo.com/videoplayback?expire={int(time.time()) + 21600}&id={identifier}&itag=251',
+            'acodec': 'opus',
+            'ext': 'webm',
+        }
+
+    def _entries(self, playlist: str, size: int) -> Iterator[dict]:
+        for index in range(size):
+            identifier = f'{zlib.crc32(playlist.encode()) % 10 ** 6:06d}{index:05d}'
+            yield {'_type': 'url', 'ie_key': 'Youtube', 'id': identifier, 'url': identifier, 'title': f'{playlist} track {index}', 'duration': 180 + index % 120}
+
+    def extract_info(self, query: str, download: bool = False, process: bool = True) -> Optional[dict]:
+        time.sleep(self.latency)
+        if _fails(self.seed, query, self.failure_rate):
+            FakeYoutubeDL.calls.add('failed')
+            raise Exception(f'ERROR: fake extraction failure for {query}')
+        if query.startswith('ytsearch'):
+            FakeYoutubeDL.calls.add('search')
+            prefix, text = query.split(':', 1)
+            amount = int(prefix[len('ytsearch'):] or 1)
+            identifier = f'{zlib.crc32(text.encode()):08x}{len(text) % 1000:03d}'
+            if process:
+                return {'_type': 'playlist', 'entries': [self.video(identifier, text)]}
+            # Flat results, like the ones the Spotify matcher scores. Only the first one has the right length.
+            FakeYoutubeDL.calls.add('flat')
+            return {'_type': 'playlist', 'entries': [{'_type': 'url', 'ie_key': 'Youtube', 'id': f'{identifier[:-1]}{index}', 'url': f'{identifier[:-1]}{index}', 'title': text if not index else f'{text} (live)', 'duration': self.video(identifier)['duration'] + index * 30, 'uploader': 'Fake'} for index in range(amount)]}
+        parsed = urllib.parse.urlparse(query)
+        parameters = urllib.parse.parse_qs(parsed.query)
+        if parsed.path.endswith('/playlist') and 'list' in parameters:
+            FakeYoutubeDL.calls.add('playlist')
+            playlist = parameters['list'][0]
+            return {'_type': 'playlist', 'title': f'Playlist {playlist}', 'entries': self._entries(playlist, _playlist_size(playlist, self.playlist_size))}
+        FakeYoutubeDL.calls.add('video')
+        identifier = parameters['v'][0] if 'v' in parameters else parsed.path.rsplit('/', 1)[-1]
+        return self.video(identifier)
+
+class FakeSpotify:
+    '''
+    Replaces :class:`spotipy.Spotify`. Playlists and albums are paged by 100 items like the Web API.
+
+    Args:
+        latency: The time in seconds every call blocks its worker thread.
+        failure_rate: The share of calls that raise.
+        playlist_size: The size of playlists whose url does not encode a size.
+        seed: The seed that decides which calls fail.
+    '''
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, playlist_size: int = 500, seed: int = 0) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.playlist_size = playlist_size
+        self.seed = seed
+        self.calls = Counter()
+
+    def _call(self, name: str, query: str) -> None:
+        time.sleep(self.latency)
+        self.calls.add(name)
+        if _fails(self.seed, f'{name}:{query}', self.failure_rate):
+            raise Exception(f'fake Spotify failure for {query}')
+
+    @staticmethod
+    def _track(playlist: str, index: int) -> dict:
+        return {'id': f'{playlist}t{index}', 'name': f'{playlist} song {index}', 'artists': [{'name': f'Artist {index % 50}'}], 'duration_ms': (180 + index % 120) * 1000}
+
+    def _page(self, playlist: str, offset: int, wrap: bool) -> dict:
+        size = _playlist_size(playlist, self.playlist_size)
+        tracks = [self._track(playlist, index) for index in range(offset, min(offset + 100, size))]
+        return {
+            'items': [{'track': track} for track in tracks] if wrap else tracks,
+            'next': f'{playlist}|{offset + 100}|{int(wrap)}' if offset + 100 < size else None,
+        }
+
+    def track(self, track_id: str) -> dict:
+        self._call('track', track_id)
+        index = zlib.crc32(track_id.encode()) % 1000
+        return self._track(track_id.rstrip('/').rsplit('/', 1)[-1], index)
+
+    def playlist(self, playlist_id: str, fields: Optional[str] = None) -> dict:
+        self._call('playlist', playlist_id)
+        return {'name': f'Playlist {playlist_id.rsplit("/", 1)[-1]}'}
+
+    def album(self, album_id: str) -> dict:
+        self._call('album', album_id)
+        return {'name': f'Album {album_id.rsplit("/", 1)[-1]}'}
+
+    def playlist_tracks(self, playlist_id: str) -> dict:
+        self._call('playlist_tracks', playlist_id)
+        return self._page(playlist_id.rstrip('/').rsplit('/', 1)[-1], 0, True)
+
+    def album_tracks(self, album_id: str) -> dict:
+        self._call('album_tracks', album_id)
+        return self._page(album_id.rstrip('/').rsplit('/', 1)[-1], 0, False)
+
+    def next(self, result: dict) -> Optional[dict]:
+        if not result['next']:
+            return
+        playlist, offset, wrap = result['next'].split('|')
+        self._call('next', result['next'])
+        return self._page(playlist, int(offset), wrap == '1')
+
+    def categories(self) -> dict:
+        self._call('categories', '')
+        return {'categories': {'items': []}}
+
+class FakeSource(discord.AudioSource):
+    '''Replaces the FFmpeg audio sources so no processes are started.'''
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.cleaned_up = False
+
+    def read(self) -> bytes:
+        return b''
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        self.cleaned_up = True
+
+class FakeVoiceClient:
+    '''
+    Replaces :class:`discord.VoiceClient`. Every track plays for :attr:`track_length` seconds of wall time and then calls ``after`` on the event loop. Tracks that finish are reported as played to their end, like a voice client that read every frame.
+
+    Args:
+        loop: The event loop of the bot.
+        track_length: The time in seconds every track plays.
+    '''
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, track_length: float = 0.05) -> None:
+        self.loop = loop
+        self.track_length = track_length
+        self.source = None
+        self.played: int = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._after = None
+        self._paused = False
+
+    def play(self, source: discord.AudioSource, after=None) -> None:
+        self.source = source
+        self.played += 1
+        self._after = after
+        self._handle = self.loop.call_later(self.track_length, self._finish)
+
+    def _finish(self, completed: bool = True) -> None:
+        self._handle = None
+        if completed and isinstance(self.source, PlaybackSource):
+            self.source.frames = 1 << 30
+        if self.source:
+            self.source.cleanup()
+            self.source = None
+        if self._after:
+            self._after(None)
+
+    def stop(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._finish(False)
+
+    def is_playing(self) -> bool:
+        return self._handle is not None
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def pause(self) -> None:
+        self._paused = True
+
+    def resume(self) -> None:
+        self._paused = False
+
+    async def disconnect(self, force: bool = False) -> None:
+        self.stop()
+
+class FakePermissions:
+    connect = True
+
+class FakeMember:
+
+    def __init__(self, guild: 'FakeGuild') -> None:
+        self.guild = guild
+
+    async def move_to(self, channel: 'FakeChannel') -> None:
+        pass
+
+class FakeGuild:
+
+    def __init__(self, guild_id: int) -> None:
+        self.id = guild_id
+        self.me = FakeMember(self)
+        self.voice_client: Optional[FakeVoiceClient] = None
+
+class FakeChannel:
+    '''A voice channel whose :method:`connect` attaches a :class:`FakeVoiceClient` to its guild.'''
+
+    def __init__(self, guild: FakeGuild, track_length: float = 0.05) -> None:
+        self.guild = guild
+        self.track_length = track_length
+
+    def permissions_for(self, member: FakeMember) -> FakePermissions:
+        return FakePermissions()
+
+    async def connect(self) -> FakeVoiceClient:
+        self.guild.voice_client = FakeVoiceClient(asyncio.get_running_loop(), self.track_length)
+        return self.guild.voice_client
+
+class FakeClient:
+    '''Replaces the bot. Events are counted instead of dispatched.'''
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.events: Dict[str, int] = {}
+        self.listeners: List[tuple] = []
+
+    def add_listener(self, func: Any, name: str) -> None:
+        self.listeners.append((name, func))
+
+    def dispatch(self, event: str, *args: Any) -> None:
+        self.events[event] = self.events.get(event, 0) + 1
+
+def install(latency: float = 0.02, failure_rate: float = 0.0, playlist_size: int = 500, seed: int = 0) -> None:
+    '''
+    Replaces the extractor and the FFmpeg sources used by pisslink with the fakes. Must be called before the first extractor call and only works without worker processes.
+
+    Args:
+        latency: The time in seconds every extractor call blocks.
+        failure_rate: The share of extractor calls that raise.
+        playlist_size: The size of playlists whose url does not encode a size.
+        seed: The seed that decides which calls fail.
+    '''
+    FakeYoutubeDL.latency = latency
+    FakeYoutubeDL.failure_rate = failure_rate
+    FakeYoutubeDL.playlist_size = playlist_size
+    FakeYoutubeDL.seed = seed
+    FakeYoutubeDL.calls.reset()
+    pisslink.workers.YoutubeDL = FakeYoutubeDL
+    pisslink.workers._extractors.clear()
+    discord.FFmpegOpusAudio = FakeSource
+    discord.FFmpegPCMAudio = FakeSource
\ No newline at end of file
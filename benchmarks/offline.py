@@ -0,0 +1,245 @@
+'''
+Measures resolution throughput, event loop stalls, memory per guild and the gap between tracks without touching YouTube, Spotify or Discord.
+
+The extractor, Spotify client and voice clients are replaced by the deterministic fakes in ``fakes.py``, each with a configurable latency and failure rate. Memory is traced with :mod:`tracemalloc`, which slows everything down; pass ``--no-memory`` for throughput numbers.
+
+Scenarios:
+    playlists: Every guild queues its own YouTube playlist and the pool converts the first entries of every queue.
+    spotify: Every guild queues its own Spotify playlist, which is matched to YouTube by title search.
+    search: Many searches with repeated queries, to measure coalescing and the track cache.
+    playback: Every guild plays short tracks back to back through a fake voice client.
+
+Usage:
+    python benchmarks/offline.py [scenario|all] [--guilds 1000] [--tracks 500] [--latency 0.02] [--failure-rate 0.0] [--lazy-search]
+'''
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+from typing import Optional, Any, List, Dict, Callable, Awaitable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakes
+
+from pisslink import Pool, Playlist
+
+class LoopMonitor:
+    '''
+    Measures how long the event loop is blocked by sleeping for a short interval and recording how late it wakes up.
+
+    Args:
+        interval: The time in seconds between two checks.
+        threshold: The lateness in seconds above which a wake up counts as a stall.
+    '''
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.01) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stalled: float = 0.0
+        self.stalls: int = 0
+        self.max_lag: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stalled += lag
+                self.stalls += 1
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+
+def create_pool(client: fakes.FakeClient, options: argparse.Namespace) -> Pool:
+    pool = Pool(
+        client,
+        track_conversion_interval=30,
+        resolver_concurrency=options.concurrency,
+        cache_size=options.cache_size,
+        prefetch_count=options.prefetch,
+        preload_sources=True,
+        lazy_search=options.lazy_search,
+    )
+    pool.spotify = fakes.FakeSpotify(options.spotify_latency, options.failure_rate, options.tracks, options.seed)
+    return pool
+
+async def wait_until(condition: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+def settled(pool: Pool) -> bool:
+    return pool.scheduler.active == 0 and all(not player._conversions and player._pending_conversion() is None for player in pool._sessions.values())
+
+async def queue_playlists(pool: Pool, guilds: List[fakes.FakeGuild], url: Callable[[int], str]) -> List[Playlist]:
+    async def queue(guild: fakes.FakeGuild) -> Optional[Playlist]:
+        player = pool.get_player(guild)
+        try:
+            playlist = await player.get_tracks(url(guild.id), stream=True)
+        except Exception:
+            return
+        if isinstance(playlist, Playlist):
+            player.queue.add(playlist)
+        return playlist
+
+    playlists = await asyncio.gather(*[queue(guild) for guild in guilds])
+    await asyncio.gather(*[playlist.wait() for playlist in playlists if playlist])
+    return [playlist for playlist in playlists if playlist]
+
+async def scenario_playlists(pool: Pool, options: argparse.Namespace) -> Dict[str, Any]:
+    guilds = [fakes.FakeGuild(index) for index in range(options.guilds)]
+    started = time.perf_counter()
+    playlists = await queue_playlists(pool, guilds, lambda guild: f'https://www.youtube.com/playlist?list=BENCH{guild}x{options.tracks}')
+    loaded = time.perf_counter() - started
+    await wait_until(lambda: settled(pool), options.timeout)
+    elapsed = time.perf_counter() - started
+    calls = fakes.FakeYoutubeDL.calls
+    return {
+        'playlists loaded': len(playlists),
+        'tracks queued': sum(len(player.queue) for player in pool._sessions.values()),
+        'playlist load time': f'{loaded:.2f}s',
+        'tracks parsed per second': f'{sum(len(playlist.tracks) for playlist in playlists) / loaded:.0f}',
+        'conversions': calls.get('video') + calls.get('search'),
+        'resolutions per second': f'{(calls.get("video") + calls.get("search")) / elapsed:.1f}',
+        'failed extractions': calls.get('failed'),
+        'total time': f'{elapsed:.2f}s',
+    }
+
+async def scenario_spotify(pool: Pool, options: argparse.Namespace) -> Dict[str, Any]:
+    guilds = [fakes.FakeGuild(index) for index in range(options.guilds)]
+    started = time.perf_counter()
+    playlists = await queue_playlists(pool, guilds, lambda guild: f'https://open.spotify.com/playlist/BENCH{guild}x{options.tracks}')
+    loaded = time.perf_counter() - started
+    await wait_until(lambda: settled(pool), options.timeout)
+    elapsed = time.perf_counter() - started
+    return {
+        'playlists loaded': len(playlists),
+        'tracks queued': sum(len(player.queue) for player in pool._sessions.values()),
+        'playlist load time': f'{loaded:.2f}s',
+        'spotify calls': sum(pool.spotify.calls.counts.values()),
+        'searches': fakes.FakeYoutubeDL.calls.get('search'),
+        'videos resolved': fakes.FakeYoutubeDL.calls.get('video'),
+        'resolutions per second': f'{(fakes.FakeYoutubeDL.calls.get("search") + fakes.FakeYoutubeDL.calls.get("video")) / elapsed:.1f}',
+        'total time': f'{elapsed:.2f}s',
+    }
+
+async def scenario_search(pool: Pool, options: argparse.Namespace) -> Dict[str, Any]:
+    # A few popular songs are requested very often, like in a real bot.
+    queries = [f'artist {index % 50} - song {index % (options.tracks // 2 or 1)}' for index in range(options.tracks * 4)]
+    player = pool.get_player(fakes.FakeGuild(0))
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(options.guilds)
+
+    async def search(query: str) -> Any:
+        async with semaphore:
+            return await player.get_tracks(query)
+
+    results = await asyncio.gather(*[search(query) for query in queries])
+    elapsed = time.perf_counter() - started
+    return {
+        'searches': len(queries),
+        'found': sum(1 for result in results if result),
+        'full extractions': fakes.FakeYoutubeDL.calls.get('search') - fakes.FakeYoutubeDL.calls.get('flat'),
+        'extractor calls': fakes.FakeYoutubeDL.calls.get('search'),
+        'coalesced': pool.resolver.stats.coalesced,
+        'cache hit rate': f'{pool.cache.stats.hit_rate:.1%}',
+        'searches per second': f'{len(queries) / elapsed:.1f}',
+        'total time': f'{elapsed:.2f}s',
+    }
+
+async def scenario_playback(pool: Pool, options: argparse.Namespace) -> Dict[str, Any]:
+    guilds = [fakes.FakeGuild(index) for index in range(options.guilds)]
+    players = []
+    for guild in guilds:
+        player = pool.get_player(guild)
+        await player.connect(fakes.FakeChannel(guild, options.track_length))
+        players.append(player)
+    playlists = await queue_playlists(pool, guilds, lambda guild: f'https://www.youtube.com/playlist?list=PLAY{guild}x{options.plays}')
+    started = time.perf_counter()
+    await asyncio.gather(*[player.advance() for player in players])
+    await wait_until(lambda: all(player.current is None and not player.queue for player in players), options.timeout)
+    elapsed = time.perf_counter() - started
+    gaps = sorted(gap for player in players for gap in player.track_gaps)
+    return {
+        'guilds playing': len(players),
+        'tracks played': sum(guild.voice_client.played for guild in guilds),
+        'average gap': f'{sum(gaps) / len(gaps) * 1000 if gaps else 0:.2f}ms',
+        'p90 gap': f'{gaps[int(len(gaps) * 0.9)] * 1000 if gaps else 0:.2f}ms',
+        'max gap': f'{gaps[-1] * 1000 if gaps else 0:.2f}ms',
+        'total time': f'{elapsed:.2f}s',
+    }
+
+SCENARIOS: Dict[str, Callable[[Pool, argparse.Namespace], Awaitable[Dict[str, Any]]]] = {
+    'playlists': scenario_playlists,
+    'spotify': scenario_spotify,
+    'search': scenario_search,
+    'playback': scenario_playback,
+}
+
+async def run(name: str, options: argparse.Namespace) -> None:
+    fakes.install(options.latency, options.failure_rate, options.tracks, options.seed)
+    client = fakes.FakeClient()
+    if options.memory:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if options.memory else 0
+    pool = create_pool(client, options)
+    monitor = LoopMonitor()
+    monitor.start()
+    try:
+        results = await SCENARIOS[name](pool, options)
+    finally:
+        monitor.stop()
+        pool.scheduler.stop()
+    if options.memory:
+        used = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        results['memory per guild'] = f'{used / max(1, len(pool._sessions)) / 1024:.1f} KiB'
+    results['event loop stalled'] = f'{monitor.stalled:.3f}s in {monitor.stalls} stalls'
+    results['longest stall'] = f'{monitor.max_lag * 1000:.1f}ms'
+    print(name)
+    for key, value in results.items():
+        print(f'{key:>26}: {value}')
+    print()
+    pool.resolver.shutdown()
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Offline pisslink benchmarks.')
+    parser.add_argument('scenario', nargs='?', default='all', choices=['all', *SCENARIOS])
+    parser.add_argument('--guilds', type=int, default=1000, help='The amount of guilds, or concurrent searches in the search scenario.')
+    parser.add_argument('--tracks', type=int, default=500, help='The size of every playlist.')
+    parser.add_argument('--plays', type=int, default=5, help='The amount of tracks every guild plays in the playback scenario.')
+    parser.add_argument('--latency', type=float, default=0.02, help='The latency of every extractor call in seconds.')
+    parser.add_argument('--spotify-latency', type=float, default=0.05, help='The latency of every Spotify call in seconds.')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='The share of extractor and Spotify calls that fail.')
+    parser.add_argument('--track-length', type=float, default=0.2, help='The time in seconds every track plays in the playback scenario.')
+    parser.add_argument('--concurrency', type=int, default=16, help='The resolver concurrency of the pool.')
+    parser.add_argument('--prefetch', type=int, default=5, help='The amount of queue entries every player converts ahead of time.')
+    parser.add_argument('--cache-size', type=int, default=1024, help='The size of the track cache.')
+    parser.add_argument('--timeout', type=float, default=600, help='The maximum time in seconds to wait for a scenario to settle.')
+    parser.add_argument('--seed', type=int, default=0, help='The seed that decides which calls fail.')
+    parser.add_argument('--lazy-search', action='store_true', help='Return flat search results and extract them when they are played.')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='Do not trace memory.')
+    return parser
+
+def main() -> None:
+    options = create_parser().parse_args()
+    for name in SCENARIOS if options.scenario == 'all' else [options.scenario]:
+        asyncio.run(run(name, options))
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+'''
+Measures the memory used per queued track.
+
+Every guild parses its own copy of the same playlist, like it would when the playlist is requested in several guilds. The legacy representation is the plain class with a per-instance ``__dict__`` and a stored url that :class:`PartialTrack` used before it got ``__slots__``.
+
+Usage:
+    python benchmarks/track_memory.py [tracks] [guilds]
+'''
+
+import sys
+import tracemalloc
+
+from pisslink import PartialTrack, TrackStore, Playlist
+from pisslink.queue import Queue
+
+class LegacyPartialTrack:
+
+    def __init__(self, data: dict) -> None:
+        self.title = data['title']
+        self.duration = data.get('duration', 0) * 1000
+        self.url = data.get('url', None)
+
+def entries(amount: int):
+    # Build fresh strings for every call, like json parsing does for every response.
+    for i in range(amount):
+        identifier = ''.join(['vid', str(i).zfill(8)])
+        yield ''.join(['Artist ', str(i % 500), ' - Song title number ', str(i)]), 200 + i % 100, identifier
+
+def legacy(amount: int) -> list:
+    return [LegacyPartialTrack({'title': title, 'duration': duration, 'url': f'https://www.youtube.com/watch?v={identifier}'}) for title, duration, identifier in entries(amount)]
+
+def slotted(amount: int) -> list:
+    return [PartialTrack({'title': title, 'duration': duration, 'id': identifier}) for title, duration, identifier in entries(amount)]
+
+def store(amount: int) -> TrackStore:
+    tracks = TrackStore()
+    for title, duration, identifier in entries(amount):
+        tracks.append(title, duration, identifier)
+    return tracks
+
+def queued(amount: int) -> Queue:
+    queue = Queue()
+    for track in slotted(amount):
+        queue.add(track)
+    return queue
+
+def queued_store(amount: int) -> Queue:
+    # Playlists from get_tracks are backed by a store and queued as references into it.
+    queue = Queue()
+    queue.add(Playlist({'title': 'playlist', 'tracks': store(amount)}))
+    return queue
+
+def measure(build, amount: int, guilds: int) -> float:
+    tracemalloc.start()
+    kept = [build(amount) for _ in range(guilds)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size / (amount * guilds)
+
+def main() -> None:
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    guilds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f'{amount} tracks in {guilds} guilds')
+    for name, build in (('legacy objects', legacy), ('slotted objects', slotted), ('track store', store), ('queued objects', queued), ('queued store', queued_store)):
+        print(f'{name:>16}: {measure(build, amount, guilds):8.1f} bytes per track')
+
+if __name__ == '__main__':
+    main()
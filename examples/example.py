@@ -44,6 +44,7 @@ class Music(commands.Cog):
                 if not player.playing:
                     await player.advance()
 
-client = Client()
-client.add_cog(Music(client))
-client.run('TOKEN')
+if __name__ == '__main__': # required when worker processes are enabled, they import this file again
+    client = Client()
+    client.add_cog(Music(client))
+    client.run('TOKEN')
@@ -1,4 +1,19 @@
 from .player import Player
 from .pool import Pool
-from .tracks import PartialTrack, Track, LocalTrack, Playlist, Playable
+from .tracks import PartialTrack, Track, LocalTrack, Playlist, Playable, TrackStore
+from .resolver import Resolver, ResolverStats
+from .cache import TrackCache, CacheStats
+from .store import MetadataStore
+from .transcode import TranscodeCache
+from .library import LocalLibrary, LibraryScan
+from .workers import WorkerShard, WorkerError
+from .scheduler import ConversionScheduler
+from .proxies import ProxyManager, ProxyStats
+from .metrics import MetricsCollector, InMemoryMetrics, Histogram
+from .matching import SpotifyMatcher
+from .segments import SegmentCache, SegmentSource
+from .demux import OpusReaderSource, DemuxError
+from .query import Query, parse_query
+from .sessions import SessionStore, SessionSnapshot
+from .sources import PlaybackSource
 from .errors import *
\ No newline at end of file
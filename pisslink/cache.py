@@ -0,0 +1,126 @@
+import time
+
+from collections import OrderedDict
+from typing import Optional, Any, Tuple
+
+from .metrics import MetricsCollector
+
+class CacheStats:
+    '''
+    Hit and miss statistics collected by the :class:`TrackCache`.
+
+    Attributes:
+        hits: The amount of lookups that returned a cached value.
+        misses: The amount of lookups that found nothing or an expired value.
+        evictions: The amount of values that were dropped because the cache was full.
+        expirations: The amount of values that were dropped because they outlived the TTL.
+    '''
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        '''
+        Gets the fraction of lookups that returned a cached value.
+
+        Returns:
+            float: The hit rate between 0 and 1.
+        '''
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class TrackCache:
+    '''
+    A size bounded LRU cache with a TTL that maps normalized queries and video IDs to resolved tracks. This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    The TTL should stay below the lifetime of the signed stream URL stored in :attr:`Track.endpoint`, which expires after a few hours. Values with a known :attr:`expires_at` never outlive it.
+
+    Args:
+        max_size: The maximum amount of entries to keep. Set to 0 to disable caching.
+        ttl: The time in seconds after which an entry expires.
+    '''
+
+    def __init__(self, max_size: int = 1024, ttl: int = 1800) -> None:
+        self.max_size: int = max_size
+        self.ttl: int = ttl
+        self.stats: CacheStats = CacheStats()
+        self.metrics: MetricsCollector = MetricsCollector()
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: str) -> Optional[Any]:
+        '''
+        Gets the value stored under :param:`key` and marks it as recently used.
+
+        Args:
+            key: The normalized key to look up.
+
+        Returns:
+            The cached value, if the key is unknown or expired, :class:`None` is returned.
+        '''
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            self.metrics.increment('cache.misses')
+            return
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.metrics.increment('cache.expirations')
+            self.stats.misses += 1
+            self.metrics.increment('cache.misses')
+            return
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        self.metrics.increment('cache.hits')
+        return entry[1]
+
+    def put(self, value: Any, *keys: str) -> None:
+        '''
+        Stores :param:`value` under every given key, evicting the least recently used entries if the cache is full.
+
+        Args:
+            value: The value to store.
+            *keys: The normalized keys to store the value under.
+        '''
+        if self.max_size <= 0 or value is None:
+            return
+        lifetime = self.ttl
+        if (expires_at := getattr(value, 'expires_at', None)) is not None:
+            lifetime = min(lifetime, expires_at - time.time())
+        if lifetime <= 0:
+            return
+        expires = time.monotonic() + lifetime
+        for key in keys:
+            if key is None:
+                continue
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+            self.metrics.increment('cache.evictions')
+
+    def invalidate(self, *keys: str) -> None:
+        '''
+        Removes the given keys from the cache.
+
+        Args:
+            *keys: The normalized keys to remove.
+        '''
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        '''Clears the cache.'''
+        self._entries.clear()
\ No newline at end of file
@@ -0,0 +1,396 @@
+import http.client
+import io
+import struct
+import urllib.request
+
+from typing import Optional, Any, Iterator, List, Tuple
+
+import discord
+
+from .sources import FRAME_LENGTH, seek_options
+
+OGG_PAGE = struct.Struct('<4sBBqIIIB')
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+CODEC_ID = 0x86
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+SIMPLE_BLOCK = 0xA3
+CUES = 0x1C53BB6B
+CUE_POINT = 0xBB
+CUE_TIME = 0xB3
+CUE_TRACK_POSITIONS = 0xB7
+CUE_CLUSTER_POSITION = 0xF1
+MASTER_ELEMENTS = (SEGMENT, INFO, CLUSTER, TRACKS, TRACK_ENTRY, BLOCK_GROUP, CUES, CUE_POINT, CUE_TRACK_POSITIONS)
+UINT_ELEMENTS = (TIMECODE_SCALE, CLUSTER_TIMECODE, CUE_TIME, CUE_CLUSTER_POSITION)
+OPUS_SAMPLE_RATE = 48
+OPUS_CONTAINERS = ('webm', 'ogg', 'opus')
+BUFFER_SIZE = 64 * 1024
+
+class DemuxError(Exception):
+    '''Raised when a stream is not WebM or Ogg with an Opus track.'''
+    pass
+
+class HTTPStream(io.RawIOBase):
+    '''
+    A raw stream of an HTTP response that reconnects with a ``Range`` request when the connection drops. Seeking closes the response and the next read requests the range from the new position.
+
+    Args:
+        url: The url to read.
+        timeout: The socket timeout in seconds.
+        retries: The amount of times the connection is opened again after it failed.
+    '''
+
+    def __init__(self, url: str, timeout: float = 10, retries: int = 3) -> None:
+        self.url: str = url
+        self.timeout: float = timeout
+        self.retries: int = retries
+        self.position: int = 0
+        self._response: Optional[Any] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation('Can not seek relative to the end of an HTTP stream.')
+        if offset != self.position:
+            self._close_response()
+            self.position = offset
+        return self.position
+
+    def _open(self) -> None:
+        request = urllib.request.Request(self.url, headers={'Range': f'bytes={self.position}-'} if self.position else {})
+        self._response = urllib.request.urlopen(request, timeout=self.timeout)
+
+    def readinto(self, buffer: Any) -> int:
+        for attempt in range(self.retries + 1):
+            try:
+                if self._response is None:
+                    self._open()
+                read = self._response.readinto(buffer)
+                if not read and len(buffer) and self._response.length:
+                    raise ConnectionError('The connection closed before the response was complete.')
+                self.position += read
+                return read
+            except (OSError, http.client.HTTPException):
+                self._close_response()
+                if attempt == self.retries:
+                    raise
+        return 0
+
+    def _close_response(self) -> None:
+        if self._response is not None:
+            try:
+                self._response.close()
+            except:
+                pass
+            self._response = None
+
+    def close(self) -> None:
+        self._close_response()
+        super().close()
+
+def _read_exact(stream: io.BufferedIOBase, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError
+    return data
+
+def _skip(stream: io.BufferedIOBase, size: int) -> None:
+    while size > 0:
+        if not (skipped := len(stream.read(min(size, BUFFER_SIZE)))):
+            raise EOFError
+        size -= skipped
+
+def _read_vint(stream: io.BufferedIOBase, keep_marker: bool = False) -> Optional[int]:
+    '''Reads an EBML variable size integer. Sizes with every value bit set mean an unknown size and are returned as :class:`None`.'''
+    first = _read_exact(stream, 1)[0]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise DemuxError('Invalid EBML integer.')
+    value = first if keep_marker else first & (0xFF >> length)
+    unknown = value == (0xFF >> length)
+    for byte in _read_exact(stream, length - 1):
+        value = (value << 8) | byte
+        unknown = unknown and byte == 0xFF
+    return None if unknown and not keep_marker else value
+
+def _read_block_vint(data: memoryview, offset: int) -> Tuple[int, int]:
+    '''Reads an EBML variable size integer from a block, returning the value and the offset behind it.'''
+    first = data[offset]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    value = first & (0xFF >> length)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    return value, offset + length
+
+def _block_timecode(block: bytes) -> int:
+    '''Reads the timecode of a WebM block, relative to its cluster.'''
+    _, offset = _read_block_vint(memoryview(block), 0)
+    return int.from_bytes(block[offset:offset + 2], 'big', signed=True)
+
+def _block_frames(block: bytes, track: Optional[int]) -> List[bytes]:
+    '''Splits a WebM block of :param:`track` into its frames, handling all three lacing modes. Blocks of other tracks return no frames.'''
+    data = memoryview(block)
+    number, offset = _read_block_vint(data, 0)
+    if track is not None and number != track:
+        return []
+    flags = data[offset + 2]
+    offset += 3
+    lacing = (flags >> 1) & 0x03
+    if not lacing:
+        return [bytes(data[offset:])]
+    count = data[offset] + 1
+    offset += 1
+    sizes = []
+    if lacing == 1:
+        for _ in range(count - 1):
+            size = 0
+            while data[offset] == 0xFF:
+                size += 255
+                offset += 1
+            size += data[offset]
+            offset += 1
+            sizes.append(size)
+    elif lacing == 3:
+        size, offset = _read_block_vint(data, offset)
+        sizes.append(size)
+        for _ in range(count - 2):
+            start = offset
+            raw, offset = _read_block_vint(data, offset)
+            length = offset - start
+            size += raw - ((1 << (7 * length - 1)) - 1)
+            sizes.append(size)
+    else:
+        sizes = [(len(data) - offset) // count] * (count - 1)
+    sizes.append(len(data) - offset - sum(sizes))
+    frames = []
+    for size in sizes:
+        frames.append(bytes(data[offset:offset + size]))
+        offset += size
+    return frames
+
+def webm_packets(stream: io.BufferedIOBase, start: int = 0) -> Iterator[bytes]:
+    '''
+    Reads the Opus packets of a WebM stream in a single forward pass, so it works on HTTP responses.
+    To start at an offset, the stream jumps to the cluster the ``Cues`` index names for it, which takes a single range request. Streams without an index before the first cluster are read from the start and the packets before the offset are dropped.
+
+    Args:
+        stream: The buffered stream, positioned at the EBML header.
+        start: The position in milliseconds of the first packet to read.
+
+    Yields:
+        bytes: The Opus packets in order.
+
+    Raises:
+        :exc:`DemuxError`: If the stream is not WebM or has no Opus track.
+    '''
+    if _read_vint(stream, True) != EBML_HEADER:
+        raise DemuxError('Not a WebM stream.')
+    _skip(stream, _read_vint(stream) or 0)
+    track, entry = None, {}
+    segment, scale, cluster_time = None, 1000000, 0
+    cue_time, cluster = None, None
+    while True:
+        try:
+            element = _read_vint(stream, True)
+        except EOFError:
+            return
+        size = _read_vint(stream)
+        if element in MASTER_ELEMENTS:
+            if element == SEGMENT and start and stream.seekable():
+                segment = stream.tell()
+            elif element == TRACK_ENTRY:
+                entry = {}
+            elif element == CUE_POINT:
+                cue_time = None
+            elif element == CLUSTER and cluster is not None:
+                position, cluster = segment + cluster, None
+                stream.seek(position)
+            continue
+        if size is None:
+            raise DemuxError('Unknown size for a non master element.')
+        if element in (SIMPLE_BLOCK, BLOCK):
+            if track is None:
+                raise DemuxError('The WebM stream has no Opus track.')
+            try:
+                block = _read_exact(stream, size)
+            except EOFError:
+                return
+            frames = _block_frames(block, track)
+            if start and frames:
+                skipped = max(0, (start - (cluster_time + _block_timecode(block)) * scale // 1000000) // FRAME_LENGTH)
+                frames = frames[skipped:]
+                if frames:
+                    start = 0
+            yield from frames
+        elif element in UINT_ELEMENTS:
+            try:
+                value = int.from_bytes(_read_exact(stream, size), 'big')
+            except EOFError:
+                return
+            if element == TIMECODE_SCALE:
+                scale = value
+            elif element == CLUSTER_TIMECODE:
+                cluster_time = value
+            elif element == CUE_TIME:
+                cue_time = value
+            elif start and segment is not None and cue_time is not None and cue_time * scale // 1000000 <= start:
+                cluster = value
+        elif element in (TRACK_NUMBER, CODEC_ID):
+            value = _read_exact(stream, size)
+            entry[element] = int.from_bytes(value, 'big') if element == TRACK_NUMBER else value.rstrip(b'\x00').decode('ascii', 'replace')
+            if track is None and entry.get(CODEC_ID) == 'A_OPUS' and TRACK_NUMBER in entry:
+                track = entry[TRACK_NUMBER]
+        else:
+            try:
+                _skip(stream, size)
+            except EOFError:
+                return
+
+def ogg_packets(stream: io.BufferedIOBase, start: int = 0) -> Iterator[bytes]:
+    '''
+    Reads the Opus packets of an Ogg stream, skipping the ``OpusHead`` and ``OpusTags`` headers.
+    To start at an offset, pages whose packets all end before it are dropped by their granule position.
+
+    Args:
+        stream: The buffered stream, positioned at the first page.
+        start: The position in milliseconds of the first packet to read.
+
+    Yields:
+        bytes: The Opus packets in order.
+
+    Raises:
+        :exc:`DemuxError`: If the stream is not Ogg or has no Opus track.
+    '''
+    partial = bytearray()
+    headers = 0
+    target = start * OPUS_SAMPLE_RATE
+    pre_skip = 0
+    while True:
+        try:
+            header = stream.read(OGG_PAGE.size)
+            if not header:
+                return
+            if len(header) < OGG_PAGE.size:
+                raise EOFError
+            magic, _, _, granule, _, _, _, segments = OGG_PAGE.unpack(header)
+            if magic != b'OggS':
+                raise DemuxError('Not an Ogg stream.')
+            lacing = _read_exact(stream, segments)
+            body = memoryview(_read_exact(stream, sum(lacing)))
+        except EOFError:
+            return
+        skip = headers >= 2 and target > 0 and granule - pre_skip <= target
+        if headers >= 2 and not skip:
+            target = 0
+        offset = 0
+        for value in lacing:
+            partial += body[offset:offset + value]
+            offset += value
+            if value == 255:
+                continue
+            packet, partial = bytes(partial), bytearray()
+            if headers < 2:
+                if not packet.startswith(b'OpusHead' if not headers else b'OpusTags'):
+                    raise DemuxError('The Ogg stream has no Opus track.')
+                if not headers:
+                    pre_skip = int.from_bytes(packet[10:12], 'little')
+                headers += 1
+                continue
+            if not skip:
+                yield packet
+
+class OpusReaderSource(discord.AudioSource):
+    '''
+    An Opus audio source that demuxes WebM or Ogg in this process instead of starting an FFmpeg process. The stream is opened by the first :method:`read`, which runs in the voice thread, so creating the source never blocks.
+    If the stream can not be demuxed before the first packet, the source falls back to :class:`FFmpegOpusAudio`. Pass a :class:`Track` whose codec is known to skip streams that are certainly not Opus.
+
+    Args:
+        source: The url or path to read.
+        container: The container of the stream, either ``webm``, ``ogg`` or ``opus``. Guessed from the first bytes if not given.
+        start: The position in milliseconds to start at.
+    '''
+
+    def __init__(self, source: str, container: Optional[str] = None, start: int = 0) -> None:
+        self.source: str = source
+        self.container: Optional[str] = container
+        self.start: int = start
+        self._stream: Optional[io.BufferedReader] = None
+        self._packets: Optional[Iterator[bytes]] = None
+        self._fallback: Optional[discord.AudioSource] = None
+        self._started: bool = False
+
+    @staticmethod
+    def supports(codec: Optional[str], container: Optional[str]) -> bool:
+        '''
+        Shows whether a stream can be demuxed by this source.
+
+        Args:
+            codec: The audio codec of the stream.
+            container: The container of the stream.
+
+        Returns:
+            bool: Whether the stream is Opus in WebM or Ogg.
+        '''
+        return codec == 'opus' and container in OPUS_CONTAINERS
+
+    def _open(self) -> Iterator[bytes]:
+        if self.source.startswith(('http://', 'https://')):
+            self._stream = io.BufferedReader(HTTPStream(self.source), BUFFER_SIZE)
+        else:
+            self._stream = open(self.source, 'rb', buffering=BUFFER_SIZE)
+        container = self.container or ('ogg' if self._stream.peek(4)[:4] == b'OggS' else 'webm')
+        return ogg_packets(self._stream, self.start) if container in ('ogg', 'opus') else webm_packets(self._stream, self.start)
+
+    def read(self) -> bytes:
+        if self._fallback:
+            return self._fallback.read()
+        try:
+            if self._packets is None:
+                self._packets = self._open()
+            packet = next(self._packets, b'')
+            self._started = True
+            return packet
+        except:
+            if self._started:
+                return b''
+            self._close()
+            self._fallback = discord.FFmpegOpusAudio(self.source, codec='copy', **seek_options(self.start))
+            return self._fallback.read()
+
+    def is_opus(self) -> bool:
+        return True
+
+    def _close(self) -> None:
+        if self._stream:
+            try:
+                self._stream.close()
+            except:
+                pass
+            self._stream = None
+
+    def cleanup(self) -> None:
+        self._close()
+        if self._fallback:
+            self._fallback.cleanup()
\ No newline at end of file
@@ -8,4 +8,8 @@ class NoAccess(PlayerError):
 
 class NotConnected(PlayerError):
     '''Raised when the bot is not connected to a :class:`VoiceChannel`.'''
+    pass
+
+class NotPlaying(PlayerError):
+    '''Raised when nothing is playing or the current track can not be seeked.'''
     pass
\ No newline at end of file
@@ -0,0 +1,214 @@
+import asyncio
+import os
+
+import ffmpeg
+
+from typing import Optional, List, Dict, Tuple
+
+from .resolver import Resolver
+from .store import MetadataStore
+from .tracks import LocalTrack
+
+LOCAL_FORMATS = ('webm', 'mkv', 'ogg', 'avi', 'mov', 'mp4', 'mpeg', 'mpg', 'm4v', 'aac', 'flac', 'mp3', 'wav')
+
+def local_title(path: str) -> str:
+    '''
+    Builds the title of a local file from its file name.
+
+    Args:
+        path: The path to the file.
+
+    Returns:
+        str: The title of the file.
+    '''
+    return os.path.basename(path).rsplit('.', 1)[0].replace('_', ' ').rsplit(' - ', 1)[0]
+
+def probe_duration(path: str) -> int:
+    '''
+    Probes the duration of a local file with FFmpeg. This function blocks and should be run in a worker thread.
+
+    Args:
+        path: The path to the file.
+
+    Returns:
+        int: The duration of the file in seconds.
+    '''
+    return round(float(ffmpeg.probe(path)['format']['duration']))
+
+class LibraryScan:
+    '''
+    The result of a :method:`LocalLibrary.scan`.
+
+    Attributes:
+        added: The amount of files that were added to the index.
+        updated: The amount of files that changed and were probed again.
+        removed: The amount of files that no longer exist and were removed from the index.
+        unchanged: The amount of files that were skipped because they did not change.
+        failed: The amount of files that could not be probed.
+    '''
+
+    def __init__(self) -> None:
+        self.added: int = 0
+        self.updated: int = 0
+        self.removed: int = 0
+        self.unchanged: int = 0
+        self.failed: int = 0
+
+class LocalLibrary:
+    '''
+    A searchable index of local audio files. Directories are scanned in a worker thread and files are probed concurrently in a bounded pool of workers, so loading a large music folder never blocks the event loop.
+    This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Rescanning a directory only probes files whose modification time changed.
+
+    Args:
+        concurrency: The maximum amount of files that are probed at the same time.
+        store: The :class:`MetadataStore` that keeps probe results across restarts, if enabled.
+    '''
+
+    def __init__(self, concurrency: int = 8, store: Optional[MetadataStore] = None) -> None:
+        self.resolver: Resolver = Resolver(concurrency)
+        self.store: Optional[MetadataStore] = store
+        self._index: Dict[str, Tuple[float, LocalTrack, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def tracks(self) -> List[LocalTrack]:
+        '''
+        Gets all indexed tracks.
+
+        Returns:
+            list: The indexed :class:`LocalTrack` objects.
+        '''
+        return [track for _, track, _ in self._index.values()]
+
+    def get(self, path: str) -> Optional[LocalTrack]:
+        '''
+        Gets the indexed track of a file if the file did not change since it was indexed.
+
+        Args:
+            path: The path to the file.
+
+        Returns:
+            :class:`LocalTrack`: The indexed track, if the file is not indexed or changed, :class:`None` is returned.
+        '''
+        entry = self._index.get(os.path.abspath(path))
+        if not entry:
+            return
+        try:
+            if os.path.getmtime(entry[1].path) != entry[0]:
+                return
+        except OSError:
+            return
+        return entry[1]
+
+    def search(self, query: str, limit: int = 10) -> List[LocalTrack]:
+        '''
+        Searches the index for tracks whose title contains every word of :param:`query`.
+
+        Args:
+            query: The words to search for.
+            limit: The maximum amount of results.
+
+        Returns:
+            list: The matching :class:`LocalTrack` objects. Titles starting with the query come first, then shorter titles.
+        '''
+        words = query.casefold().split()
+        if not words:
+            return []
+        phrase = ' '.join(words)
+        matches = [(not folded.startswith(phrase), len(folded), track) for _, track, folded in self._index.values() if all(word in folded for word in words)]
+        matches.sort(key=lambda match: match[:2])
+        return [track for _, _, track in matches[:limit]]
+
+    async def scan(self, directory: str, recursive: bool = True) -> LibraryScan:
+        '''
+        Indexes all supported files in :param:`directory`. Files that are already indexed are only probed again if they changed, and indexed files that no longer exist are removed.
+
+        Args:
+            directory: The directory to scan.
+            recursive: Whether to scan subdirectories as well.
+
+        Returns:
+            :class:`LibraryScan`: The amount of added, updated, removed and unchanged files.
+        '''
+        directory = os.path.abspath(directory)
+        found = await self.resolver.run(self._walk, directory, recursive)
+        result = LibraryScan()
+        prefix = os.path.join(directory, '')
+        for path in [path for path in self._index if path.startswith(prefix) and path not in found and (recursive or os.path.dirname(path) == directory)]:
+            del self._index[path]
+            result.removed += 1
+        changed = []
+        for path, mtime in found.items():
+            if (entry := self._index.get(path)) and entry[0] == mtime:
+                result.unchanged += 1
+            else:
+                changed.append((path, mtime, entry is not None))
+        for outcome in await asyncio.gather(*[self._index_file(path, mtime) for path, mtime, _ in changed]):
+            if not outcome:
+                result.failed += 1
+        for path, _, existed in changed:
+            if path in self._index:
+                if existed:
+                    result.updated += 1
+                else:
+                    result.added += 1
+        return result
+
+    def _walk(self, directory: str, recursive: bool) -> Dict[str, float]:
+        '''Lists the supported files in a directory with their modification times. This method blocks and runs in a worker thread.'''
+        found = {}
+        pending = [directory]
+        while pending:
+            try:
+                entries = list(os.scandir(pending.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append(entry.path)
+                    elif entry.is_file() and entry.name.lower().endswith(LOCAL_FORMATS):
+                        found[entry.path] = entry.stat().st_mtime
+                except OSError:
+                    continue
+        return found
+
+    async def _index_file(self, path: str, mtime: float) -> bool:
+        '''
+        Probes a single file and adds it to the index. This method should not be called directly.
+
+        Args:
+            path: The absolute path to the file.
+            mtime: The modification time of the file.
+
+        Returns:
+            bool: Whether the file was indexed.
+        '''
+        stored = None
+        if self.store:
+            try:
+                stored = await self.resolver.run(self.store.get_local, path, mtime)
+            except:
+                stored = None
+        if stored:
+            title, duration = stored
+        else:
+            title = local_title(path)
+            try:
+                duration = await self.resolver.run(probe_duration, path)
+            except:
+                self._index.pop(path, None)
+                return False
+            if self.store:
+                try:
+                    await self.resolver.run(self.store.put_local, path, mtime, title, duration)
+                except:
+                    pass
+        track = LocalTrack({'title': title, 'duration': duration, 'path': path})
+        self._index[path] = (mtime, track, title.casefold())
+        return True
\ No newline at end of file
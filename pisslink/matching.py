@@ -0,0 +1,241 @@
+import asyncio
+import difflib
+import re
+
+from collections import OrderedDict
+from typing import Optional, Any, List, Dict, Iterable, Callable, Awaitable
+
+from .tracks import PartialTrack
+from .store import MetadataStore
+from .resolver import Resolver
+from .metrics import MetricsCollector
+
+NOISE_REGEX = re.compile(r'[\(\[][^\)\]]*(official|video|audio|lyrics?|visuali[sz]er|hd|hq|4k|mv|m/v)[^\)\]]*[\)\]]', re.IGNORECASE)
+UNWANTED_WORDS = ('live', 'cover', 'karaoke', 'remix', 'instrumental', 'nightcore', 'sped up', 'slowed', 'reverb', '8d', 'acoustic', 'reaction')
+
+def normalize(text: str) -> str:
+    '''
+    Normalizes a title for comparison by dropping case, punctuation and bracketed noise such as ``(Official Video)``.
+
+    Args:
+        text: The title to normalize.
+
+    Returns:
+        str: The normalized title.
+    '''
+    return ' '.join(re.findall(r'\w+', NOISE_REGEX.sub(' ', text).casefold()))
+
+def score_candidate(candidate: dict, title: str, duration: int, isrc: Optional[str] = None) -> float:
+    '''
+    Scores how likely a YouTube search result is the recording of a Spotify track.
+
+    The score combines the title similarity and the difference in duration. Auto generated ``- Topic`` uploads get a small bonus, versions such as covers or live recordings that the Spotify title does not ask for get a penalty and a result that mentions the ISRC of the recording wins outright.
+
+    Args:
+        candidate: The flat search result, with at least ``title`` and optionally ``duration``, ``uploader`` and ``description``.
+        title: The ``Artist - Title`` of the Spotify track.
+        duration: The duration of the Spotify track in seconds.
+        isrc: The ISRC of the Spotify track, if known.
+
+    Returns:
+        float: The score, higher is better. A close match scores about 1.
+    '''
+    target = normalize(title)
+    name = normalize(candidate.get('title') or '')
+    uploader = candidate.get('uploader') or candidate.get('channel') or ''
+    similarity = max(
+        difflib.SequenceMatcher(None, target, name).ratio(),
+        difflib.SequenceMatcher(None, target, normalize(f'{uploader.replace(" - Topic", "")} {candidate.get("title") or ""}')).ratio(),
+    )
+    if duration and candidate.get('duration'):
+        difference = abs(float(candidate['duration']) - duration)
+        timing = 1.0 if difference <= 2 else max(0.0, 1 - (difference - 2) / 20)
+    else:
+        timing = 0.5
+    score = 0.55 * similarity + 0.45 * timing
+    if uploader.endswith(' - Topic'):
+        score += 0.1
+    padded_name, padded_target = f' {name} ', f' {target} '
+    score -= 0.25 * min(2, sum(1 for word in UNWANTED_WORDS if f' {word} ' in padded_name and f' {word} ' not in padded_target))
+    if isrc and isrc.casefold() in f'{candidate.get("title") or ""} {candidate.get("description") or ""}'.casefold():
+        score += 1.0
+    return score
+
+class SpotifyMatcher:
+    '''
+    Matches Spotify tracks to YouTube videos. This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Every unmatched track costs one flat search that returns several candidates without resolving any of them. The candidates are scored by :func:`score_candidate` and, if none of them is convincing, the ISRC of the track is searched as well.
+    Matches are remembered by Spotify track ID in memory and in the :class:`MetadataStore`, so a track is only searched once.
+
+    Args:
+        store: The :class:`MetadataStore` that keeps matches across restarts, if enabled.
+        resolver: The :class:`Resolver` that runs store calls and coalesces concurrent matches of the same track.
+        candidates: The amount of search results that are scored per track.
+        concurrency: The maximum amount of searches a single batch runs at the same time.
+        memo_size: The maximum amount of matches remembered in memory.
+        min_score: The score below which the ISRC of a track is searched as well.
+    '''
+
+    def __init__(
+            self,
+            store: Optional[MetadataStore] = None,
+            resolver: Optional[Resolver] = None,
+            candidates: int = 5,
+            concurrency: int = 4,
+            memo_size: int = 10000,
+            min_score: float = 0.6
+        ) -> None:
+        self.store: Optional[MetadataStore] = store
+        self.resolver: Resolver = resolver or Resolver()
+        self.candidates: int = max(1, candidates)
+        self.concurrency: int = max(1, concurrency)
+        self.memo_size: int = memo_size
+        self.min_score: float = min_score
+        self.metrics: MetricsCollector = MetricsCollector()
+        self._memo: 'OrderedDict[str, str]' = OrderedDict()
+
+    def recall(self, spotify_id: str) -> Optional[str]:
+        '''
+        Gets the YouTube video a Spotify track was matched to from memory.
+
+        Args:
+            spotify_id: The Spotify track ID.
+
+        Returns:
+            str: The YouTube video ID, if the track is not remembered, :class:`None` is returned.
+        '''
+        if video_id := self._memo.get(spotify_id):
+            self._memo.move_to_end(spotify_id)
+        return video_id
+
+    def remember(self, spotify_id: str, video_id: str) -> None:
+        '''
+        Remembers the YouTube video a Spotify track was matched to in memory.
+
+        Args:
+            spotify_id: The Spotify track ID.
+            video_id: The YouTube video ID.
+        '''
+        if self.memo_size <= 0:
+            return
+        self._memo[spotify_id] = video_id
+        self._memo.move_to_end(spotify_id)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    async def lookup(self, spotify_ids: Iterable[str]) -> Dict[str, str]:
+        '''
+        Gets the known matches of a batch of Spotify tracks from memory and the :class:`MetadataStore`, without searching.
+
+        Args:
+            spotify_ids: The Spotify track IDs.
+
+        Returns:
+            dict: A mapping of Spotify track ID to YouTube video ID for every track that was matched before.
+        '''
+        matches = {}
+        missing = []
+        for spotify_id in spotify_ids:
+            if not spotify_id:
+                continue
+            if video_id := self.recall(spotify_id):
+                matches[spotify_id] = video_id
+            else:
+                missing.append(spotify_id)
+        if missing and self.store:
+            try:
+                stored = await self.resolver.run(self.store.get_spotify_videos, missing)
+            except:
+                stored = {}
+            for spotify_id, video_id in stored.items():
+                self.remember(spotify_id, video_id)
+            matches.update(stored)
+        self.metrics.increment('matcher.known', len(matches))
+        return matches
+
+    async def match(self, track: PartialTrack, extract: Callable[..., Awaitable[Any]]) -> Optional[str]:
+        '''
+        Matches a single Spotify track to a YouTube video. Concurrent matches of the same track share one search.
+
+        Args:
+            track: The :class:`PartialTrack` created from the Spotify track.
+            extract: The coroutine function that runs extractor functions, called as ``extract(name, *args)``.
+
+        Returns:
+            str: The YouTube video ID, if no video is found, :class:`None` is returned.
+        '''
+        if not track.spotify_id:
+            return await self._search(track, extract)
+        if video_id := (await self.lookup([track.spotify_id])).get(track.spotify_id):
+            return video_id
+        return await self.resolver.coalesce(f'match:{track.spotify_id}', self._search, track, extract)
+
+    async def match_many(self, tracks: Iterable[PartialTrack], extract: Callable[..., Awaitable[Any]]) -> int:
+        '''
+        Matches a batch of Spotify tracks, looking up known matches in one go and searching the rest with bounded concurrency. Matched tracks get their :attr:`PartialTrack.identifier` filled in, so they resolve without another search.
+
+        Args:
+            tracks: The :class:`PartialTrack` objects created from Spotify tracks. Tracks that already have a video are skipped.
+            extract: The coroutine function that runs extractor functions, called as ``extract(name, *args)``.
+
+        Returns:
+            int: The amount of tracks that were matched.
+        '''
+        tracks = [track for track in tracks if isinstance(track, PartialTrack) and track.spotify_id and not track.url]
+        if not tracks:
+            return 0
+        known = await self.lookup([track.spotify_id for track in tracks])
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def match(track: PartialTrack) -> bool:
+            if not (video_id := known.get(track.spotify_id)):
+                async with semaphore:
+                    try:
+                        video_id = await self.resolver.coalesce(f'match:{track.spotify_id}', self._search, track, extract)
+                    except asyncio.CancelledError:
+                        raise
+                    except:
+                        return False
+            if video_id and not track.url:
+                track.identifier = video_id
+            return bool(video_id)
+
+        return sum(await asyncio.gather(*[match(track) for track in tracks]))
+
+    async def _search(self, track: PartialTrack, extract: Callable[..., Awaitable[Any]]) -> Optional[str]:
+        '''
+        Searches candidates for a track, picks the best one and remembers it. This method should not be called directly.
+
+        Args:
+            track: The :class:`PartialTrack` to match.
+            extract: The coroutine function that runs extractor functions.
+
+        Returns:
+            str: The YouTube video ID of the best candidate, if the search finds nothing, :class:`None` is returned.
+        '''
+        duration = track.duration // 1000
+        self.metrics.increment('matcher.searches')
+        candidates = await self._candidates(track.title, extract)
+        scored = [(score_candidate(candidate, track.title, duration, track.isrc), candidate) for candidate in candidates]
+        if track.isrc and (not scored or max(score for score, _ in scored) < self.min_score):
+            self.metrics.increment('matcher.isrc_searches')
+            scored += [(score_candidate(candidate, track.title, duration, track.isrc) + 0.3, candidate) for candidate in await self._candidates(f'"{track.isrc}"', extract)]
+        if not scored:
+            return
+        score, best = max(scored, key=lambda pair: pair[0])
+        self.metrics.observe('matcher.score', score)
+        video_id = best['id']
+        if track.spotify_id:
+            self.remember(track.spotify_id, video_id)
+            if self.store:
+                try:
+                    await self.resolver.run(self.store.put_spotify_video, track.spotify_id, video_id)
+                except:
+                    pass
+        return video_id
+
+    async def _candidates(self, query: str, extract: Callable[..., Awaitable[Any]]) -> List[dict]:
+        '''Runs a flat search and returns the results that have a video ID. This method should not be called directly.'''
+        result = await extract('extract_info', f'ytsearch{self.candidates}:{query}', False)
+        return [entry for entry in (result or {}).get('entries') or [] if entry and entry.get('id')]
\ No newline at end of file
@@ -0,0 +1,243 @@
+import bisect
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Optional, Any, List, Dict, Tuple, Iterator
+
+BUCKETS: Tuple[float, ...] = tuple(0.001 * 2 ** exponent for exponent in range(17))
+'''The upper bounds in seconds of the histogram buckets, from 1 millisecond to about 65 seconds.'''
+
+class MetricsCollector:
+    '''
+    A base metrics collector that records nothing. Subclass it and pass an instance to :class:`Pool` to forward measurements to your own monitoring system.
+
+    Every measurement has a dotted name and optional labels, such as the guild a gauge belongs to.
+    '''
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        '''
+        Records a single value in a histogram, usually a duration in seconds.
+
+        Args:
+            name: The name of the histogram.
+            value: The value to record.
+            **labels: The labels of the measurement.
+        '''
+        pass
+
+    def increment(self, name: str, amount: int = 1, **labels: Any) -> None:
+        '''
+        Increments a counter.
+
+        Args:
+            name: The name of the counter.
+            amount: The amount to add.
+            **labels: The labels of the measurement.
+        '''
+        pass
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        '''
+        Sets a gauge to its current value.
+
+        Args:
+            name: The name of the gauge.
+            value: The current value.
+            **labels: The labels of the measurement.
+        '''
+        pass
+
+    def remove_gauges(self, **labels: Any) -> None:
+        '''
+        Removes every gauge that has all of the given labels.
+
+        Args:
+            **labels: The labels to match.
+        '''
+        pass
+
+    def remove_series(self, **labels: Any) -> None:
+        '''
+        Removes every histogram, counter and gauge that has all of the given labels, for example everything recorded for a guild whose player was destroyed. By default only :method:`remove_gauges` is called.
+
+        Args:
+            **labels: The labels to match.
+        '''
+        self.remove_gauges(**labels)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        '''
+        Exports everything that was recorded.
+
+        Returns:
+            dict: The recorded histograms, counters and gauges.
+        '''
+        return {'histograms': {}, 'counters': {}, 'gauges': {}}
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        '''
+        Records the time spent in a ``with`` block in a histogram, whether the block raises or not.
+
+        Args:
+            name: The name of the histogram.
+            **labels: The labels of the measurement.
+        '''
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+class Histogram:
+    '''
+    A histogram with fixed exponential buckets that keeps its memory constant no matter how many values are recorded.
+
+    Attributes:
+        count: The amount of recorded values.
+        total: The sum of all recorded values.
+        min: The smallest recorded value.
+        max: The largest recorded value.
+    '''
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = 0.0
+        self.max: float = 0.0
+        self.buckets: List[int] = [0] * (len(BUCKETS) + 1)
+
+    def add(self, value: float) -> None:
+        '''
+        Records a value.
+
+        Args:
+            value: The value to record.
+        '''
+        self.min = value if not self.count else min(self.min, value)
+        self.max = value if not self.count else max(self.max, value)
+        self.count += 1
+        self.total += value
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+
+    def percentile(self, percentile: float) -> float:
+        '''
+        Estimates a percentile from the buckets.
+
+        Args:
+            percentile: The percentile between 0 and 100.
+
+        Returns:
+            float: The upper bound of the bucket the percentile falls in, capped at the largest recorded value.
+        '''
+        if not self.count:
+            return 0.0
+        rank = percentile / 100 * self.count
+        seen = 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= rank and amount:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        '''
+        Summarizes the histogram.
+
+        Returns:
+            dict: The count, sum, mean, min, max and estimated 50th, 90th and 99th percentile.
+        '''
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+class InMemoryMetrics(MetricsCollector):
+    '''
+    The default metrics collector. Keeps histograms, counters and gauges in memory until they are exported with :method:`snapshot`. Measurements may be recorded from any thread.
+    '''
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._counters: Dict[Tuple[str, tuple], int] = {}
+        self._gauges: Dict[Tuple[str, tuple], float] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, tuple]:
+        return name, tuple(sorted(labels.items()))
+
+    @staticmethod
+    def _format(key: Tuple[str, tuple]) -> str:
+        name, labels = key
+        if not labels:
+            return name
+        return f'{name}{{{",".join(f"{label}={value}" for label, value in labels)}}}'
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            if not (histogram := self._histograms.get(key)):
+                histogram = self._histograms[key] = Histogram()
+            histogram.add(value)
+
+    def increment(self, name: str, amount: int = 1, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    @staticmethod
+    def _remove(series: Dict[Tuple[str, tuple], Any], labels: Dict[str, Any]) -> None:
+        for key in [key for key in series if all(item in key[1] for item in labels.items())]:
+            del series[key]
+
+    def remove_gauges(self, **labels: Any) -> None:
+        with self._lock:
+            self._remove(self._gauges, labels)
+
+    def remove_series(self, **labels: Any) -> None:
+        with self._lock:
+            for series in (self._histograms, self._counters, self._gauges):
+                self._remove(series, labels)
+
+    def histogram(self, name: str, **labels: Any) -> Optional[Histogram]:
+        '''
+        Gets a recorded histogram.
+
+        Args:
+            name: The name of the histogram.
+            **labels: The labels of the histogram.
+
+        Returns:
+            :class:`Histogram`: The histogram, if nothing was recorded under this name, :class:`None` is returned.
+        '''
+        return self._histograms.get(self._key(name, labels))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                'histograms': {self._format(key): histogram.summary() for key, histogram in self._histograms.items()},
+                'counters': {self._format(key): value for key, value in self._counters.items()},
+                'gauges': {self._format(key): value for key, value in self._gauges.items()},
+            }
+
+    def reset(self) -> None:
+        '''Drops everything that was recorded.'''
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
\ No newline at end of file
@@ -1,34 +1,68 @@
 import asyncio
 import os
+import time
+import warnings
+import weakref
 import discord
-import re
-import ffmpeg
 
-from typing import Optional, Union, Any, List
-from youtube_dl import YoutubeDL
+from typing import Optional, Union, Any, List, Dict, Tuple, Deque, Callable, Awaitable
+from collections import deque
 from spotipy import Spotify, SpotifyClientCredentials
-from discord.ext import tasks
 
-from .tracks import PartialTrack, Track, LocalTrack, Playlist
+from .tracks import Playable, PartialTrack, Track, LocalTrack, Playlist, TrackStore, WATCH_URL
 from .errors import *
 from .queue import Queue
+from .resolver import Resolver
+from .cache import TrackCache
+from .store import MetadataStore
+from .transcode import TranscodeCache
+from .library import LocalLibrary, LOCAL_FORMATS, local_title
+from .workers import WorkerShard
+from .scheduler import ConversionScheduler
+from .proxies import ProxyManager
+from .metrics import MetricsCollector
+from .matching import SpotifyMatcher
+from .segments import SegmentCache
+from .demux import OpusReaderSource
+from .query import Query, parse_query
+from .sessions import SessionStore, SessionSnapshot
+from .sources import PlaybackSource, seek_options
 
-YOUTUBE_REGEX = re.compile(r'^((?:https?:)?\/\/)?((?:www|m)\.)?((?:youtube\.com|youtu.be))(\/(?:[\w\-]+\?v=|embed\/|v\/)?)([\w\-]+)(\S+)?$')
-SPOTIFY_REGEX = re.compile(r'https?://open.spotify.com/(?P<type>album|playlist|track)/(?P<id>[a-zA-Z0-9]+)')
-PLAYLIST_REGEX = re.compile(r'^https?:\/\/(www.youtube.com|youtube.com)\/playlist(.*)$')
-URL_REGEX = re.compile(r'https?://(?:www\.)?.+')
+ENDPOINT_EXPIRY_MARGIN = 300
+PLAYLIST_PAGE_SIZE = 100
+MATCH_BATCH_SIZE = 10
+RECOVERY_MARGIN = 5000
+MAX_RECOVERIES = 2
 
-class Logger(object):
-    '''A base logger that outputs nothing.'''
+def create_spotify(spotify_client_id: Optional[str], spotify_client_secret: Optional[str]) -> Optional[Spotify]:
+    '''
+    Creates a Spotify client without making any requests. The access token is fetched when the client is first used, so invalid credentials only surface as failed lookups.
+
+    Args:
+        spotify_client_id: The client id of the spotify application.
+        spotify_client_secret: The client secret of the spotify application.
+
+    Returns:
+        :class:`Spotify` or :class:`None` if no credentials are provided.
+    '''
+    if not spotify_client_id or not spotify_client_secret:
+        return
+    return Spotify(client_credentials_manager=SpotifyClientCredentials(spotify_client_id, spotify_client_secret))
 
-    def debug(self, msg):
-        pass
+def create_ydl_options(cookies_path: Optional[str]) -> dict:
+    '''
+    Creates the extractor options shared by players. Proxies are added per call by the :class:`ProxyManager`.
 
-    def warning(self, msg):
-        pass
+    Args:
+        cookies_path: The path to the cookies.txt file.
 
-    def error(self, msg):
-        pass
+    Returns:
+        dict: The extractor options.
+    '''
+    options = {'format': 'bestaudio/best'}
+    if cookies_path:
+        options['cookiefile'] = cookies_path
+    return options
 
 class Player:
     '''
@@ -39,10 +73,33 @@ class Player:
         client: The bot.
         spotify_client_id: The client ID for the Spotify application.
         spotify_client_secret: The client secret for the Spotify application.
-        track_conversion_interval: The interval in seconds at which the bot will convert :class:`PartialTrack` objects to :class:`Track` objects. This makes initial track loading faster. Set to 0 to disable.
+        track_conversion_interval: The maximum interval in seconds at which the bot looks for :class:`PartialTrack` objects to convert to :class:`Track` objects. The queue is also checked whenever it changes. This makes initial track loading faster. Set to 0 to disable.
         cookies_path: The path to the cookies.txt file.
-        proxies: A list of available proxies to use. Leave empty to disable proxying.
-        proxy_rotation_interval: The interval in seconds at which proxies are rotated.
+        proxies: A list of available proxies to use. Leave empty to disable proxying. Ignored if :param:`proxy_manager` is given.
+        proxy_rotation_interval: Deprecated and ignored. Proxies are picked for every call by the :class:`ProxyManager`.
+        resolver: The :class:`Resolver` that runs blocking extractor and Spotify calls.
+        cache: The :class:`TrackCache` shared by all players that stores resolved tracks.
+        prefetch_count: The amount of upcoming queue entries that are converted ahead of time.
+        prefetch_concurrency: The maximum amount of queue entries that are converted at the same time.
+        preload_sources: Whether to open the audio source of the next track while the current one is playing.
+        store: The persistent :class:`MetadataStore` shared by all players, if enabled.
+        transcodes: The :class:`TranscodeCache` shared by all players that converts local files to Ogg/Opus, if enabled.
+        library: The :class:`LocalLibrary` shared by all players that indexes local files.
+        extractor: The :class:`WorkerShard` that runs extractor calls for this guild. If not given, extractor calls run on :attr:`resolver`.
+        spotify: The Spotify client shared by all players. If not given, a client is created from the credentials.
+        scheduler: The :class:`ConversionScheduler` shared by all players that converts queue entries in the background.
+        ydl_options: The extractor options shared by all players. If not given, they are created from :param:`cookies_path`.
+        proxy_manager: The :class:`ProxyManager` shared by all players that spreads extractor calls over :param:`proxies`.
+        metrics: The :class:`MetricsCollector` that receives timings and counters of this player.
+        matcher: The :class:`SpotifyMatcher` shared by all players that matches Spotify tracks to YouTube videos.
+        lazy_search: Whether searches only read the flat search results and return a :class:`PartialTrack`, as do Spotify tracks whose video is known to the :class:`MetadataStore`. The stream is extracted when the track is prefetched or played.
+        segments: The :class:`SegmentCache` shared by all players that downloads every remote track once and plays it from memory, if enabled.
+        demux_opus: Whether Opus streams in WebM or Ogg are demuxed in this process instead of by an FFmpeg process. Other streams are still played with FFmpeg.
+        sessions: The :class:`SessionStore` shared by all players that saves the queue and playhead to disk, if enabled.
+        recover_interrupted: Whether remote tracks that stop well before their end, for example because the endpoint failed, are resolved again and resumed at the position they stopped at instead of being skipped.
+
+    Attributes:
+        track_gaps: The most recent delays in seconds between the end of a track and the start of the next one.
     '''
 
     def __init__(
@@ -53,55 +110,109 @@ class Player:
             track_conversion_interval: int,
             cookies_path: Optional[str],
             proxies: Optional[List[str]] = None,
-            proxy_rotation_interval: int = 600
+            proxy_rotation_interval: Optional[int] = None,
+            resolver: Optional[Resolver] = None,
+            cache: Optional[TrackCache] = None,
+            prefetch_count: int = 5,
+            prefetch_concurrency: int = 2,
+            preload_sources: bool = False,
+            store: Optional[MetadataStore] = None,
+            transcodes: Optional[TranscodeCache] = None,
+            library: Optional[LocalLibrary] = None,
+            extractor: Optional[WorkerShard] = None,
+            spotify: Optional[Spotify] = None,
+            scheduler: Optional[ConversionScheduler] = None,
+            ydl_options: Optional[dict] = None,
+            proxy_manager: Optional[ProxyManager] = None,
+            metrics: Optional[MetricsCollector] = None,
+            matcher: Optional[SpotifyMatcher] = None,
+            lazy_search: bool = False,
+            segments: Optional[SegmentCache] = None,
+            demux_opus: bool = False,
+            sessions: Optional[SessionStore] = None,
+            recover_interrupted: bool = True
         ) -> None:
-        ydl_opts = {'format': 'bestaudio/best', 'logger': Logger()}
-        if cookies_path:
-            ydl_opts['cookiefile'] = cookies_path
-        self.ydl: YoutubeDL = YoutubeDL(ydl_opts)
+        if proxy_rotation_interval is not None:
+            warnings.warn('proxy_rotation_interval is deprecated and ignored, proxies are picked for every call by their health.', DeprecationWarning, stacklevel=2)
+        self.ydl_options: dict = ydl_options if ydl_options is not None else create_ydl_options(cookies_path)
         self.client = client
+        self.resolver: Resolver = resolver or Resolver()
+        self.extractor: Union[Resolver, WorkerShard] = extractor or self.resolver
+        self.cache: TrackCache = cache if cache is not None else TrackCache()
         self.queue = Queue()
-        self.spotify: Optional[Spotify] = self.spotify_check(spotify_client_id, spotify_client_secret)
+        self.spotify: Optional[Spotify] = spotify or create_spotify(spotify_client_id, spotify_client_secret)
+        self.scheduler: ConversionScheduler = scheduler or ConversionScheduler(interval=track_conversion_interval)
         self.channel: Optional[discord.VoiceChannel] = None
         self.current: Optional[Track] = None
         self.track_conversion_interval: int = track_conversion_interval
+        self.prefetch_count: int = prefetch_count
+        self.prefetch_concurrency: int = max(1, prefetch_concurrency)
+        self._conversions: Dict[Playable, asyncio.Task] = {}
+        self.preload_sources: bool = preload_sources
+        self.store: Optional[MetadataStore] = store
+        self.transcodes: Optional[TranscodeCache] = transcodes
+        self.library: Optional[LocalLibrary] = library
+        self.track_gaps: Deque[float] = deque(maxlen=100)
+        self.metrics: MetricsCollector = metrics or MetricsCollector()
+        self.matcher: SpotifyMatcher = matcher or SpotifyMatcher(store, self.resolver)
+        self.lazy_search: bool = lazy_search
+        self.segments: Optional[SegmentCache] = segments
+        self.demux_opus: bool = demux_opus
+        self.sessions: Optional[SessionStore] = sessions
+        self.recover_interrupted: bool = recover_interrupted
+        self._resume_at: Optional[Tuple[Playable, int]] = None
+        self._source: Optional[PlaybackSource] = None
+        self._recoveries: int = 0
+        self._preloaded: Optional[Tuple[Playable, discord.AudioSource]] = None
+        self._look_ahead_task: Optional[asyncio.Task] = None
+        self._track_ended_at: Optional[float] = None
+        self.queue.add_listener(self._on_queue_change)
         self.cookies_path: Optional[str] = cookies_path
         self.proxies: Optional[List[str]] = proxies
-        self.proxy_rotation_interval: int = proxy_rotation_interval
-        self.proxy_position: int = 0
+        self.proxy_rotation_interval: Optional[int] = proxy_rotation_interval
+        self.proxy_manager: Optional[ProxyManager] = proxy_manager or (ProxyManager(proxies) if proxies else None)
         self.stopevent: str = 'FINISHED'
         self.connected: bool = False
         self.playing: bool = False
         self.paused: bool = False
         self.loop: bool = False
-        client.add_listener(self.on_voice_state_update, 'on_voice_state_update')
-        if not self._track_converter.is_running() and track_conversion_interval > 0:
-            self._track_converter.start()
-        if not self._rotate_proxy.is_running() and proxies and len(proxies) > 0:
-            self._rotate_proxy.start()
+        self.scheduler.register(self)
 
     @property
     def guild(self) -> Optional[discord.Guild]:
         return getattr(self.channel, 'guild', None)
 
-    def spotify_check(self, spotify_client_id: str, spotify_client_secret: str) -> Optional[Spotify]:
+    @property
+    def average_gap(self) -> float:
         '''
-        Checks if the spotify client credentials are valid and returns a spotify client if they are.
-        This method should not be called directly.
+        Gets the average delay between the end of a track and the start of the next one.
 
-        Args:
-            spotify_client_id: The client id of the spotify application.
-            spotify_client_secret: The client secret of the spotify application.
+        Returns:
+            float: The average gap in seconds over the most recent track changes.
+        '''
+        return sum(self.track_gaps) / len(self.track_gaps) if self.track_gaps else 0.0
+
+    @property
+    def conversion_backlog(self) -> int:
+        '''
+        Gets the amount of upcoming queue entries that still have to be converted before they can be played.
 
         Returns:
-            :class:`Spotify` or :class:`None` if no credentials are provided or if the credentials are invalid.
+            int: The amount of :class:`PartialTrack` objects and stale tracks among the first :attr:`prefetch_count` entries.
         '''
-        try:
-            spotify = Spotify(client_credentials_manager=SpotifyClientCredentials(spotify_client_id, spotify_client_secret))
-            spotify.categories()
-            return spotify
-        except:
-            return
+        return sum(1 for track in self.queue.upcoming(self.prefetch_count) if isinstance(track, PartialTrack) or self._is_stale(track))
+
+    @property
+    def position(self) -> int:
+        '''
+        Gets the playhead within the current track.
+
+        Returns:
+            int: The position in milliseconds, counted from the frames sent to the voice client. If nothing is playing, 0 is returned.
+        '''
+        if self.current is None or self._source is None:
+            return 0
+        return self._source.position
 
     async def dispatch(self, event: str, *args: Any) -> None:
         '''
@@ -112,14 +223,60 @@ class Player:
             *args: The arguments to pass to the event.
         '''
         self.client.dispatch(event, *args)
-        if event == 'track_end':
-            self.stopevent = 'FINISHED'
-            self.playing = False
-            if self.connected:
-                await self.advance()
+
+    async def _on_track_end(self, track: Playable, stopevent: str, error: Optional[Exception] = None) -> None:
+        '''
+        Handles the end of a track. Interrupted tracks are resumed without firing ``track_end``, otherwise ``track_end`` is dispatched and the :class:`Queue` advances. This method should not be called directly.
+
+        Args:
+            track: The track that ended.
+            stopevent: Why the track ended.
+            error: The error the voice client reported, if any.
+        '''
+        self._track_ended_at = time.perf_counter()
+        self.stopevent = 'FINISHED'
+        self.playing = False
+        if self.connected and stopevent == 'FINISHED' and self._recoveries < MAX_RECOVERIES and self._interrupted(track):
+            self._recoveries += 1
+            await self._recover(track, error is not None)
+            return
+        self._recoveries = 0
+        await self.dispatch('track_end', self, track, stopevent)
+        if self.connected:
+            await self.advance()
+
+    def _interrupted(self, track: Playable) -> bool:
+        '''
+        Shows whether a track that ended by itself stopped well before its end. This method should not be called directly.
+
+        Args:
+            track: The track that ended.
+
+        Returns:
+            bool: Whether the track should be resumed.
+        '''
+        return self.recover_interrupted and isinstance(track, Track) and not track.is_stream and track.duration > 0 and self.position < track.duration - RECOVERY_MARGIN
+
+    async def _recover(self, track: Track, failed: bool = False) -> None:
+        '''
+        Resumes an interrupted track where it stopped. The same endpoint is opened again unless it failed or is stale, in which case the track is resolved again first. This method should not be called directly.
+
+        Args:
+            track: The interrupted :class:`Track`.
+            failed: Whether the voice client reported an error while playing the track.
+        '''
+        position = self.position
+        self.metrics.increment('player.recoveries', guild=self.guild.id)
+        if failed and not self._is_stale(track):
+            try:
+                resolved = await self._resolve(track)
+            except:
+                resolved = None
+            track = resolved or track
+        await self.play(track, position)
 
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
-        '''Handles voice state updates.'''
+        '''Handles voice state updates. This method is called by the :class:`Pool` for the guild of this player.'''
         if member == member.guild.me and before.channel != after.channel:
             self.channel = after.channel
             if not after.channel:
@@ -127,11 +284,16 @@ class Player:
 
     async def teardown(self) -> None:
         self.connected = False
+        if self.sessions:
+            await self.sessions.detach(self)
         self.client.loop.create_task(self.dispatch('player_destroy', self))
-        if self._track_converter.is_running():
-            self._track_converter.stop()
-        if self._rotate_proxy.is_running():
-            self._rotate_proxy.stop()
+        self.scheduler.unregister(self)
+        for task in self._conversions.values():
+            task.cancel()
+        self._conversions.clear()
+        if self._look_ahead_task:
+            self._look_ahead_task.cancel()
+        self._discard_preloaded()
 
     async def connect(self, channel: discord.VoiceChannel) -> None:
         '''
@@ -158,6 +320,8 @@ class Player:
         '''
         if not self.connected:
             raise NotConnected
+        if self.sessions:
+            await self.sessions.discard(self)
         await self.guild.voice_client.disconnect()
         await self.teardown()
 
@@ -175,7 +339,7 @@ class Player:
             raise NotConnected
         await self.guild.me.move_to(channel)
 
-    async def play(self, track: Track) -> None:
+    async def play(self, track: Track, position: int = 0) -> None:
         '''
         Plays the specified :class:`Track`. 
         This method should not be used if you plan on using the queue system. This method should be called rather than the :method:`play` method on :class:`VoiceClient`.
@@ -183,25 +347,128 @@ class Player:
 
         Args:
             track: The :class:`Track` to play.
+            position: The position in milliseconds to start at. A track restored from a saved session starts at its saved position by default, a track retrieved from a url with a timestamp at :attr:`Track.start`.
 
         Raises:
             :exc:`NotConnected`: If the bot is not connected to a :class:`VoiceChannel`.
         '''
         if not self.connected:
             raise NotConnected
-        if isinstance(track, PartialTrack):
+        if self._resume_at and self._resume_at[0] is track:
+            position = position or self._resume_at[1]
+        self._resume_at = None
+        if isinstance(track, Track):
+            position = position or track.start
+        if isinstance(track, PartialTrack) or self._is_stale(track):
             try:
-                track = await self.get_tracks(track.url) if track.url else await self.get_tracks(track.title)
+                resolved = await self._resolve(track)
             except:
+                resolved = None
+            if not resolved and isinstance(track, PartialTrack):
                 if self.connected:
                     await self.advance()
                 return
+            track = resolved or track
+        if self._preloaded and self._preloaded[0] is track and position == getattr(track, 'start', 0):
+            source = self._preloaded[1]
+            self._preloaded = None
+            self.metrics.increment('player.preloaded_sources', guild=self.guild.id)
+        else:
+            self._discard_preloaded()
+            with self.metrics.timer('player.source_start', guild=self.guild.id):
+                source = self._create_source(track, position)
+        source = self._source = PlaybackSource(source, position)
         self.current = track
         self.playing = True
+        self.paused = False
+        self.guild.voice_client.play(source, after=lambda error: self.client.loop.create_task(self._on_track_end(track, self.stopevent, error)))
+        self.metrics.increment('player.tracks_started', guild=self.guild.id)
+        self.scheduler.notify(self)
+        if self.sessions:
+            self.sessions.mark(self)
+        if self._track_ended_at is not None:
+            gap = time.perf_counter() - self._track_ended_at
+            self.track_gaps.append(gap)
+            self.metrics.observe('player.gap', gap, guild=self.guild.id)
+            self._track_ended_at = None
+        self._schedule_look_ahead()
+
+    def _create_source(self, track: Union[Track, LocalTrack], position: int = 0, opus: Optional[bool] = None) -> discord.AudioSource:
+        '''
+        Creates the audio source used to play :param:`track`. Local files that were converted by the :class:`TranscodeCache` are passed through without re-encoding, other local files are converted in the background for the next play. Remote tracks are played from the :class:`SegmentCache` if it is enabled. This method should not be called directly.
+
+        Args:
+            track: The :class:`Track` or :class:`LocalTrack` to create the source for.
+            position: The position in milliseconds to start at.
+            opus: Whether the source has to be Opus, or has to be PCM. The voice client only sets up its encoder for the first source it plays, so a source that replaces another one must be of the same kind. By default the cheapest source is used.
+
+        Returns:
+            :class:`AudioSource`: The audio source.
+        '''
         if isinstance(track, LocalTrack):
-            self.guild.voice_client.play(discord.FFmpegPCMAudio(track.path), after=lambda error: self.client.loop.create_task(self.dispatch('track_end', self, track, self.stopevent)))
-        else:
-            self.guild.voice_client.play(discord.FFmpegOpusAudio(track.endpoint, codec='copy'), after=lambda error: self.client.loop.create_task(self.dispatch('track_end', self, track, self.stopevent)))
+            cached = self.transcodes.lookup(track.path) if self.transcodes else None
+            if self.transcodes and not cached:
+                self.transcodes.schedule(track.path)
+            if cached and opus is not False:
+                return OpusReaderSource(cached, 'ogg', position) if self.demux_opus else discord.FFmpegOpusAudio(cached, codec='copy', **seek_options(position))
+            if opus:
+                return discord.FFmpegOpusAudio(track.path, **seek_options(position))
+            return discord.FFmpegPCMAudio(track.path, **seek_options(position))
+        if opus is False:
+            return discord.FFmpegPCMAudio(track.endpoint, **seek_options(position))
+        if self.segments and (source := self.segments.open(track, self._open_stream, position)):
+            return source
+        return self._open_stream(track, position)
+
+    def _open_stream(self, track: Track, position: int = 0) -> discord.AudioSource:
+        '''
+        Opens the stream of a remote track, demuxing it in this process if :attr:`demux_opus` is enabled and the stream is Opus. Streams that start at an offset only request the bytes from there on. This method should not be called directly.
+
+        Args:
+            track: The :class:`Track` to open.
+            position: The position in milliseconds to start at.
+
+        Returns:
+            :class:`AudioSource`: The Opus audio source.
+        '''
+        if self.demux_opus and OpusReaderSource.supports(track.codec, track.container):
+            return OpusReaderSource(track.endpoint, track.container, position)
+        return discord.FFmpegOpusAudio(track.endpoint, codec='copy', **seek_options(position))
+
+    def _discard_preloaded(self) -> None:
+        '''Cleans up the audio source that was opened ahead of time, if any. This method should not be called directly.'''
+        if self._preloaded:
+            self._preloaded[1].cleanup()
+            self._preloaded = None
+
+    def _schedule_look_ahead(self) -> None:
+        '''Starts :method:`_look_ahead` unless it is already running. This method should not be called directly.'''
+        if self.connected and (not self._look_ahead_task or self._look_ahead_task.done()):
+            self._look_ahead_task = asyncio.create_task(self._look_ahead())
+
+    async def _look_ahead(self) -> None:
+        '''
+        Resolves the next entry of the :class:`Queue` while the current track is playing so :method:`advance` can start it without delay.
+        If :attr:`preload_sources` is enabled, the audio source of the next track is opened as well. This method should not be called directly.
+        '''
+        track = self.queue.next_track
+        if isinstance(track, PartialTrack) or self._is_stale(track, self.current.duration / 1000 if self.current else 0):
+            if track not in self._conversions:
+                self._conversions[track] = asyncio.create_task(self._convert(track))
+            conversion = self._conversions[track]
+            try:
+                await asyncio.shield(conversion)
+            except asyncio.CancelledError:
+                if not conversion.cancelled():
+                    raise
+                return
+            track = self.queue.next_track
+        if not self.preload_sources or self.loop or not isinstance(track, (Track, LocalTrack)):
+            return
+        if self._preloaded and self._preloaded[0] is track:
+            return
+        self._discard_preloaded()
+        self._preloaded = (track, self._create_source(track, getattr(track, 'start', 0)))
 
     async def stop(self) -> None:
         '''
@@ -255,6 +522,38 @@ class Player:
             self.guild.voice_client.resume()
             self.paused = False
 
+    async def seek(self, position: int) -> None:
+        '''
+        Moves the playhead of the current track. The new source starts at :param:`position`, so only the rest of the track is downloaded, and is of the same kind, Opus or PCM, as the source it replaces. The track keeps playing, or stays paused, without firing ``track_end``.
+
+        Args:
+            position: The position in milliseconds. Positions beyond the end of the track end it.
+
+        Raises:
+            :exc:`NotConnected`: If the bot is not connected to a :class:`VoiceChannel`.
+            :exc:`NotPlaying`: If nothing is playing or the current track is a live stream.
+        '''
+        if not self.connected:
+            raise NotConnected
+        track = self.current
+        if track is None or self._source is None or getattr(track, 'is_stream', False):
+            raise NotPlaying
+        position = max(0, min(position, track.duration) if track.duration else position)
+        if self._is_stale(track, 0):
+            try:
+                resolved = await self._resolve(track)
+            except:
+                resolved = None
+            if resolved and self.current is track:
+                track = self.current = resolved
+        if self.current is not track or self._source is None:
+            return
+        with self.metrics.timer('player.seek', guild=self.guild.id):
+            source = self._create_source(track, position, self._source.is_opus())
+        self._source.swap(source, position)
+        if self.sessions:
+            self.sessions.mark(self)
+
     async def advance(self) -> None:
         '''
         Advances the queue to the next song or replays current song if :attr:`loop` is enabled. This method should be called rather than the :method:`play` method if you want to make use of the queue system. You first need to add songs to the :class:`Queue` using :method:`add`.
@@ -267,97 +566,276 @@ class Player:
             await self.play(track)
         else:
             self.current = None
+            if self.sessions:
+                await self.sessions.save(self)
 
-    async def get_tracks(self, query: str) -> Optional[Union[Track, Playlist]]:
+    async def get_tracks(self, query: str, stream: bool = False) -> Optional[Union[Track, PartialTrack, Playlist]]:
         '''
         Retrieves a :class:`Track` or :class:`Playlist` from the specified :param:`query`.
 
-        This :class:`Track` can then be played or added to the :class:`Queue`.
+        This :class:`Track` can then be played or added to the :class:`Queue`. If :attr:`lazy_search` is enabled, search queries and Spotify tracks whose video is stored in the :class:`MetadataStore` return a :class:`PartialTrack` instead, which is resolved when it is prefetched or played.
+
+        Args:
+            query: The YouTube video or playlist URL, Spotify track, playlist or album URL or URI or YouTube search query. The query is classified by :func:`parse_query`. Paths of existing files are not resolved once the :attr:`library` indexed files, use :method:`get_local_track` for them. Other paths are searched like any other text. Video URLs with a ``t`` or ``start`` timestamp return a copy of the track that starts there, see :attr:`Track.start`.
+            stream: Whether to return playlists as soon as their first page is read. The remaining pages are loaded in the background and appended to every :class:`Queue` the playlist was added to. Use :method:`Playlist.wait` to wait for the whole playlist.
+
+        Returns:
+            :class:`Track`, :class:`PartialTrack` or :class:`Playlist`: The track or :class:`Playlist` retrieved from the specified :param:`query`. If no tracks are found, :class:`None` is returned.
+        '''
+        parsed = parse_query(query, self.library is not None and len(self.library) > 0)
+        if (key := parsed.key) is None or parsed.kind == 'local':
+            return
+        with self.metrics.timer('player.resolve', kind=parsed.kind):
+            result = await self.resolver.coalesce(f'{key}:stream' if stream and parsed.is_playlist else key, self._get_tracks, parsed, stream)
+        if parsed.start and isinstance(result, Track):
+            return result.at(parsed.start * 1000)
+        return result
+
+    async def _get_tracks(self, query: Query, stream: bool = False) -> Optional[Union[Track, PartialTrack, Playlist]]:
+        '''
+        Resolves :param:`query` without coalescing. This method should not be called directly, use :method:`get_tracks` instead.
 
         Args:
-            query: The YouTube video or playlist URL, Spotify track, playlist or album URL or YouTube search query.
+            query: The classified query.
+            stream: Whether to return playlists as soon as their first page is read.
 
         Returns:
-            :class:`Track` or :class:`Playlist`: The :class:`Track` or :class:`Playlist` retrieved from the specified :param:`query`. If no tracks are found, :class:`None` is returned.
+            :class:`Track`, :class:`PartialTrack` or :class:`Playlist`: The resolved track or :class:`Playlist`. If no tracks are found, :class:`None` is returned.
         '''
-        query = query.strip('<>')
-        if spotify_match := SPOTIFY_REGEX.match(query):
+        key = query.key
+        if query.kind.startswith('spotify_'):
             if not self.spotify:
                 return
-            search = spotify_match.group('type')
+            search = query.kind[len('spotify_'):]
             if search == 'track':
-                result = self.spotify.track(track_id=query)
-                if not result:
-                    return
+                if cached := self.cache.get(key):
+                    return cached
+                spotify_id = query.identifier
+                if not (video_id := (await self.matcher.lookup([spotify_id])).get(spotify_id)):
+                    try:
+                        result = await self.resolver.run(self.spotify.track, track_id=query.url)
+                    except:
+                        return
+                    if not result or not (entries := self._spotify_entries([result], 'track')):
+                        return
+                    title, duration, _, _, isrc = entries[0]
+                    try:
+                        video_id = await self.matcher.match(PartialTrack({'title': title, 'duration': duration, 'spotify_id': spotify_id, 'isrc': isrc}), self._extract)
+                    except:
+                        return
+                    if not video_id:
+                        return
+                if self.lazy_search and (stored := await self._store_call('get_video', video_id)):
+                    title, duration, _ = stored
+                    track = PartialTrack({'title': title, 'duration': duration, 'id': video_id, 'spotify_id': spotify_id})
+                else:
+                    track = await self.get_tracks(f'{WATCH_URL}{video_id}')
+                self.cache.put(track, key)
+                return track
+            elif search == 'playlist' or search == 'album':
                 try:
-                    return await self.get_tracks(f'{" & ".join([artist["name"] for artist in result["artists"]])} - {result["name"]}')
+                    if search == 'playlist':
+                        result = await self.resolver.run(self.spotify.playlist_tracks, playlist_id=query.url)
+                    elif search == 'album':
+                        result = await self.resolver.run(self.spotify.album_tracks, album_id=query.url)
                 except:
                     return
-            elif search == 'playlist' or search == 'album':
-                if search == 'playlist':
-                    result = self.spotify.playlist_tracks(playlist_id=query)
-                elif search == 'album':
-                    result = self.spotify.album_tracks(album_id=query)
                 if not result:
                     return
                 try:
-                    tracklist = result['items']
-                    while result['next']:
-                        result = self.spotify.next(result)
-                        tracklist.extend(result['items'])
-                    tracks = []
                     if search == 'playlist':
-                        for track in tracklist:
-                            try:
-                                tracks.append(PartialTrack({'title': f'{" & ".join([artist["name"] for artist in track["track"]["artists"]])} - {track["track"]["name"]}', 'duration': int(track.get('track', {}).get('duration_ms', 0) // 1000)}))
-                            except:
-                                continue
+                        title = (await self.resolver.run(self.spotify.playlist, query.url, fields='name'))['name']
                     elif search == 'album':
-                        for track in tracklist:
-                            try:
-                                tracks.append(PartialTrack({'title': f'{" & ".join([artist["name"] for artist in track["artists"]])} - {track["name"]}', 'duration': int(track.get('duration_ms', 0) // 1000)}))
-                            except:
-                                continue
-                    if len(tracks) == 0:
-                        return
-                    if search == 'playlist':
-                        return Playlist({'title': self.spotify.playlist(query, fields='name')['name'], 'tracks': tracks})
-                    elif search == 'album':
-                        return Playlist({'title': self.spotify.album(query)['name'], 'tracks': tracks})
+                        title = (await self.resolver.run(self.spotify.album, query.url))['name']
                 except:
                     return
-        elif PLAYLIST_REGEX.match(query):
-            result = self.ydl.extract_info(query, download=False, process=False)
+
+                async def fetch_spotify_page() -> Optional[List[tuple]]:
+                    nonlocal result
+                    if not result['next']:
+                        return
+                    with self.metrics.timer('spotify.page', kind=search):
+                        result = await self.resolver.run(self.spotify.next, result)
+                        return await self._match_spotify_entries(self._spotify_entries(result['items'], search))
+
+                return await self._build_playlist(title, await self._match_spotify_entries(self._spotify_entries(result['items'], search)), fetch_spotify_page, stream)
+        elif query.kind == 'playlist':
+            result = await self._extract('open_playlist', query.url)
             if not result:
                 return
-            tracks = []
-            for track in result['entries']:
-                try:
-                    tracks.append(PartialTrack({'title': track['title'], 'duration': int(track.get('duration', 0)), 'url': f'https://www.youtube.com/watch?v={track["id"]}'}))
-                except:
-                    continue
-            if len(tracks) == 0:
-                return
-            return Playlist({'title': result['title'], 'tracks': tracks})
-        elif YOUTUBE_REGEX.match(query):
+            token, title = result
+
+            async def fetch_youtube_page() -> Optional[List[tuple]]:
+                with self.metrics.timer('youtube.page'):
+                    page = await self.extractor.call('read_playlist', token, PLAYLIST_PAGE_SIZE)
+                    return await self._youtube_entries(page) if page else None
+
+            async def close_youtube_playlist() -> None:
+                await self.extractor.call('close_playlist', token)
+
             try:
-                return Track(self.ydl.extract_info(query, download=False))
+                first_page = await fetch_youtube_page() or []
+            except:
+                await close_youtube_playlist()
+                raise
+            return await self._build_playlist(title, first_page, fetch_youtube_page, stream, close_youtube_playlist)
+        elif query.kind == 'video':
+            if cached := self.cache.get(key):
+                return cached
+            try:
+                track = Track(await self._extract('extract_info', query.url))
             except:
                 return
-        elif URL_REGEX.match(query):
-            return
-        else:
+            self.cache.put(track, key, f'youtube:{track.identifier}')
+            await self._store_call('put_video', track)
+            return track
+        elif query.kind == 'search':
+            if (cached := self.cache.get(key)) and (self.lazy_search or isinstance(cached, Track)):
+                return cached
+            if self.lazy_search:
+                return await self._search_flat(query.identifier, key)
             try:
-                result = self.ydl.extract_info(f'ytsearch:{query}', download=False)
+                result = await self._extract('extract_info', f'ytsearch:{query.identifier}')
             except:
                 return
             if len(result['entries']) == 0:
                 return
-            return Track(result['entries'][0])
+            track = Track(result['entries'][0])
+            self.cache.put(track, key, f'youtube:{track.identifier}')
+            await self._store_call('put_video', track)
+            return track
+
+    async def _search_flat(self, query: str, key: str) -> Optional[Union[Track, PartialTrack]]:
+        '''
+        Searches YouTube without extracting the stream of the result, which skips the format and player requests of a full extraction. This method should not be called directly.
+
+        Args:
+            query: The search query.
+            key: The normalized key of the query.
+
+        Returns:
+            :class:`PartialTrack` or :class:`Track`: The first result, as a :class:`Track` if the video is already cached. If nothing is found, :class:`None` is returned.
+        '''
+        try:
+            result = await self._extract('extract_info', f'ytsearch:{query}', False)
+            entry = next(entry for entry in (result or {}).get('entries') or [] if entry and entry.get('id'))
+        except:
+            return
+        if not (track := self.cache.get(f'youtube:{entry["id"]}')):
+            track = PartialTrack({'title': entry.get('title') or query, 'duration': int(entry.get('duration') or 0), 'id': entry['id']})
+        self.cache.put(track, key)
+        return track
+
+    async def _build_playlist(self, title: str, first_page: List[tuple], fetch_page: Callable[[], Awaitable[Optional[List[tuple]]]], stream: bool, close: Optional[Callable[[], Awaitable[None]]] = None) -> Optional[Playlist]:
+        '''
+        Builds a :class:`Playlist` from its first page of entries and loads the remaining pages, either before returning or in the background when :param:`stream` is enabled. This method should not be called directly.
+
+        Args:
+            title: The title of the playlist.
+            first_page: The ``(title, duration, identifier)`` entries of the first page.
+            fetch_page: A coroutine function that returns the entries of the next page, or :class:`None` once all pages are read.
+            stream: Whether to return the playlist after the first page. The background loader only holds a weak reference to the playlist and is cancelled once the playlist is no longer referenced by any queue or caller.
+            close: A coroutine function that releases the source of the pages if loading stops before all pages are read.
+
+        Returns:
+            :class:`Playlist`: The playlist, if no entries are found, :class:`None` is returned.
+        '''
+        playlist = Playlist({'title': title, 'tracks': TrackStore(), 'complete': False})
+        playlist._append(first_page)
+        if stream and len(playlist.tracks) > 0:
+            playlist._loader = asyncio.create_task(self._load_pages(weakref.ref(playlist), fetch_page, close))
+            weakref.finalize(playlist, playlist._loader.cancel)
+            return playlist
+        await self._load_pages(weakref.ref(playlist), fetch_page, close)
+        return playlist if len(playlist.tracks) > 0 else None
+
+    async def _load_pages(self, playlist: 'weakref.ReferenceType[Playlist]', fetch_page: Callable[[], Awaitable[Optional[List[tuple]]]], close: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        '''
+        Appends pages to a playlist until all pages are read, a page fails to load or the playlist is no longer referenced. This method should not be called directly.
+
+        Args:
+            playlist: A weak reference to the :class:`Playlist` to fill, so loading does not keep an abandoned playlist alive.
+            fetch_page: A coroutine function that returns the entries of the next page, or :class:`None` once all pages are read.
+            close: A coroutine function that releases the source of the pages. It is called in the background if loading stops, fails or is cancelled before all pages are read.
+        '''
+        exhausted = False
+        try:
+            while (page := await fetch_page()) is not None:
+                if (target := playlist()) is None:
+                    return
+                target._append(page)
+                target = None
+            exhausted = True
+        except asyncio.CancelledError:
+            raise
+        except:
+            pass
+        finally:
+            if not exhausted and close:
+                closing = asyncio.ensure_future(close())
+                closing.add_done_callback(lambda future: future.cancelled() or future.exception())
+            if (target := playlist()) is not None:
+                target._finish()
+
+    def _spotify_entries(self, items: List[dict], search: str) -> List[tuple]:
+        '''
+        Converts a page of Spotify playlist or album items to ``(title, duration, identifier, spotify_id, isrc)`` entries. Items that can not be converted are skipped. This method should not be called directly.
+
+        Args:
+            items: The items of the page.
+            search: Either ``playlist``, ``album`` or ``track``. Album and track items are track objects, playlist items wrap them.
+
+        Returns:
+            list: The converted entries.
+        '''
+        entries = []
+        for item in items:
+            try:
+                track = item['track'] if search == 'playlist' else item
+                entries.append((f'{" & ".join([artist["name"] for artist in track["artists"]])} - {track["name"]}', int(track.get('duration_ms', 0) // 1000), None, track.get('id'), (track.get('external_ids') or {}).get('isrc')))
+            except:
+                continue
+        return entries
+
+    async def _match_spotify_entries(self, entries: List[tuple]) -> List[tuple]:
+        '''
+        Fills in the YouTube video of every Spotify entry that was matched before, so it can be resolved without a search. This method should not be called directly.
+
+        Args:
+            entries: The ``(title, duration, identifier, spotify_id, isrc)`` entries.
+
+        Returns:
+            list: The entries with known YouTube videos filled in.
+        '''
+        matches = await self.matcher.lookup([entry[3] for entry in entries])
+        if not matches:
+            return entries
+        return [(title, duration, matches.get(spotify_id, identifier), spotify_id, isrc) for title, duration, identifier, spotify_id, isrc in entries]
+
+    async def _youtube_entries(self, items: List[dict]) -> List[tuple]:
+        '''
+        Converts flat YouTube playlist entries to ``(title, duration, identifier)`` entries. Missing durations are taken from the :class:`MetadataStore` if possible. Entries that can not be converted are skipped. This method should not be called directly.
+
+        Args:
+            items: The flat entries.
+
+        Returns:
+            list: The converted entries.
+        '''
+        entries = []
+        for item in items:
+            try:
+                entries.append((item['title'], item.get('duration'), item['id']))
+            except:
+                continue
+        missing = [identifier for _, duration, identifier in entries if not duration]
+        if missing and (durations := await self._store_call('get_durations', missing)):
+            entries = [(title, duration or durations.get(identifier), identifier) for title, duration, identifier in entries]
+        return entries
 
     async def get_local_track(self, path: str) -> Optional[LocalTrack]:
         '''
-        Retrieves a :class:`LocalTrack` located at :param:`path`.
+        Retrieves a :class:`LocalTrack` located at :param:`path`. Files indexed by the :class:`LocalLibrary` are returned without probing them again.
 
         This :class:`LocalTrack` can then be played or added to the :class:`Queue`.
 
@@ -367,40 +845,203 @@ class Player:
         Returns:
             :class:`LocalTrack`: The :class:`LocalTrack` retrieved from the specified :param:`path`. If the file does not exist or is not in a valid format, :class:`None` is returned.
         '''
-        formats = ('webm', 'mkv', 'ogg', 'avi', 'mov', 'mp4', 'mpeg', 'mpg', 'm4v', 'aac', 'flac', 'mp3', 'wav')
-        if not os.path.isfile(path) or not path.lower().endswith(formats):
+        if self.library and (track := self.library.get(path)):
+            return track
+        if not os.path.isfile(path) or not path.lower().endswith(LOCAL_FORMATS):
             return
-        return LocalTrack({'title': os.path.basename(path).rsplit('.', 1)[0].replace('_', ' ').rsplit(' - ', 1)[0], 'duration': round(float(ffmpeg.probe(path)['format']['duration'])), 'path': path})
+        mtime = os.path.getmtime(path)
+        if stored := await self._store_call('get_local', path, mtime):
+            return LocalTrack({'title': stored[0], 'duration': stored[1], 'path': path})
+        title = local_title(path)
+        duration = await self.extractor.call('probe_duration', path)
+        await self._store_call('put_local', path, mtime, title, duration)
+        return LocalTrack({'title': title, 'duration': duration, 'path': path})
+
+    async def _extract(self, name: str, *args: Any) -> Any:
+        '''
+        Calls an extractor function with :attr:`ydl_options`, through the healthiest proxy if proxies are enabled. This method should not be called directly.
+
+        Args:
+            name: The name of the registered function.
+            *args: The arguments to pass after the options.
 
-    @tasks.loop()
-    async def _track_converter(self) -> None:
+        Returns:
+            The return value of the function.
         '''
-        A background task that replaces :class:`PartialTrack` objects with :class:`Track` objects in the :class:`Queue`. You can specify the interval at which this task runs using the :attr:`track_conversion_interval` attribute. If set to 0 this task will not run.
+        if self.proxy_manager:
+            return await self.proxy_manager.call(self.extractor, name, self.ydl_options, *args)
+        return await self.extractor.call(name, self.ydl_options, *args)
+
+    async def _store_call(self, method: str, *args: Any) -> Any:
         '''
-        for track in self.queue.tracks:
+        Calls a method of the :class:`MetadataStore` in a worker thread. Errors are ignored because the store is only an optimization. This method should not be called directly.
+
+        Args:
+            method: The name of the method to call.
+            *args: The arguments to pass to the method.
+
+        Returns:
+            The return value of the method, if the store is disabled or the call fails, :class:`None` is returned.
+        '''
+        if not self.store:
+            return
+        try:
+            return await self.resolver.run(getattr(self.store, method), *args)
+        except:
+            return
+
+    def _pending_conversion(self) -> Optional[Playable]:
+        '''
+        Finds the next queue entry that should be converted. Only the first :attr:`prefetch_count` entries are considered, nearest to the playhead first, and at most :attr:`prefetch_concurrency` entries are converted at the same time.
+        This method is called by the :class:`ConversionScheduler` and should not be called directly.
+
+        Returns:
+            :class:`PartialTrack` or :class:`Track`: The entry to convert, if there is nothing to convert, :class:`None` is returned.
+        '''
+        if self.track_conversion_interval <= 0 or len(self._conversions) >= self.prefetch_concurrency:
+            return
+        delay = 0
+        for track in self.queue.upcoming(self.prefetch_count):
+            if (isinstance(track, PartialTrack) or self._is_stale(track, delay)) and track not in self._conversions:
+                return track
+            delay += track.duration / 1000
+
+    def _time_until(self, track: Playable) -> float:
+        '''
+        Estimates when a queue entry starts playing. This method is called by the :class:`ConversionScheduler` and should not be called directly.
+
+        Args:
+            track: The queue entry.
+
+        Returns:
+            float: The amount of seconds until the entry starts playing, assuming the queue plays without interruption.
+        '''
+        remaining = 0.0
+        if self.current and not self.loop:
+            remaining = max(0.0, (self.current.duration - self.position) / 1000)
+        return remaining + self.queue.duration_until(track) / 1000
+
+    def _extractor_pending(self) -> int:
+        '''
+        Gets the amount of extractor calls of this player's extractor that wait for capacity, including calls waiting for a proxy. This method is called by the :class:`ConversionScheduler` and should not be called directly.
+
+        Returns:
+            int: The amount of waiting calls.
+        '''
+        return self.extractor.pending + (self.proxy_manager.pending if self.proxy_manager else 0)
+
+    def _start_conversion(self, track: Playable) -> asyncio.Task:
+        '''
+        Starts converting a queue entry in the background. This method should not be called directly.
+
+        Args:
+            track: The :class:`PartialTrack` or :class:`Track` to convert.
+
+        Returns:
+            :class:`Task`: The running conversion.
+        '''
+        if track not in self._conversions:
+            self._conversions[track] = asyncio.create_task(self._convert(track))
+        return self._conversions[track]
+
+    async def _convert(self, track: Union[PartialTrack, Track]) -> None:
+        '''
+        Resolves a single :class:`PartialTrack`, or re-resolves a :class:`Track` with a stale endpoint, and replaces it in the :class:`Queue`. Partial tracks that can not be resolved are removed. This method should not be called directly.
+
+        Args:
+            track: The :class:`PartialTrack` or :class:`Track` to resolve.
+        '''
+        try:
+            with self.metrics.timer('player.convert'):
+                converted_track = await self._resolve(track)
+        except asyncio.CancelledError:
+            raise
+        except:
+            converted_track = None
+        self._conversions.pop(track, None)
+        if converted_track:
+            if isinstance(track, Track) and track.start:
+                converted_track = converted_track.at(track.start)
+            if self._resume_at and self._resume_at[0] is track:
+                self._resume_at = (converted_track, self._resume_at[1])
+            self.queue.replace(track, converted_track)
+        else:
+            self.metrics.increment('player.failed_conversions')
             if isinstance(track, PartialTrack):
-                index = self.queue.tracks.index(track)
-                try:
-                    converted_track = await self.get_tracks(track.url) if track.url else await self.get_tracks(track.title)
-                except:
-                    converted_track = None
-                if track in self.queue.tracks:
-                    self.queue.tracks.remove(track)
-                    if converted_track:
-                        self.queue.tracks.insert(index, converted_track)
+                self.queue.remove(track)
+
+    async def _resolve(self, track: Union[PartialTrack, Track]) -> Optional[Track]:
+        '''
+        Resolves a :class:`PartialTrack` or re-resolves a :class:`Track` whose endpoint is stale. This method should not be called directly.
+
+        Args:
+            track: The :class:`PartialTrack` or :class:`Track` to resolve.
+
+        Returns:
+            :class:`Track`: The resolved track. If no track is found, :class:`None` is returned.
+        '''
+        if isinstance(track, Track):
+            self.cache.invalidate(f'youtube:{track.identifier}')
+            return await self.get_tracks(track.url)
+        if track.spotify_id and not track.url:
+            await self.matcher.match_many(self._match_batch(track), self._extract)
+        if track.url:
+            return await self.get_tracks(track.url)
+        resolved = await self.get_tracks(track.title)
+        if isinstance(resolved, PartialTrack):
+            return await self.get_tracks(resolved.url) if resolved.url else None
+        return resolved
+
+    def _match_batch(self, track: PartialTrack) -> List[PartialTrack]:
+        '''
+        Collects :param:`track` and the next unmatched Spotify tracks in the :class:`Queue`, so they are matched together. This method should not be called directly.
+
+        Args:
+            track: The Spotify track that has to be matched now.
+
+        Returns:
+            list: At most :data:`MATCH_BATCH_SIZE` unmatched Spotify tracks, starting with :param:`track`.
+        '''
+        batch = [track]
+        for entry in self.queue.upcoming(MATCH_BATCH_SIZE * 2):
+            if len(batch) >= MATCH_BATCH_SIZE:
                 break
-        await asyncio.sleep(self.track_conversion_interval)
+            if entry is not track and isinstance(entry, PartialTrack) and entry.spotify_id and not entry.url:
+                batch.append(entry)
+        return batch
 
-    @tasks.loop()
-    async def _rotate_proxy(self) -> None:
+    def _is_stale(self, track: Optional[Playable], delay: float = 0) -> bool:
         '''
-        A background task that rotates the :attr:`proxy_list` and :attr:`proxy_index` attributes. You can specify the interval at which this task runs using the :attr:`proxy_rotation_interval` attribute.
+        Shows whether the endpoint of :param:`track` expires before the track would finish playing. This method should not be called directly.
+
+        Args:
+            track: The track to check.
+            delay: The amount of seconds until the track starts playing.
+
+        Returns:
+            bool: Whether the track needs to be re-resolved before it is played.
+        '''
+        return isinstance(track, Track) and track.url is not None and track.expires_within(delay + track.duration / 1000 + ENDPOINT_EXPIRY_MARGIN)
+
+    def _on_queue_change(self) -> None:
+        '''Cancels conversions of tracks that left the :class:`Queue` and schedules new ones. This method should not be called directly.'''
+        for track in [track for track in self._conversions if track not in self.queue]:
+            self._conversions.pop(track).cancel()
+        self.scheduler.notify(self)
+        if self.sessions:
+            self.sessions.mark(self)
+        if self.playing:
+            self._schedule_look_ahead()
+
+    def _restore(self, snapshot: SessionSnapshot) -> None:
+        '''
+        Restores a saved session. The saved tracks are put at the front of the :class:`Queue`, before anything added while the session was loading, and the track that was playing remembers the position it stopped at. Nothing is resolved until it is prefetched or played. This method should not be called directly.
+
+        Args:
+            snapshot: The :class:`SessionSnapshot` to restore.
         '''
-        if self.proxy_position > len(self.proxy_list):
-            self.proxy_position = 0
-        ydl_opts = {'format': 'bestaudio/best', 'logger': Logger(), 'proxy': self.proxies[self.proxy_position]}
-        if self.cookies_path:
-            ydl_opts['cookiefile'] = self.cookies_path
-        self.ydl = YoutubeDL(ydl_opts)
-        self.proxy_position += 1
-        await asyncio.sleep(self.proxy_rotation_interval)
\ No newline at end of file
+        self.loop = snapshot.loop
+        tracks = ([snapshot.current] if snapshot.current is not None else []) + snapshot.tracks
+        if tracks and snapshot.position > 0:
+            self._resume_at = (tracks[0], snapshot.position)
+        self.queue._insert(tracks, True)
\ No newline at end of file
@@ -1,8 +1,23 @@
+import warnings
+
 import discord
 
-from typing import Optional, List
+from typing import Optional, Any, List, Dict
+from spotipy import Spotify
 
-from .player import Player
+from .player import Player, create_spotify, create_ydl_options
+from .resolver import Resolver
+from .cache import TrackCache
+from .store import MetadataStore
+from .transcode import TranscodeCache
+from .library import LocalLibrary
+from .workers import WorkerShard
+from .scheduler import ConversionScheduler
+from .proxies import ProxyManager
+from .metrics import MetricsCollector, InMemoryMetrics
+from .matching import SpotifyMatcher
+from .segments import SegmentCache
+from .sessions import SessionStore
 from .errors import *
 
 class Pool:
@@ -17,10 +32,29 @@ class Pool:
         client: The bot.
         spotify_client_id: The client ID for the Spotify application.
         spotify_client_secret: The client secret for the Spotify application.
-        track_conversion_interval: The interval in seconds at which the bot will convert :class:`PartialTrack` objects to :class:`Track` objects. This makes initial track loading faster. Set to 0 to disable.
+        track_conversion_interval: The maximum interval in seconds at which the bot looks for :class:`PartialTrack` objects to convert to :class:`Track` objects. The queue is also checked whenever it changes. This makes initial track loading faster. Set to 0 to disable.
         cookies_path: The path to the cookies.txt file.
-        proxies: A list of available proxies to use. Leave empty to disable proxying.
-        proxy_rotation_interval: The interval in seconds at which proxies are rotated.
+        proxies: A list of available proxies to use. Leave empty to disable proxying. Extractor calls are spread over the healthiest proxies and failing or rate limited proxies are cooled down automatically.
+        proxy_rotation_interval: Deprecated and ignored. Proxies are no longer rotated on a timer but picked for every call, see :param:`proxy_concurrency` and :param:`proxy_cooldown`.
+        resolver_concurrency: The maximum amount of YouTube and Spotify lookups that run at the same time across all players. Lookups run in worker threads so they never block the event loop.
+        cache_size: The maximum amount of resolved tracks shared between all players. Set to 0 to disable caching.
+        cache_ttl: The time in seconds resolved tracks stay cached. This should stay below the few hours after which YouTube stream URLs expire.
+        prefetch_count: The amount of upcoming queue entries each player converts ahead of time. Entries nearest to the playhead are converted first.
+        prefetch_concurrency: The maximum amount of queue entries each player converts at the same time.
+        preload_sources: Whether to open the audio source of the next track while the current one is playing. This removes most of the silence between tracks at the cost of one extra FFmpeg process per playing guild.
+        store_path: The path to an SQLite database that keeps Spotify to YouTube matches, video metadata and local file probes across restarts. Leave empty to disable.
+        transcode_cache_path: The directory in which local files are cached as Ogg/Opus after their first play, so later plays skip re-encoding. Leave empty to disable.
+        transcode_cache_size: The maximum size of the transcode cache in bytes. The least recently played files are removed first.
+        library_concurrency: The maximum amount of local files the :attr:`library` probes at the same time while scanning.
+        worker_processes: The amount of worker processes that run extractor calls and file probes. Guilds are placed on a worker by their ID, so extractor parsing uses all cores instead of one. Voice connections always stay in the bot process. Workers are started on their first call and import the main module of the bot again, so the bot must be started under an ``if __name__ == '__main__':`` guard. Workers that keep exiting fall back to worker threads. Set to 0 to run everything in worker threads of this process.
+        metrics: The :class:`MetricsCollector` that receives stage timings, counters and gauges of the pool and all players. Defaults to an :class:`InMemoryMetrics` that can be exported with :method:`collect_metrics`.
+        lazy_search: Whether searches return a :class:`PartialTrack` from the flat search results instead of a fully extracted :class:`Track`. Spotify tracks that were matched before return a :class:`PartialTrack` from the :attr:`store_path` store without any request. This makes searching much faster, the stream is extracted when the track is prefetched or played.
+        segment_cache_size: The maximum memory in bytes used to keep the Opus packets of played tracks. Every track is then downloaded once and guilds playing the same track share the download. Set to 0 to disable.
+        demux_opus: Whether WebM and Ogg Opus streams are demuxed in the bot process instead of by one FFmpeg process per playing guild. Streams in other formats still use FFmpeg.
+        session_path: The directory in which the queue, current track, playhead and loop state of every guild are saved, so they survive restarts and dropped voice connections. Saved sessions are restored in the background when the player of a guild is created, see :method:`restore_sessions`. Leave empty to disable.
+        recover_interrupted: Whether tracks that stop well before their end, for example because their stream failed, are resolved again and resumed where they stopped instead of being skipped. Only the remaining part of the track is downloaded.
+        proxy_concurrency: The maximum amount of extractor calls that use a single proxy at the same time.
+        proxy_cooldown: The time in seconds a failing or rate limited proxy is skipped. Repeated strikes double the cool down and proxies are ejected after several of them.
     '''
 
     def __init__(
@@ -31,8 +65,30 @@ class Pool:
             track_conversion_interval: int = 30,
             cookies_path: Optional[str] = None,
             proxies: Optional[List[str]] = None,
-            proxy_rotation_interval: int = 600
+            proxy_rotation_interval: Optional[int] = None,
+            resolver_concurrency: int = 4,
+            cache_size: int = 1024,
+            cache_ttl: int = 1800,
+            prefetch_count: int = 5,
+            prefetch_concurrency: int = 2,
+            preload_sources: bool = False,
+            store_path: Optional[str] = None,
+            transcode_cache_path: Optional[str] = None,
+            transcode_cache_size: int = 1024 ** 3,
+            library_concurrency: int = 8,
+            worker_processes: int = 0,
+            metrics: Optional[MetricsCollector] = None,
+            lazy_search: bool = False,
+            segment_cache_size: int = 0,
+            demux_opus: bool = False,
+            session_path: Optional[str] = None,
+            recover_interrupted: bool = True,
+            *,
+            proxy_concurrency: int = 4,
+            proxy_cooldown: int = 60
         ) -> None:
+        if proxy_rotation_interval is not None:
+            warnings.warn('proxy_rotation_interval is deprecated and ignored, proxies are picked for every call by their health.', DeprecationWarning, stacklevel=2)
         self.client = client
         self.spotify_client_id = spotify_client_id
         self.spotify_client_secret = spotify_client_secret
@@ -40,8 +96,31 @@ class Pool:
         self.cookies_path = cookies_path
         self.proxies = proxies
         self.proxy_rotation_interval = proxy_rotation_interval
+        self.resolver = Resolver(resolver_concurrency)
+        self.scheduler = ConversionScheduler(resolver_concurrency, track_conversion_interval)
+        self.spotify: Optional[Spotify] = create_spotify(spotify_client_id, spotify_client_secret)
+        self.ydl_options = create_ydl_options(cookies_path)
+        self.proxy_manager = ProxyManager(proxies, proxy_concurrency, proxy_cooldown) if proxies else None
+        self.cache = TrackCache(cache_size, cache_ttl)
+        self.prefetch_count = prefetch_count
+        self.prefetch_concurrency = prefetch_concurrency
+        self.preload_sources = preload_sources
+        self.lazy_search = lazy_search
+        self.demux_opus = demux_opus
+        self.recover_interrupted = recover_interrupted
+        self.store = MetadataStore(store_path) if store_path else None
+        self.transcodes = TranscodeCache(transcode_cache_path, transcode_cache_size) if transcode_cache_path else None
+        self.library = LocalLibrary(library_concurrency, self.store)
+        self.matcher = SpotifyMatcher(self.store, self.resolver, concurrency=resolver_concurrency)
+        self.segments = SegmentCache(segment_cache_size) if segment_cache_size > 0 else None
+        self.sessions = SessionStore(session_path) if session_path else None
+        self.shards = [WorkerShard(resolver_concurrency, self.resolver) for _ in range(worker_processes)]
+        self.metrics: MetricsCollector = metrics or InMemoryMetrics()
+        for component in [self.resolver, self.cache, self.matcher, self.library.resolver, *self.shards] + ([self.transcodes.resolver] if self.transcodes else []) + ([self.segments] if self.segments else []):
+            component.metrics = self.metrics
         self._sessions = {}
         client.add_listener(self._destroy_player, 'on_player_destroy')
+        client.add_listener(self._on_voice_state_update, 'on_voice_state_update')
 
     def get_player(self, guild: discord.Guild) -> Player:
         '''
@@ -57,9 +136,132 @@ class Pool:
             InvalidGuild: If the :class:`Guild` is not valid.
         '''
         if guild.id not in self._sessions.keys():
-            self._sessions[guild.id] = Player(self.client, self.spotify_client_id, self.spotify_client_secret, self.track_conversion_interval, self.cookies_path, self.proxies, self.proxy_rotation_interval)
+            player = self._sessions[guild.id] = Player(
+                self.client,
+                spotify_client_id=self.spotify_client_id,
+                spotify_client_secret=self.spotify_client_secret,
+                track_conversion_interval=self.track_conversion_interval,
+                cookies_path=self.cookies_path,
+                proxies=self.proxies,
+                resolver=self.resolver,
+                cache=self.cache,
+                prefetch_count=self.prefetch_count,
+                prefetch_concurrency=self.prefetch_concurrency,
+                preload_sources=self.preload_sources,
+                store=self.store,
+                transcodes=self.transcodes,
+                library=self.library,
+                extractor=self.get_shard(guild),
+                spotify=self.spotify,
+                scheduler=self.scheduler,
+                ydl_options=self.ydl_options,
+                proxy_manager=self.proxy_manager,
+                metrics=self.metrics,
+                matcher=self.matcher,
+                lazy_search=self.lazy_search,
+                segments=self.segments,
+                demux_opus=self.demux_opus,
+                sessions=self.sessions,
+                recover_interrupted=self.recover_interrupted
+            )
+            if self.sessions:
+                self.sessions.attach(player, guild.id)
         return self._sessions[guild.id]
 
+    def collect_metrics(self) -> Dict[str, Dict[str, Any]]:
+        '''
+        Updates the gauges of the pool and every player and exports everything the :attr:`metrics` collector recorded.
+
+        Per guild gauges are the queue length and duration, the running conversions and the conversion backlog. Pool wide gauges cover the resolver, the conversion scheduler, the track cache, the segment cache, worker processes and proxies.
+
+        Returns:
+            dict: The snapshot of the collector. Collectors that export elsewhere may return an empty snapshot.
+        '''
+        metrics = self.metrics
+        for guild_id, player in self._sessions.items():
+            metrics.gauge('player.queue_length', len(player.queue), guild=guild_id)
+            metrics.gauge('player.queue_duration', player.queue.duration / 1000, guild=guild_id)
+            metrics.gauge('player.conversions', len(player._conversions), guild=guild_id)
+            metrics.gauge('player.conversion_backlog', player.conversion_backlog, guild=guild_id)
+            metrics.gauge('player.playing', int(player.playing), guild=guild_id)
+        metrics.gauge('pool.players', len(self._sessions))
+        metrics.gauge('resolver.pending', self.resolver.pending)
+        metrics.gauge('resolver.active', self.resolver.active)
+        metrics.gauge('scheduler.active', self.scheduler.active)
+        metrics.gauge('scheduler.backlog', self.scheduler.backlog)
+        metrics.gauge('cache.size', len(self.cache))
+        metrics.gauge('cache.hit_rate', self.cache.stats.hit_rate)
+        if self.segments:
+            metrics.gauge('segments.entries', len(self.segments))
+            metrics.gauge('segments.size', self.segments.size)
+        for index, shard in enumerate(self.shards):
+            metrics.gauge('worker.active', shard.active, shard=index)
+        for proxy in self.proxy_manager.proxies if self.proxy_manager else []:
+            metrics.gauge('proxy.latency', proxy.latency, proxy=proxy.url)
+            metrics.gauge('proxy.error_rate', proxy.error_rate, proxy=proxy.url)
+            metrics.gauge('proxy.active', proxy.active, proxy=proxy.url)
+            metrics.gauge('proxy.available', int(proxy.is_available()), proxy=proxy.url)
+        return metrics.snapshot()
+
+    async def restore_sessions(self, resume: bool = True) -> List[Player]:
+        '''
+        Reconnects every guild that has a saved session to the voice channel it was last connected to. Call this once the bot is ready after a restart.
+        Sessions are restored lazily: only the track that resumes is resolved, the rest of each queue is converted by the background prefetch as usual. Guilds whose channel no longer exists are skipped and keep their saved session, sessions with nothing to play are not restored.
+
+        Args:
+            resume: Whether to start playing the restored queues. The track that was playing resumes at its saved position.
+
+        Returns:
+            list: The restored :class:`Player` objects.
+        '''
+        if not self.sessions:
+            return []
+        players = []
+        for guild_id in await self.sessions.resolver.run(self.sessions.saved):
+            state = await self.sessions.resolver.run(self.sessions.load_state, guild_id)
+            guild = self.client.get_guild(guild_id)
+            channel = guild.get_channel(state.get('channel_id')) if guild and state and state.get('channel_id') else None
+            if not isinstance(channel, discord.VoiceChannel) or guild.voice_client:
+                continue
+            player = self.get_player(guild)
+            if not await self.sessions.loaded(player):
+                continue
+            try:
+                await player.connect(channel)
+            except:
+                continue
+            if resume and not player.queue.is_empty:
+                await player.advance()
+            players.append(player)
+        return players
+
+    async def verify_spotify(self) -> bool:
+        '''
+        Checks whether the Spotify credentials are valid. Players never check the credentials themselves, so call this once at startup if invalid credentials should be noticed early.
+
+        Returns:
+            bool: Whether Spotify lookups are available.
+        '''
+        if not self.spotify:
+            return False
+        try:
+            await self.resolver.run(self.spotify.categories)
+            return True
+        except:
+            return False
+
+    def get_shard(self, guild: discord.Guild) -> Optional[WorkerShard]:
+        '''
+        Gets the worker process the specified guild is placed on.
+
+        Args:
+            guild: The :class:`Guild` to get the worker for.
+
+        Returns:
+            :class:`WorkerShard`: The worker process, if worker processes are disabled, :class:`None` is returned.
+        '''
+        return self.shards[guild.id % len(self.shards)] if self.shards else None
+
     async def _destroy_player(self, player: Player) -> None:
         '''
         Destroys the player associated with specified guild. This method is automatically called when the player gets disconnected.
@@ -70,4 +272,10 @@ class Pool:
         for gld, plyr in self._sessions.items():
             if plyr == player:
                 del self._sessions[gld]
-                return
\ No newline at end of file
+                self.metrics.remove_series(guild=gld)
+                return
+
+    async def _on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
+        '''Forwards voice state updates to the player of the guild they happened in. This method should not be called directly.'''
+        if player := self._sessions.get(member.guild.id):
+            await player.on_voice_state_update(member, before, after)
\ No newline at end of file
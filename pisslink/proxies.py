@@ -0,0 +1,246 @@
+import asyncio
+import time
+
+from collections import deque
+from typing import Optional, Any, List, Dict, Deque
+
+RATE_LIMIT_MARKERS = ('429', 'too many requests')
+NETWORK_MARKERS = ('unable to download', 'timed out', 'urlopen error', 'connection', 'proxy', 'tunnel', 'http error 403', 'http error 5')
+
+def classify_error(error: BaseException) -> Optional[str]:
+    '''
+    Decides whether an extractor error was caused by the proxy it went through. Errors about the requested content itself, such as unavailable videos, are not held against the proxy.
+
+    Args:
+        error: The raised exception. Errors from worker processes arrive as :class:`WorkerError` with the original message.
+
+    Returns:
+        str: ``'rate_limited'`` or ``'network'``, if the error is not related to the proxy, :class:`None` is returned.
+    '''
+    message = str(error).lower()
+    if any(marker in message for marker in RATE_LIMIT_MARKERS):
+        return 'rate_limited'
+    if isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError)) or any(marker in message for marker in NETWORK_MARKERS):
+        return 'network'
+
+class ProxyStats:
+    '''
+    The health of a single proxy tracked by the :class:`ProxyManager`.
+
+    Attributes:
+        url: The proxy url.
+        requests: The amount of calls that went through the proxy.
+        failures: The amount of calls that failed because of the proxy.
+        rate_limited: The amount of calls that were answered with HTTP 429.
+        latency: The moving average of the call duration in seconds.
+        error_rate: The moving average of the share of calls that failed because of the proxy.
+        active: The amount of calls currently running through the proxy.
+        strikes: The amount of recent cool downs. Each strike doubles the next cool down.
+        cooldown_until: The time until which the proxy is not used, as returned by :func:`time.monotonic`.
+        ejected: Whether the proxy was removed from rotation after too many strikes.
+    '''
+
+    __slots__ = ('url', 'requests', 'failures', 'rate_limited', 'latency', 'error_rate', 'active', 'strikes', 'cooldown_until', 'ejected', '_consecutive', '_struck_at')
+
+    def __init__(self, url: str) -> None:
+        self.url: str = url
+        self.requests: int = 0
+        self.failures: int = 0
+        self.rate_limited: int = 0
+        self.latency: float = 0.0
+        self.error_rate: float = 0.0
+        self.active: int = 0
+        self.strikes: int = 0
+        self.cooldown_until: float = 0.0
+        self.ejected: bool = False
+        self._consecutive: int = 0
+        self._struck_at: float = 0.0
+
+    def __repr__(self) -> str:
+        return f'<ProxyStats url={self.url!r} latency={self.latency:.3f} error_rate={self.error_rate:.2f} active={self.active} ejected={self.ejected}>'
+
+    def is_available(self, now: Optional[float] = None) -> bool:
+        '''
+        Checks whether the proxy is in rotation and not cooling down.
+
+        Args:
+            now: The current :func:`time.monotonic` time.
+
+        Returns:
+            bool: Whether the proxy can be used.
+        '''
+        return not self.ejected and self.cooldown_until <= (time.monotonic() if now is None else now)
+
+    @property
+    def score(self) -> float:
+        '''
+        Gets the cost of sending the next call through this proxy. Lower is better.
+
+        Returns:
+            float: The expected latency, weighted by the calls already running and the recent error rate.
+        '''
+        return (self.latency or 0.5) * (1 + self.active) / max(0.05, 1 - self.error_rate)
+
+class ProxyManager:
+    '''
+    Spreads extractor calls over a set of proxies based on their health. This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Every call goes through the available proxy with the lowest latency and error rate, and at most :attr:`concurrency` calls use a proxy at the same time. Each proxy gets its own cached extractor in the process the call runs in.
+    Proxies that answer with HTTP 429 or fail :attr:`max_failures` times in a row are cooled down, twice as long on every repeated strike. After :attr:`max_strikes` strikes a proxy is ejected until :method:`reset` is called.
+    If no proxy is available, the one that becomes available first is used anyway, so lookups slow down instead of stopping.
+
+    Args:
+        proxies: The proxy urls.
+        concurrency: The maximum amount of calls that use a single proxy at the same time.
+        cooldown: The time in seconds a proxy is skipped after its first strike.
+        max_failures: The amount of consecutive failures after which a proxy is cooled down.
+        max_strikes: The amount of strikes after which a proxy is ejected.
+    '''
+
+    def __init__(self, proxies: List[str], concurrency: int = 4, cooldown: int = 60, max_failures: int = 3, max_strikes: int = 5) -> None:
+        self.concurrency: int = max(1, concurrency)
+        self.cooldown: int = cooldown
+        self.max_failures: int = max(1, max_failures)
+        self.max_strikes: int = max(1, max_strikes)
+        self._proxies: Dict[str, ProxyStats] = {url: ProxyStats(url) for url in dict.fromkeys(proxies)}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    @property
+    def pending(self) -> int:
+        '''
+        Gets the amount of calls waiting for a proxy.
+
+        Returns:
+            int: The amount of waiting calls.
+        '''
+        return len(self._waiters)
+
+    @property
+    def proxies(self) -> List[ProxyStats]:
+        '''
+        Gets the health of every proxy.
+
+        Returns:
+            list: The :class:`ProxyStats` of every proxy, healthiest first.
+        '''
+        now = time.monotonic()
+        return sorted(self._proxies.values(), key=lambda proxy: (not proxy.is_available(now), proxy.score))
+
+    def reset(self, url: Optional[str] = None) -> None:
+        '''
+        Puts ejected and cooling down proxies back into rotation.
+
+        Args:
+            url: The proxy to reset. If not given, every proxy is reset.
+        '''
+        for proxy in self._proxies.values():
+            if url is None or proxy.url == url:
+                proxy.ejected = False
+                proxy.strikes = 0
+                proxy.cooldown_until = 0.0
+                proxy._consecutive = 0
+
+    def _select(self) -> Optional[ProxyStats]:
+        '''Picks the proxy for the next call, if every usable proxy is busy, :class:`None` is returned.'''
+        now = time.monotonic()
+        free = [proxy for proxy in self._proxies.values() if proxy.active < self.concurrency]
+        healthy = [proxy for proxy in free if proxy.is_available(now)]
+        if healthy:
+            return min(healthy, key=lambda proxy: proxy.score)
+        if free and not any(proxy.is_available(now) for proxy in self._proxies.values()):
+            return min(free, key=lambda proxy: (proxy.ejected, proxy.cooldown_until))
+
+    async def acquire(self) -> ProxyStats:
+        '''
+        Waits until a proxy can take another call and reserves it. Every acquired proxy must be handed back with :method:`release`.
+
+        Returns:
+            :class:`ProxyStats`: The reserved proxy.
+        '''
+        while not (proxy := self._select()):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        proxy.active += 1
+        return proxy
+
+    def release(self, proxy: ProxyStats, elapsed: Optional[float] = None, error: Optional[BaseException] = None) -> None:
+        '''
+        Hands back a proxy reserved with :method:`acquire` and records the outcome of the call.
+
+        Args:
+            proxy: The reserved proxy.
+            elapsed: The duration of the call in seconds. If not given, the call was cancelled and nothing is recorded.
+            error: The exception the call raised, if any.
+        '''
+        proxy.active -= 1
+        if elapsed is not None:
+            self.record(proxy, elapsed, classify_error(error) if error is not None else None)
+        while self._waiters:
+            if not (waiter := self._waiters.popleft()).done():
+                waiter.set_result(None)
+
+    def record(self, proxy: ProxyStats, elapsed: float, failure: Optional[str] = None) -> None:
+        '''
+        Updates the health of a proxy after a call and cools it down or ejects it if needed.
+
+        Args:
+            proxy: The proxy the call went through.
+            elapsed: The duration of the call in seconds.
+            failure: ``'rate_limited'`` or ``'network'`` if the call failed because of the proxy.
+        '''
+        now = time.monotonic()
+        proxy.requests += 1
+        proxy.latency = elapsed if not proxy.latency else proxy.latency * 0.8 + elapsed * 0.2
+        proxy.error_rate = proxy.error_rate * 0.8 + (0.2 if failure else 0.0)
+        if not failure:
+            proxy._consecutive = 0
+            if proxy.strikes and now - proxy._struck_at > self.cooldown * 2 ** proxy.strikes:
+                proxy.strikes -= 1
+                proxy._struck_at = now
+            return
+        proxy.failures += 1
+        proxy._consecutive += 1
+        if failure == 'rate_limited':
+            proxy.rate_limited += 1
+        elif proxy._consecutive < self.max_failures:
+            return
+        proxy._consecutive = 0
+        proxy.strikes += 1
+        proxy._struck_at = now
+        proxy.cooldown_until = now + self.cooldown * 2 ** (proxy.strikes - 1)
+        if proxy.strikes >= self.max_strikes:
+            proxy.ejected = True
+
+    async def call(self, extractor: Any, name: str, options: dict, *args: Any) -> Any:
+        '''
+        Runs an extractor function through the healthiest available proxy.
+
+        Args:
+            extractor: The :class:`Resolver` or :class:`WorkerShard` that runs the call.
+            name: The name of the registered function. Its first argument must be the extractor options.
+            options: The extractor options. The proxy is added to a copy of them.
+            *args: The remaining arguments to pass to the function.
+
+        Returns:
+            The return value of the function.
+        '''
+        proxy = await self.acquire()
+        started = time.perf_counter()
+        try:
+            result = await extractor.call(name, {**options, 'proxy': proxy.url}, *args)
+        except asyncio.CancelledError:
+            self.release(proxy)
+            raise
+        except Exception as error:
+            self.release(proxy, time.perf_counter() - started, error)
+            raise
+        self.release(proxy, time.perf_counter() - started)
+        return result
\ No newline at end of file
@@ -0,0 +1,161 @@
+import ntpath
+import os
+import re
+
+from typing import Optional
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from .tracks import WATCH_URL
+
+PLAYLIST_URL = 'https://www.youtube.com/playlist?list='
+VIDEO_ID_REGEX = re.compile(r'^[\w-]{11}$')
+PLAYLIST_ID_REGEX = re.compile(r'^[\w-]{2,}$')
+SPOTIFY_ID_REGEX = re.compile(r'^[a-zA-Z0-9]+$')
+TIMESTAMP_REGEX = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$')
+YOUTUBE_HOSTS = frozenset(('youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com', 'gaming.youtube.com', 'youtube-nocookie.com', 'www.youtube-nocookie.com'))
+SHORT_HOSTS = frozenset(('youtu.be', 'www.youtu.be'))
+SPOTIFY_HOSTS = frozenset(('open.spotify.com', 'play.spotify.com'))
+VIDEO_PATHS = frozenset(('shorts', 'embed', 'v', 'e', 'live'))
+SPOTIFY_TYPES = frozenset(('track', 'album', 'playlist'))
+
+class Query:
+    '''
+    A classified :method:`Player.get_tracks` query. Queries are created with :func:`parse_query`.
+
+    Attributes:
+        kind: Either ``video``, ``playlist``, ``spotify_track``, ``spotify_album``, ``spotify_playlist``, ``local``, ``url`` for unsupported urls or ``search``.
+        identifier: The canonical ID of the video, playlist or Spotify entity, the absolute path of a local file or the search terms with their whitespace collapsed.
+        url: The canonical url to resolve, if the query has one.
+        start: The offset in seconds given by a ``t`` or ``start`` parameter, if any.
+    '''
+
+    __slots__ = ('kind', 'identifier', 'url', 'start')
+
+    def __init__(self, kind: str, identifier: Optional[str] = None, url: Optional[str] = None, start: Optional[int] = None) -> None:
+        self.kind: str = kind
+        self.identifier: Optional[str] = identifier
+        self.url: Optional[str] = url
+        self.start: Optional[int] = start
+
+    def __repr__(self) -> str:
+        return f'<Query kind={self.kind!r} identifier={self.identifier!r}>'
+
+    @property
+    def key(self) -> Optional[str]:
+        '''
+        Gets the stable key used to cache and coalesce the resolution of the query. Different spellings of the same video, playlist, Spotify entity or search share a key.
+
+        Returns:
+            str: The key, if the query can not be resolved, :class:`None` is returned.
+        '''
+        if self.kind == 'video':
+            return f'youtube:{self.identifier}'
+        elif self.kind == 'playlist':
+            return f'playlist:{self.identifier}'
+        elif self.kind.startswith('spotify_'):
+            return f'spotify:{self.kind[len("spotify_"):]}:{self.identifier}'
+        elif self.kind == 'local':
+            return f'local:{self.identifier}'
+        elif self.kind == 'search':
+            return f'ytsearch:{self.identifier.casefold()}'
+
+    @property
+    def is_playlist(self) -> bool:
+        '''
+        Shows whether the query resolves to a :class:`Playlist`.
+
+        Returns:
+            bool: Whether the query is a YouTube playlist or a Spotify album or playlist.
+        '''
+        return self.kind in ('playlist', 'spotify_album', 'spotify_playlist')
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    '''
+    Parses a YouTube timestamp such as ``90``, ``90s`` or ``1m30s``.
+
+    Args:
+        value: The timestamp.
+
+    Returns:
+        int: The offset in seconds, if the timestamp is invalid, :class:`None` is returned.
+    '''
+    if not value or not (match := TIMESTAMP_REGEX.match(value.strip())) or not any(match.groups()):
+        return
+    hours, minutes, seconds = (int(group or 0) for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+def _video(identifier: Optional[str], parameters: dict) -> Optional[Query]:
+    if not identifier or not VIDEO_ID_REGEX.match(identifier):
+        return
+    start = parse_timestamp((parameters.get('t') or parameters.get('start') or [None])[0])
+    return Query('video', identifier, f'{WATCH_URL}{identifier}', start)
+
+def _playlist(identifier: Optional[str]) -> Optional[Query]:
+    if not identifier or not PLAYLIST_ID_REGEX.match(identifier):
+        return
+    return Query('playlist', identifier, f'{PLAYLIST_URL}{identifier}')
+
+def _parse_youtube(path: str, parameters: dict) -> Optional[Query]:
+    segments = [segment for segment in path.split('/') if segment]
+    if not segments:
+        return
+    if segments[0] == 'watch':
+        return _video((parameters.get('v') or [None])[0], parameters) or _playlist((parameters.get('list') or [None])[0])
+    if segments[0] == 'playlist' or segments[0] == 'embed' and segments[1:] == ['videoseries']:
+        return _playlist((parameters.get('list') or [None])[0])
+    if segments[0] in VIDEO_PATHS and len(segments) > 1:
+        return _video(segments[1], parameters)
+
+def _parse_spotify(path: str) -> Optional[Query]:
+    segments = [segment for segment in path.split('/') if segment]
+    if segments and segments[0].startswith('intl-'):
+        segments = segments[1:]
+    if len(segments) >= 2 and segments[0] in SPOTIFY_TYPES and SPOTIFY_ID_REGEX.match(segments[1]):
+        return Query(f'spotify_{segments[0]}', segments[1], f'https://open.spotify.com/{segments[0]}/{segments[1]}')
+
+def _local_path(query: str) -> Optional[str]:
+    '''Gets the absolute path a query names, if it looks like a path. Windows paths are only normalized, so they are not joined to the working directory on other systems.'''
+    if re.match(r'^[a-zA-Z]:[\\/]', query):
+        return ntpath.normpath(query)
+    if query.startswith(('/', './', '../', '~/')):
+        return os.path.abspath(os.path.expanduser(query))
+
+def parse_query(query: str, local: bool = False) -> Query:
+    '''
+    Classifies a query in a single pass. Video urls in every common form, such as ``youtu.be`` links with a timestamp, ``shorts/``, ``music.youtube.com`` and ``watch`` urls that also name a playlist, resolve to the canonical watch url of the video.
+    Only ``playlist`` urls, embedded playlists and ``watch`` urls without a video resolve to a playlist.
+
+    Args:
+        query: The url, Spotify URI, path or search terms. Surrounding whitespace and the ``<>`` Discord uses to suppress embeds are ignored.
+        local: Whether paths of existing files are classified as local. Otherwise, and for paths that do not exist, they are searched like any other text. ``file://`` urls are always local.
+
+    Returns:
+        :class:`Query`: The classified query.
+    '''
+    query = query.strip().strip('<>').strip()
+    if query.startswith('spotify:'):
+        parts = query.split(':')
+        if len(parts) == 3 and parts[1] in SPOTIFY_TYPES and SPOTIFY_ID_REGEX.match(parts[2]):
+            return Query(f'spotify_{parts[1]}', parts[2], f'https://open.spotify.com/{parts[1]}/{parts[2]}')
+        return Query('url')
+    if query.startswith('file://'):
+        return Query('local', os.path.abspath(unquote(urlsplit(query).path)))
+    if local and (path := _local_path(query)) and os.path.exists(path):
+        return Query('local', path)
+    if '://' in query or query.startswith(('www.', 'youtube.com/', 'youtu.be/', 'music.youtube.com/', 'm.youtube.com/', 'open.spotify.com/')):
+        try:
+            url = urlsplit(query if '://' in query else f'https://{query}')
+            host = (url.hostname or '').lower()
+        except ValueError:
+            return Query('url')
+        parsed = None
+        if host in YOUTUBE_HOSTS:
+            parsed = _parse_youtube(url.path, parse_qs(url.query))
+        elif host in SHORT_HOSTS:
+            parsed = _video(url.path.strip('/').split('/')[0], parse_qs(url.query))
+        elif host in SPOTIFY_HOSTS:
+            parsed = _parse_spotify(url.path)
+        return parsed or Query('url', url=query)
+    if not (terms := ' '.join(query.split())):
+        return Query('url')
+    return Query('search', terms)
\ No newline at end of file
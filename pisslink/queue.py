@@ -1,24 +1,220 @@
 import random
 
-from typing import Optional, Union, List
+from collections import deque
+from collections.abc import Sequence
+from itertools import islice
+from typing import Optional, Union, Any, List, Callable, Deque, Dict, Iterator, Iterable, Sequence as SequenceType
 
-from .tracks import Playable, Track, PartialTrack, LocalTrack, Playlist
+from .tracks import Playable, Track, PartialTrack, LocalTrack, Playlist, TrackStore
+
+class _Entry:
+    '''A slot in the :class:`Queue` that holds a track, the position at which it starts playing and the next entry holding the same track.'''
+
+    __slots__ = ('track', 'offset', 'duplicate')
+
+    def __init__(self, track: Optional[Playable], offset: Optional[int] = None) -> None:
+        self.track: Optional[Playable] = track
+        self.offset: Optional[int] = offset
+        self.duplicate: Optional[_Entry] = None
+
+class _StoredEntry(_Entry):
+    '''An entry added from a :class:`TrackStore` that only refers to its position in the store. Its :class:`PartialTrack` is created, indexed and given an offset when the entry is first accessed.'''
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: TrackStore, index: int) -> None:
+        super().__init__(None)
+        self.store: Optional[TrackStore] = store
+        self.index: Optional[int] = index
+
+class QueueView(Sequence):
+    '''
+    A read-only view of the tracks in a :class:`Queue` that always reflects its current contents. This class should not be created manually but is returned by :attr:`Queue.tracks`.
+
+    Changing the view raises :exc:`TypeError`. Use :method:`Queue.insert`, :method:`Queue.remove`, :method:`Queue.remove_at` and :method:`Queue.move` instead, so the queue can keep its index and offsets up to date.
+    '''
+
+    __slots__ = ('_queue',)
+
+    def __init__(self, queue: 'Queue') -> None:
+        self._queue: Queue = queue
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Playable, List[Playable]]:
+        queue = self._queue
+        if isinstance(index, slice):
+            return [queue._track(queue._entries[position]) for position in range(*index.indices(len(queue)))]
+        return queue._track(queue._entries[index])
+
+    def __iter__(self) -> Iterator[Playable]:
+        return iter(self._queue)
+
+    def __contains__(self, track: Any) -> bool:
+        return track in self._queue
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, QueueView):
+            other = list(other)
+        return list(self) == other if isinstance(other, list) else NotImplemented
+
+    def __repr__(self) -> str:
+        return f'QueueView({list(self)!r})'
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError('Queue.tracks is read-only, use the methods of Queue to change the queue.')
+
+    __setitem__ = __delitem__ = __iadd__ = append = extend = insert = remove = pop = clear = sort = reverse = _read_only
 
 class Queue:
-    '''A queue class stores :class:`Track` objects and has various methods to manipulate them. This class should not be created manually but is an attribute to :class:`Player`.'''
+    '''
+    A queue class stores :class:`Track` objects and has various methods to manipulate them. This class should not be created manually but is an attribute to :class:`Player`.
+
+    The queue is backed by a deque, so taking the next track and adding tracks to either end takes constant time per track. Entries are indexed by track identity, so looking up, replacing or checking for a track never scans the queue unless the track is queued more than once. :attr:`tracks` is a read-only view, change the queue through its methods.
+    Playlists backed by a :class:`TrackStore` are queued as references into the store, their :class:`PartialTrack` objects are only created once the entries are accessed, which usually happens when they are about to be prefetched.
+    '''
 
     def __init__(self):
-        self.tracks: List[Playable] = []
+        self._entries: Deque[_Entry] = deque()
+        self._index: Dict[Playable, _Entry] = {}
+        self._listeners: List[Callable[[], None]] = []
+        self._duration: int = 0
+        self._start: int = 0
+        self._end: int = 0
+        self._dirty: bool = False
+        self._feeds: Dict[Playlist, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Playable]:
+        return self._tracks(self._entries)
+
+    def __contains__(self, track: Playable) -> bool:
+        return track in self._index
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        '''
+        Registers a callback that is called whenever the contents of the queue change.
+
+        Args:
+            listener: The callback to register.
+        '''
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        '''
+        Removes a callback registered with :method:`add_listener`.
+
+        Args:
+            listener: The callback to remove.
+        '''
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in self._listeners:
+            listener()
+
+    @staticmethod
+    def _length(entry: _Entry) -> int:
+        '''Gets the duration of an entry in milliseconds without creating its track.'''
+        return entry.track.duration if entry.track is not None else entry.store.duration(entry.index)
+
+    def _link(self, entry: _Entry) -> None:
+        if entry.track is not None:
+            self._index_entry(entry)
+        self._duration += self._length(entry)
+
+    def _index_entry(self, entry: _Entry) -> None:
+        entry.duplicate = self._index.get(entry.track)
+        self._index[entry.track] = entry
+
+    def _unlink(self, entry: _Entry) -> None:
+        if entry.track is not None:
+            first = self._index[entry.track]
+            if first is entry:
+                if entry.duplicate:
+                    self._index[entry.track] = entry.duplicate
+                else:
+                    del self._index[entry.track]
+            else:
+                while first.duplicate is not entry:
+                    first = first.duplicate
+                first.duplicate = entry.duplicate
+            entry.duplicate = None
+        self._duration -= self._length(entry)
+
+    def _track(self, entry: _Entry, offset: Optional[int] = None) -> Playable:
+        '''
+        Gets the track of an entry, creating and indexing it if the entry still refers to a :class:`TrackStore`.
+
+        Args:
+            entry: The queued entry.
+            offset: The position at which the entry starts playing, if known. Otherwise the offsets are recomputed when they are next needed.
+
+        Returns:
+            :class:`PartialTrack`, :class:`Track` or :class:`LocalTrack`: The track of the entry.
+        '''
+        if entry.track is None:
+            entry.track = entry.store[entry.index]
+            entry.store = entry.index = None
+            entry.offset = offset
+            self._index_entry(entry)
+            if offset is None:
+                self._dirty = True
+        return entry.track
+
+    def _tracks(self, entries: Iterable[_Entry]) -> Iterator[Playable]:
+        '''Gets the tracks of consecutive entries taken from the front of the queue. Their offsets are counted along, so creating their tracks does not force the offsets to be recomputed.'''
+        offset = self._start
+        for entry in entries:
+            yield self._track(entry, offset)
+            offset += entry.track.duration
+
+    @staticmethod
+    def _peek(entry: _Entry) -> Playable:
+        '''Gets the track of an entry without keeping it, for readers such as the :class:`SessionStore` that should not create the tracks of the whole queue.'''
+        return entry.track if entry.track is not None else entry.store[entry.index]
+
+    def _first(self, track: Playable) -> _Entry:
+        '''Finds the entry of a queued track that plays first. The index only knows the order of entries that hold the same track when the track is queued once.'''
+        entry = self._index[track]
+        if entry.duplicate is None:
+            return entry
+        return next(item for item in self._entries if item.track is track)
+
+    def _rebuild_offsets(self) -> None:
+        '''Recomputes the start positions of all entries after the queue was reordered or a duration changed. Entries that still refer to a :class:`TrackStore` are counted but get no offset.'''
+        offset = 0
+        for entry in self._entries:
+            if entry.track is not None:
+                entry.offset = offset
+            offset += self._length(entry)
+        self._start = 0
+        self._end = offset
+        self._dirty = False
+
+    @property
+    def tracks(self) -> QueueView:
+        '''
+        Gets a read-only view of the tracks in the queue. The view follows later changes of the queue, but can not be changed itself.
+
+        Returns:
+            :class:`QueueView`: The tracks in the queue, in playing order.
+        '''
+        return QueueView(self)
 
     @property
     def is_empty(self) -> bool:
         '''
         Shows whether the queue is currently empty.
-        
+
         Returns:
             bool: Whether the queue is currently empty.
         '''
-        return len(self.tracks) == 0
+        return len(self._entries) == 0
 
     @property
     def next_track(self) -> Optional[Playable]:
@@ -28,7 +224,7 @@ class Queue:
         Returns:
             :class:`PartialTrack`, :class:`Track` or :class:`LocalTrack`: The upcoming track, if the queue is empty, :class:`None` is returned.
         '''
-        return self.tracks[0] if not self.is_empty else None
+        return next(self._tracks(islice(self._entries, 1)), None)
 
     @property
     def length(self) -> int:
@@ -38,45 +234,273 @@ class Queue:
         Returns:
             int: The amount of tracks in the queue.
         '''
-        return len(self.tracks)
+        return len(self._entries)
 
-    def add(self, track: Union[Track, LocalTrack, Playlist], top: bool = False) -> None:
+    @property
+    def duration(self) -> int:
+        '''
+        Gets the total duration of the queue.
+
+        Returns:
+            int: The total duration of all tracks in the queue in milliseconds.
         '''
-        Adds a track to the queue.
+        return self._duration
+
+    def upcoming(self, amount: int) -> List[Playable]:
+        '''
+        Gets the first tracks of the queue without copying the rest of it.
+
+        Args:
+            amount: The maximum amount of tracks to return.
+
+        Returns:
+            list: The upcoming tracks, in playing order.
+        '''
+        return list(self._tracks(islice(self._entries, amount)))
+
+    def add(self, track: Union[Track, PartialTrack, LocalTrack, Playlist], top: bool = False) -> None:
+        '''
+        Adds a track to the queue. Pages of a streaming :class:`Playlist` that are loaded later are inserted right after the page before them, so the playlist stays together wherever it was added.
 
         Args:
             track: The track to add.
             top: Whether to add the track to the top of the queue. Defaults to False.
         '''
         if track:
+            if isinstance(track, Playlist):
+                entries = self._insert(track.tracks, top)
+                if not track.complete and entries:
+                    track._attach(self)
+                    self._feeds[track] = entries[-1]
+            else:
+                self._insert([track], top)
+
+    def _feed(self, playlist: Playlist, start: int) -> None:
+        '''
+        Inserts the tracks of a streaming :class:`Playlist` from :param:`start` on right after its previous page. If the previous page already left the queue, the tracks are added to the top. This method should not be called directly.
+
+        Args:
+            playlist: The :class:`Playlist` that loaded a page.
+            start: The position in :attr:`Playlist.tracks` of the first new track.
+        '''
+        anchor = self._feeds.get(playlist)
+        if anchor is None:
+            return
+        if self._entries and self._entries[-1] is anchor:
+            entries = self._insert(playlist.tracks, False, start)
+        else:
+            try:
+                position = self._entries.index(anchor) + 1
+            except ValueError:
+                position = 0
+            entries = self._insert(playlist.tracks, True, start) if position == 0 else self._insert_at(position, playlist.tracks, start)
+        if entries:
+            self._feeds[playlist] = entries[-1]
+
+    @staticmethod
+    def _create_entries(tracks: SequenceType[Playable], start: int) -> List[_Entry]:
+        '''Creates the entries of :param:`tracks` from :param:`start` on. Tracks of a :class:`TrackStore` become references into the store.'''
+        if isinstance(tracks, TrackStore):
+            return [_StoredEntry(tracks, index) for index in range(start, len(tracks))]
+        return [_Entry(item) for item in islice(tracks, start, None)]
+
+    def _insert_at(self, position: int, tracks: SequenceType[Playable], start: int = 0) -> List[_Entry]:
+        '''
+        Inserts tracks in the middle of the queue in the given order. This method should not be called directly, use :method:`insert` instead.
+
+        Args:
+            position: The position of the first inserted track.
+            tracks: The tracks to insert.
+            start: The position in :param:`tracks` of the first track to insert.
+
+        Returns:
+            list: The inserted entries.
+        '''
+        entries = self._create_entries(tracks, start)
+        if entries:
+            self._entries.rotate(-position)
+            self._entries.extendleft(reversed(entries))
+            self._entries.rotate(position)
+            for entry in entries:
+                self._link(entry)
+            self._dirty = True
+            self._notify()
+        return entries
+
+    def _insert(self, tracks: SequenceType[Playable], top: bool, start: int = 0) -> List[_Entry]:
+        '''
+        Adds tracks to either end of the queue in the given order. Tracks of a :class:`TrackStore` are added as references into the store. This method should not be called directly, use :method:`add` instead.
+
+        Args:
+            tracks: The tracks to add.
+            top: Whether to add the tracks to the top of the queue.
+            start: The position in :param:`tracks` of the first track to add.
+
+        Returns:
+            list: The added entries.
+        '''
+        entries = self._create_entries(tracks, start)
+        if entries:
             if top:
-                if isinstance(track, Playlist):
-                    for track in reversed(track.tracks):
-                        self.tracks.insert(0, track)
-                else:
-                    self.tracks.insert(0, track)
+                self._start -= sum(self._length(entry) for entry in entries)
+                offset = self._start
+                for entry in entries:
+                    if entry.track is not None:
+                        entry.offset = offset
+                    offset += self._length(entry)
+                self._entries.extendleft(reversed(entries))
             else:
-                if isinstance(track, Playlist):
-                    self.tracks.extend(track.tracks)
-                else:
-                    self.tracks.append(track)
+                for entry in entries:
+                    if entry.track is not None:
+                        entry.offset = self._end
+                    self._end += self._length(entry)
+                self._entries.extend(entries)
+            for entry in entries:
+                self._link(entry)
+            self._notify()
+        return entries
+
+    def insert(self, index: int, track: Union[Track, PartialTrack, LocalTrack]) -> None:
+        '''
+        Inserts a track before the entry at :param:`index`, like :method:`list.insert`.
+
+        Args:
+            index: The position to insert the track at. Negative positions count from the end and positions beyond either end insert at that end.
+            track: The track to insert.
+        '''
+        index = self._clamp(index)
+        if index == 0 or index == len(self._entries):
+            self._insert([track], index == 0)
+        else:
+            self._insert_at(index, [track])
+
+    def _clamp(self, index: int) -> int:
+        '''Normalizes an insert position the way :method:`list.insert` does.'''
+        if index < 0:
+            index += len(self._entries)
+        return min(max(index, 0), len(self._entries))
 
     def get(self) -> Optional[Playable]:
         '''
         Pops the next track from the queue. This method should not be manually called but is automatically called when the player gets the next track. If you need the upcoming track use :property:`next_track` instead.
-        
+
         Returns:
             :class:`PartialTrack`, :class:`Track` or :class:`LocalTrack`: The next track, if the queue is empty, :class:`None` is returned.
         '''
-        return self.tracks.pop(0) if not self.is_empty else None
+        if self.is_empty:
+            return
+        entry = self._entries.popleft()
+        self._unlink(entry)
+        self._start += self._length(entry)
+        self._notify()
+        return self._peek(entry)
+
+    def remove(self, track: Playable) -> bool:
+        '''
+        Removes the first occurrence of the given track from the queue, like :method:`list.remove`.
+
+        Args:
+            track: The track to remove.
+
+        Returns:
+            bool: Whether the track was in the queue.
+        '''
+        if track not in self:
+            return False
+        entry = self._first(track)
+        if entry is self._entries[0]:
+            self._entries.popleft()
+            self._start += self._length(entry)
+        else:
+            self._entries.remove(entry)
+            self._dirty = True
+        self._unlink(entry)
+        self._notify()
+        return True
+
+    def remove_at(self, index: int) -> Playable:
+        '''
+        Removes the track at the given position from the queue.
+
+        Args:
+            index: The position of the track. Negative positions count from the end.
+
+        Returns:
+            :class:`PartialTrack`, :class:`Track` or :class:`LocalTrack`: The removed track.
+
+        Raises:
+            :exc:`IndexError`: If there is no track at :param:`index`.
+        '''
+        entry = self._entries[index]
+        if entry is self._entries[0]:
+            self._entries.popleft()
+            self._start += self._length(entry)
+        else:
+            del self._entries[index]
+            self._dirty = True
+        self._unlink(entry)
+        self._notify()
+        return self._peek(entry)
+
+    def move(self, index: int, destination: int) -> None:
+        '''
+        Moves the track at :param:`index` so it ends up at :param:`destination`.
+
+        Args:
+            index: The position of the track to move. Negative positions count from the end.
+            destination: The position to move the track to, counted after the track was taken out. Positions beyond either end move the track to that end.
+
+        Raises:
+            :exc:`IndexError`: If there is no track at :param:`index`.
+        '''
+        entry = self._entries[index]
+        del self._entries[index]
+        self._entries.insert(self._clamp(destination), entry)
+        self._dirty = True
+        self._notify()
+
+    def replace(self, track: Playable, new: Playable) -> bool:
+        '''
+        Replaces the first occurrence of the given track with another one at the same position. Only tracks that are queued more than once need a scan of the queue.
+
+        Args:
+            track: The track to replace.
+            new: The track to put in its place.
+
+        Returns:
+            bool: Whether the track was in the queue.
+        '''
+        if track not in self:
+            return False
+        entry = self._first(track)
+        self._unlink(entry)
+        if new.duration != track.duration:
+            self._dirty = True
+        entry.track = new
+        self._link(entry)
+        self._notify()
+        return True
 
     def clear(self) -> None:
         '''Clears the queue.'''
-        self.tracks.clear()
+        self._entries.clear()
+        self._index.clear()
+        self._duration = 0
+        self._start = 0
+        self._end = 0
+        self._dirty = False
+        for playlist in self._feeds:
+            playlist._detach(self)
+        self._feeds.clear()
+        self._notify()
 
     def shuffle(self) -> None:
         '''Shuffles the queue.'''
-        random.shuffle(self.tracks)
+        entries = list(self._entries)
+        random.shuffle(entries)
+        self._entries = deque(entries)
+        self._dirty = True
+        self._notify()
 
     def duration_until(self, track: Playable) -> int:
         '''
@@ -86,11 +510,14 @@ class Queue:
             track: The track to get the duration until.
 
         Returns:
-            int: The duration until the given track is played in milliseconds.
-        '''
-        duration = 0
-        for item in self.tracks:
-            if item == track:
-                break
-            duration += item.duration
-        return duration
\ No newline at end of file
+            int: The duration until the given track is played in milliseconds. If the track is not in the queue, the duration of the whole queue is returned.
+        '''
+        if track not in self:
+            return self._duration
+        if self._dirty:
+            self._rebuild_offsets()
+        entry, offset = self._index[track], None
+        while entry:
+            offset = entry.offset if offset is None else min(offset, entry.offset)
+            entry = entry.duplicate
+        return offset - self._start
\ No newline at end of file
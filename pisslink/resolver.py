@@ -0,0 +1,181 @@
+import asyncio
+import functools
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Callable, Awaitable, Dict
+
+from .metrics import MetricsCollector
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {}
+'''The blocking functions that can be called by name with :method:`Resolver.call`, both in worker threads and in worker processes.'''
+
+class ResolverStats:
+    '''
+    Timing statistics collected by the :class:`Resolver`.
+
+    Attributes:
+        submitted: The amount of calls that were submitted.
+        completed: The amount of calls that finished successfully.
+        failed: The amount of calls that raised an exception.
+        queue_wait: The total time in seconds calls spent waiting for a free worker.
+        execution: The total time in seconds calls spent executing.
+        max_queue_wait: The longest time in seconds a single call waited for a free worker.
+        max_execution: The longest time in seconds a single call spent executing.
+        coalesced: The amount of resolutions that were served by joining an identical one already in flight.
+    '''
+
+    def __init__(self) -> None:
+        self.submitted: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.queue_wait: float = 0.0
+        self.execution: float = 0.0
+        self.max_queue_wait: float = 0.0
+        self.max_execution: float = 0.0
+        self.coalesced: int = 0
+
+    @property
+    def average_queue_wait(self) -> float:
+        '''
+        Gets the average time calls spent waiting for a free worker.
+
+        Returns:
+            float: The average queue wait in seconds.
+        '''
+        finished = self.completed + self.failed
+        return self.queue_wait / finished if finished else 0.0
+
+    @property
+    def average_execution(self) -> float:
+        '''
+        Gets the average time calls spent executing.
+
+        Returns:
+            float: The average execution time in seconds.
+        '''
+        finished = self.completed + self.failed
+        return self.execution / finished if finished else 0.0
+
+class Resolver:
+    '''
+    Runs blocking extractor and Spotify calls in a bounded pool of worker threads so they never block the event loop.
+    This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Args:
+        concurrency: The maximum amount of calls that run at the same time.
+    '''
+
+    def __init__(self, concurrency: int = 4) -> None:
+        self.concurrency: int = max(1, concurrency)
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(self.concurrency, thread_name_prefix='pisslink-resolver')
+        self.stats: ResolverStats = ResolverStats()
+        self.metrics: MetricsCollector = MetricsCollector()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting: int = 0
+        self._active: int = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def pending(self) -> int:
+        '''
+        Gets the amount of calls waiting for a free worker.
+
+        Returns:
+            int: The amount of waiting calls.
+        '''
+        return self._waiting
+
+    @property
+    def active(self) -> int:
+        '''
+        Gets the amount of calls currently executing.
+
+        Returns:
+            int: The amount of executing calls.
+        '''
+        return self._active
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        '''
+        Runs :param:`func` in a worker thread once one is available.
+
+        Args:
+            func: The blocking callable to run.
+            *args: The positional arguments to pass to the callable.
+            **kwargs: The keyword arguments to pass to the callable.
+
+        Returns:
+            The return value of the callable.
+        '''
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.stats.submitted += 1
+        queued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        started = time.perf_counter()
+        wait = started - queued
+        self.stats.queue_wait += wait
+        self.stats.max_queue_wait = max(self.stats.max_queue_wait, wait)
+        self.metrics.observe('resolver.queue_wait', wait)
+        self._active += 1
+        future = asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        future.add_done_callback(functools.partial(self._finished, started, getattr(func, '__name__', 'unknown')))
+        return await asyncio.shield(future)
+
+    def _finished(self, started: float, name: str, future: asyncio.Future) -> None:
+        '''Records a finished call and frees its worker. This runs when the worker thread is done, not when the caller stops waiting, so cancelled callers never let more than :attr:`concurrency` calls run at once. This method should not be called directly.'''
+        elapsed = time.perf_counter() - started
+        self.stats.execution += elapsed
+        self.stats.max_execution = max(self.stats.max_execution, elapsed)
+        self.metrics.observe('resolver.call', elapsed, function=name)
+        if future.cancelled() or future.exception() is not None:
+            self.stats.failed += 1
+        else:
+            self.stats.completed += 1
+        self._active -= 1
+        self._semaphore.release()
+
+    async def call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        '''
+        Runs one of the functions registered in :data:`FUNCTIONS` in a worker thread. Worker processes expose the same method, so players do not need to know where their calls run.
+
+        Args:
+            name: The name of the registered function.
+            *args: The positional arguments to pass to the function.
+            **kwargs: The keyword arguments to pass to the function.
+
+        Returns:
+            The return value of the function.
+        '''
+        return await self.run(FUNCTIONS[name], *args, **kwargs)
+
+    async def coalesce(self, key: Optional[str], func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        '''
+        Awaits :param:`func` once per :param:`key`. Concurrent callers with the same key share the result of the resolution that is already in flight instead of starting their own.
+
+        Args:
+            key: The normalized key identifying the resolution. If :class:`None`, :param:`func` is always awaited directly.
+            func: The coroutine function performing the resolution.
+            *args: The arguments to pass to the coroutine function.
+
+        Returns:
+            The result of the shared resolution.
+        '''
+        if key is None:
+            return await func(*args)
+        if future := self._inflight.get(key):
+            self.stats.coalesced += 1
+        else:
+            future = asyncio.ensure_future(func(*args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def shutdown(self) -> None:
+        '''Shuts down the worker threads. Calls that are already running are allowed to finish.'''
+        self.executor.shutdown(wait=False)
\ No newline at end of file
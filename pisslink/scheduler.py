@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from collections import deque
+from typing import Optional, Any, List, Dict, Tuple, Deque, Set
+
+class ConversionScheduler:
+    '''
+    Converts queued :class:`PartialTrack` objects for every player of a :class:`Pool` from a single background task.
+    This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Players ask to be scheduled whenever their queue changes or a track starts playing. Every scheduled player offers the queue entry it needs converted first, ranked by the time at which that entry will start playing, so free capacity always goes to the entry playback needs next, whichever guild it belongs to. Idle players cost nothing.
+    While extractor calls are queueing up behind a full resolver, worker process or proxy pool, only entries that play within :attr:`urgency` seconds are started, so prefetching never delays searches or tracks that are about to play.
+
+    Args:
+        concurrency: The maximum amount of conversions that run at the same time across all players.
+        interval: The maximum interval in seconds between two scans of every registered player. Periodic scans pick up tracks whose endpoints are about to expire. Set to 0 to only scan when queues change.
+        urgency: The time in seconds within which an entry has to start playing to be converted while the extractor is busy.
+    '''
+
+    def __init__(self, concurrency: int = 4, interval: int = 30, urgency: float = 30) -> None:
+        self.concurrency: int = max(1, concurrency)
+        self.interval: int = interval
+        self.urgency: float = urgency
+        self._players: Set[Any] = set()
+        self._ready: Deque[Any] = deque()
+        self._scheduled: Set[Any] = set()
+        self._heap: List[Tuple[float, int, Any, Any]] = []
+        self._ranked: Dict[Any, int] = {}
+        self._counter = itertools.count()
+        self._active: int = 0
+        self._scanned_at: float = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> int:
+        '''
+        Gets the amount of conversions currently running.
+
+        Returns:
+            int: The amount of running conversions.
+        '''
+        return self._active
+
+    @property
+    def backlog(self) -> int:
+        '''
+        Gets the amount of players waiting for their turn.
+
+        Returns:
+            int: The amount of players with pending work.
+        '''
+        return len(self._scheduled | self._ranked.keys())
+
+    def register(self, player: Any) -> None:
+        '''
+        Registers a player so it is included in periodic scans.
+
+        Args:
+            player: The :class:`Player` to register.
+        '''
+        self._players.add(player)
+
+    def unregister(self, player: Any) -> None:
+        '''
+        Removes a player from the scheduler.
+
+        Args:
+            player: The :class:`Player` to remove.
+        '''
+        self._players.discard(player)
+        self._scheduled.discard(player)
+        self._ranked.pop(player, None)
+        if player in self._ready:
+            self._ready.remove(player)
+
+    def notify(self, player: Any) -> None:
+        '''
+        Schedules a player that may have conversion work.
+
+        Args:
+            player: The :class:`Player` to schedule.
+        '''
+        if player in self._players and player not in self._scheduled:
+            self._scheduled.add(player)
+            self._ready.append(player)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _finished(self, player: Any) -> None:
+        self._active -= 1
+        self.notify(player)
+
+    def _rank(self) -> None:
+        '''Asks every scheduled player for its most urgent entry and ranks it by the time it starts playing. This method should not be called directly.'''
+        now = time.monotonic()
+        while self._ready:
+            player = self._ready.popleft()
+            self._scheduled.discard(player)
+            if not (track := player._pending_conversion()):
+                self._ranked.pop(player, None)
+                continue
+            order = self._ranked[player] = next(self._counter)
+            heapq.heappush(self._heap, (now + player._time_until(track), order, player, track))
+        if len(self._heap) > 2 * len(self._ranked) + 64:
+            self._heap = [entry for entry in self._heap if self._ranked.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+    def _throttled(self, player: Any, deadline: float) -> bool:
+        '''Shows whether a conversion should wait because extractor calls are queueing up and the entry is not needed soon. This method should not be called directly.'''
+        return deadline - time.monotonic() > self.urgency and player._extractor_pending() > 0
+
+    async def _run(self) -> None:
+        '''The background task that starts the most urgent conversions. This method should not be called directly.'''
+        while True:
+            self._wakeup.clear()
+            throttled = False
+            while self._active < self.concurrency:
+                self._rank()
+                if not self._heap:
+                    break
+                deadline, order, player, track = self._heap[0]
+                if self._ranked.get(player) != order:
+                    heapq.heappop(self._heap)
+                    continue
+                if self._throttled(player, deadline):
+                    throttled = True
+                    break
+                heapq.heappop(self._heap)
+                del self._ranked[player]
+                self._active += 1
+                player._start_conversion(track).add_done_callback(lambda _, player=player: self._finished(player))
+                self.notify(player)
+            timeout = self.interval - (time.monotonic() - self._scanned_at) if self.interval else None
+            if throttled:
+                timeout = min(timeout, 1) if timeout is not None else 1
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait((waiter,), timeout=max(0, timeout) if timeout is not None else None)
+            finally:
+                waiter.cancel()
+            if self.interval and time.monotonic() - self._scanned_at >= self.interval:
+                self._scanned_at = time.monotonic()
+                for player in self._players:
+                    self.notify(player)
+
+    def stop(self) -> None:
+        '''Stops the background task. Running conversions are allowed to finish.'''
+        if self._task:
+            self._task.cancel()
\ No newline at end of file
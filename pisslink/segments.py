@@ -0,0 +1,255 @@
+import threading
+
+from array import array
+from collections import OrderedDict
+from typing import Optional, Callable
+
+import discord
+
+from .tracks import Track
+from .metrics import MetricsCollector
+from .sources import FRAME_LENGTH
+
+OPUS_BYTES_PER_SECOND = 20000
+'''The estimated size of one second of a YouTube Opus stream, which is used to skip tracks that would not fit in the cache.'''
+
+class SegmentEntry:
+    '''
+    The Opus packets of a single track, filled by one download and read by any amount of :class:`SegmentSource` objects.
+    Packets are appended to one buffer and their end offsets are kept in a flat array, so a cached track costs little more than its encoded size.
+
+    Attributes:
+        identifier: The identifier of the cached track.
+        complete: Whether the download finished.
+        failed: Whether the download stopped before the end of the track.
+        readers: The amount of sources currently reading the entry.
+    '''
+
+    __slots__ = ('identifier', 'complete', 'failed', 'readers', '_data', '_ends', '_condition')
+
+    def __init__(self, identifier: str) -> None:
+        self.identifier: str = identifier
+        self.complete: bool = False
+        self.failed: bool = False
+        self.readers: int = 0
+        self._data: bytearray = bytearray()
+        self._ends: array = array('L')
+        self._condition: threading.Condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @property
+    def size(self) -> int:
+        '''
+        Gets the memory used by the packets.
+
+        Returns:
+            int: The size in bytes.
+        '''
+        return len(self._data) + self._ends.itemsize * len(self._ends)
+
+    def append(self, packet: bytes) -> None:
+        '''
+        Adds the next packet and wakes up waiting readers.
+
+        Args:
+            packet: The Opus packet.
+        '''
+        with self._condition:
+            self._data += packet
+            self._ends.append(len(self._data))
+            self._condition.notify_all()
+
+    def finish(self, failed: bool = False) -> None:
+        '''
+        Marks the download as finished and wakes up waiting readers.
+
+        Args:
+            failed: Whether the download stopped before the end of the track.
+        '''
+        with self._condition:
+            self.complete = True
+            self.failed = failed or not self._ends
+            self._condition.notify_all()
+
+    def packet(self, index: int, timeout: float = 5) -> Optional[bytes]:
+        '''
+        Gets a packet, waiting for the download if it was not received yet.
+
+        Args:
+            index: The index of the packet.
+            timeout: The maximum time in seconds to wait for the packet.
+
+        Returns:
+            bytes: The packet, if the track ended or the download stalled, :class:`None` is returned.
+        '''
+        with self._condition:
+            if not self._condition.wait_for(lambda: index < len(self._ends) or self.complete, timeout) or index >= len(self._ends):
+                return
+            return bytes(self._data[self._ends[index - 1] if index else 0:self._ends[index]])
+
+class SegmentSource(discord.AudioSource):
+    '''
+    An Opus audio source that plays a :class:`SegmentEntry`. Any amount of sources can read the same entry, each at its own position.
+    This class should not be created manually but is returned by :method:`SegmentCache.open`.
+
+    Args:
+        entry: The entry to play.
+        release: The callable that is called once with the entry when the source is cleaned up.
+        position: The index of the first packet to play.
+    '''
+
+    def __init__(self, entry: SegmentEntry, release: Callable[[SegmentEntry], None], position: int = 0) -> None:
+        self.entry: SegmentEntry = entry
+        self.position: int = position
+        self._release: Optional[Callable[[SegmentEntry], None]] = release
+
+    def read(self) -> bytes:
+        if (packet := self.entry.packet(self.position)) is None:
+            return b''
+        self.position += 1
+        return packet
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        if self._release:
+            release, self._release = self._release, None
+            release(self.entry)
+
+class SegmentCache:
+    '''
+    A memory bounded cache of the Opus packets of remote tracks. Every track is downloaded by a single FFmpeg process, no matter how many guilds play it, and guilds that play it later are served from memory.
+    This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    When the cache grows beyond :attr:`max_size`, the least recently played entries that nobody is reading are evicted. Every running download reserves :attr:`max_entry_size`, so a track is only admitted if its download fits next to the others once everything that can be evicted is gone. Otherwise it is played directly. Downloads that every reader left before they finished are stopped and dropped. Live streams are never cached.
+
+    Args:
+        max_size: The maximum memory in bytes used by cached packets.
+        max_entry_size: The estimated maximum size in bytes of a single track. Longer tracks are played directly. Defaults to a quarter of :param:`max_size`, it can not be larger than :param:`max_size`.
+    '''
+
+    def __init__(self, max_size: int = 256 * 1024 ** 2, max_entry_size: Optional[int] = None) -> None:
+        self.max_size: int = max_size
+        self.max_entry_size: int = min(max_entry_size or max_size // 4, max_size)
+        self.metrics: MetricsCollector = MetricsCollector()
+        self._entries: 'OrderedDict[str, SegmentEntry]' = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        '''
+        Gets the memory used by all cached packets.
+
+        Returns:
+            int: The size in bytes.
+        '''
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def open(self, track: Track, create: Optional[Callable[[Track], discord.AudioSource]] = None, position: int = 0) -> Optional[SegmentSource]:
+        '''
+        Opens a source that plays :param:`track` from the cache, starting its download if it is not cached yet.
+        Sources that start at an offset are only served from packets that were already downloaded. Otherwise no download is started, since it would have to read the track from the beginning.
+
+        Args:
+            track: The :class:`Track` to play.
+            create: The callable that opens the Opus source the track is downloaded from. Defaults to :class:`FFmpegOpusAudio` with ``codec='copy'``.
+            position: The position in milliseconds to start at.
+
+        Returns:
+            :class:`SegmentSource`: The source, if the track can not be cached or does not fit in the cache, :class:`None` is returned and the track should be played directly.
+        '''
+        if self.max_size <= 0 or track.is_stream or not track.endpoint or not track.identifier or track.duration / 1000 * OPUS_BYTES_PER_SECOND > self.max_entry_size:
+            return
+        with self._lock:
+            entry = self._entries.get(track.identifier)
+            if entry is not None and entry.failed:
+                del self._entries[track.identifier]
+                entry = None
+            index = position // FRAME_LENGTH
+            if entry is not None and (not index or index < len(entry) or entry.complete):
+                self._entries.move_to_end(track.identifier)
+                entry.readers += 1
+                self.metrics.increment('segments.hits')
+                return SegmentSource(entry, self._release, index)
+            if index:
+                return
+            self._evict_unlocked(self.max_entry_size)
+            if self._committed() + self.max_entry_size > self.max_size:
+                entry = None
+            else:
+                entry = self._entries[track.identifier] = SegmentEntry(track.identifier)
+                entry.readers += 1
+        if entry is None:
+            self.metrics.increment('segments.bypasses')
+            return
+        self.metrics.increment('segments.misses')
+        try:
+            download = create(track) if create else discord.FFmpegOpusAudio(track.endpoint, codec='copy')
+        except:
+            entry.finish(True)
+            self._release(entry)
+            return
+        threading.Thread(target=self._download, args=(entry, download), name='pisslink-segments', daemon=True).start()
+        return SegmentSource(entry, self._release)
+
+    def _download(self, entry: SegmentEntry, download: discord.AudioSource) -> None:
+        '''Copies the packets of an FFmpeg process into an entry until the track ends or every reader left. This method runs in its own thread.'''
+        failed = True
+        try:
+            while entry.readers > 0:
+                if not (packet := download.read()):
+                    failed = False
+                    break
+                entry.append(packet)
+        except:
+            pass
+        finally:
+            entry.finish(failed)
+            download.cleanup()
+            with self._lock:
+                if failed and entry.readers <= 0 and self._entries.get(entry.identifier) is entry:
+                    del self._entries[entry.identifier]
+            self._evict()
+
+    def _release(self, entry: SegmentEntry) -> None:
+        '''Called when a source stops reading an entry. This method should not be called directly.'''
+        with self._lock:
+            entry.readers -= 1
+            if entry.readers <= 0 and entry.failed and self._entries.get(entry.identifier) is entry:
+                del self._entries[entry.identifier]
+        self._evict()
+
+    def _committed(self) -> int:
+        '''Gets the memory used by complete entries plus the memory reserved by running downloads. The caller must hold the lock. This method should not be called directly.'''
+        return sum(entry.size if entry.complete else max(entry.size, self.max_entry_size) for entry in self._entries.values())
+
+    def _evict(self) -> None:
+        '''Removes the least recently used entries nobody reads until the cache fits in :attr:`max_size`.'''
+        with self._lock:
+            self._evict_unlocked()
+
+    def _evict_unlocked(self, needed: int = 0) -> None:
+        '''Removes the least recently used entries nobody reads until :param:`needed` bytes fit next to the others. The caller must hold the lock. This method should not be called directly.'''
+        total = self._committed()
+        for identifier in list(self._entries):
+            if total + needed <= self.max_size:
+                break
+            entry = self._entries[identifier]
+            if entry.readers > 0 or not entry.complete:
+                continue
+            del self._entries[identifier]
+            total -= entry.size
+            self.metrics.increment('segments.evictions')
+
+    def clear(self) -> None:
+        '''Drops every entry nobody reads.'''
+        with self._lock:
+            for identifier in [identifier for identifier, entry in self._entries.items() if entry.readers <= 0]:
+                del self._entries[identifier]
\ No newline at end of file
@@ -0,0 +1,405 @@
+import asyncio
+import json
+import os
+import time
+
+from typing import Optional, Any, List, Dict, Tuple, Union
+
+from .tracks import Playable, PartialTrack, LocalTrack
+from .resolver import Resolver
+
+ADD_CHUNK_SIZE = 500
+
+def encode_track(track: Playable) -> Any:
+    '''
+    Encodes a track in the compact form used by session files. Remote tracks are stored as ``[title, duration, identifier, spotify_id, isrc]`` without trailing empty fields, local tracks as an object with their path. Stream endpoints are never stored because they expire.
+
+    Args:
+        track: The track to encode.
+
+    Returns:
+        The JSON serializable form of the track.
+    '''
+    if isinstance(track, LocalTrack):
+        return {'path': track.path, 'title': track.title, 'duration': track.duration // 1000}
+    identifier = track.identifier if isinstance(track, PartialTrack) or track.url else None
+    fields = [track.title, track.duration // 1000, identifier, getattr(track, 'spotify_id', None), getattr(track, 'isrc', None)]
+    while fields[-1] is None:
+        fields.pop()
+    return fields
+
+def decode_track(data: Any) -> Union[PartialTrack, LocalTrack]:
+    '''
+    Decodes a track encoded with :func:`encode_track`. Remote tracks are restored as :class:`PartialTrack` objects that are resolved again when they are prefetched or played.
+
+    Args:
+        data: The encoded track.
+
+    Returns:
+        :class:`PartialTrack` or :class:`LocalTrack`: The restored track.
+    '''
+    if isinstance(data, dict):
+        return LocalTrack(data)
+    title, duration, identifier, spotify_id, isrc = (list(data) + [None] * 5)[:5]
+    return PartialTrack({'title': title, 'duration': duration or 0, 'id': identifier, 'spotify_id': spotify_id, 'isrc': isrc})
+
+class SessionSnapshot:
+    '''
+    The saved state of a player, read from disk by :method:`SessionStore.load`.
+
+    Attributes:
+        channel_id: The ID of the voice channel the player was last connected to, if any.
+        current: The track that was playing, if any.
+        position: The position in milliseconds at which the first track to play, :attr:`current` or else the first queued track, should resume.
+        loop: Whether :attr:`current` was looping.
+        tracks: The queued tracks.
+        saved_at: The UNIX timestamp of the last save.
+    '''
+
+    __slots__ = ('channel_id', 'current', 'position', 'loop', 'tracks', 'saved_at')
+
+    def __init__(self, state: dict, tracks: List[Playable]) -> None:
+        self.channel_id: Optional[int] = state.get('channel_id')
+        self.current: Optional[Playable] = decode_track(state['current']) if state.get('current') else None
+        self.position: int = state.get('position', 0)
+        self.loop: bool = state.get('loop', False)
+        self.tracks: List[Playable] = tracks
+        self.saved_at: float = state.get('saved_at', 0.0)
+
+class _Session:
+    '''What has been written for a player, so the next save only has to append the difference.'''
+
+    __slots__ = ('guild_id', 'entries', 'index', 'logged', 'rewrite', 'state', 'dirty', 'handle', 'loading', 'restored')
+
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id: int = guild_id
+        self.entries: List[Any] = []
+        self.index: Dict[Any, int] = {}
+        self.logged: int = 0
+        self.rewrite: bool = True
+        self.state: Optional[dict] = None
+        self.dirty: bool = False
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.loading: Optional[asyncio.Future] = None
+        self.restored: bool = False
+
+    def written(self, entries: List[Any], logged: int) -> None:
+        self.entries = entries
+        self.index = {entry: position for position, entry in enumerate(entries)}
+        self.logged = logged
+        self.rewrite = False
+
+class SessionStore:
+    '''
+    Saves the queue, current track, playhead and loop state of every player to disk, so sessions survive restarts and dropped voice connections. This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Every guild has a small ``<guild>.json`` file with the player state and a ``<guild>.jsonl`` queue log. Only players with a current track or a queued track are saved, the session of a player whose queue ended or that was disconnected on purpose is deleted. Saves are debounced and only append the difference to the log: entries taken from the front are recorded as a ``pop`` line and entries added at the end as ``add`` lines, so advancing the queue or streaming a playlist never rewrites it. Other changes, such as shuffling or removing an entry, and logs that grew much larger than the queue are rewritten compactly.
+
+    Args:
+        directory: The directory to store the session files in.
+        delay: The time in seconds changes are collected before they are saved.
+        interval: The interval in seconds at which the playhead of playing players is saved.
+    '''
+
+    def __init__(self, directory: str, delay: float = 2, interval: float = 15) -> None:
+        self.directory: str = directory
+        self.delay: float = delay
+        self.interval: float = interval
+        self.resolver: Resolver = Resolver(1)
+        self._sessions: Dict[Any, _Session] = {}
+        self._task: Optional[asyncio.Task] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, guild_id: int, extension: str) -> str:
+        return os.path.join(self.directory, f'{guild_id}.{extension}')
+
+    def saved(self) -> List[int]:
+        '''
+        Gets the guilds that have a saved session.
+
+        Returns:
+            list: The guild IDs.
+        '''
+        return [int(name[:-5]) for name in os.listdir(self.directory) if name.endswith('.json') and name[:-5].isdigit()]
+
+    def load_state(self, guild_id: int) -> Optional[dict]:
+        '''
+        Reads the saved player state of a guild without reading its queue.
+
+        Args:
+            guild_id: The ID of the guild.
+
+        Returns:
+            dict: The state, if the guild has no saved session, :class:`None` is returned.
+        '''
+        try:
+            with open(self._path(guild_id, 'json'), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return
+
+    def load(self, guild_id: int) -> Optional[SessionSnapshot]:
+        '''
+        Reads the saved session of a guild by replaying its queue log.
+
+        Args:
+            guild_id: The ID of the guild.
+
+        Returns:
+            :class:`SessionSnapshot`: The session, if the guild has no saved session or nothing to play, :class:`None` is returned.
+        '''
+        if (state := self.load_state(guild_id)) is None:
+            return
+        encoded: List[Any] = []
+        popped = 0
+        try:
+            with open(self._path(guild_id, 'jsonl'), encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if 'add' in record:
+                        encoded.extend(record['add'])
+                    elif 'pop' in record:
+                        popped += record['pop']
+        except OSError:
+            pass
+        tracks = []
+        for data in encoded[popped:]:
+            try:
+                tracks.append(decode_track(data))
+            except:
+                continue
+        snapshot = SessionSnapshot(state, tracks)
+        if snapshot.current is None and not snapshot.tracks:
+            return
+        return snapshot
+
+    def delete(self, guild_id: int) -> None:
+        '''
+        Deletes the saved session of a guild.
+
+        Args:
+            guild_id: The ID of the guild.
+        '''
+        for extension in ('json', 'jsonl'):
+            try:
+                os.remove(self._path(guild_id, extension))
+            except OSError:
+                pass
+
+    def attach(self, player: Any, guild_id: int) -> None:
+        '''
+        Starts saving a player and restores its saved session, if any. The session is read on :attr:`resolver` so the event loop is never blocked, use :method:`loaded` to wait for it. Only the queue is restored, no track is resolved.
+
+        Args:
+            player: The :class:`Player` to save.
+            guild_id: The ID of the guild of the player.
+        '''
+        session = self._sessions[player] = _Session(guild_id)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self._restore(player, session, self.load(guild_id))
+            return
+        session.loading = asyncio.ensure_future(self._load(player, session))
+        self._wake()
+
+    async def _load(self, player: Any, session: _Session) -> None:
+        '''Reads the saved session of a player on :attr:`resolver` and restores it. This method should not be called directly.'''
+        try:
+            snapshot = await self.resolver.run(self.load, session.guild_id)
+        except:
+            snapshot = None
+        if self._sessions.get(player) is session:
+            self._restore(player, session, snapshot)
+
+    def _restore(self, player: Any, session: _Session, snapshot: Optional[SessionSnapshot]) -> None:
+        '''Restores a loaded session and records what is already on disk, so the next save only appends to it. Changes made to the player while the session was loading are saved afterwards. This method should not be called directly.'''
+        session.loading = None
+        changed = session.dirty or player.current is not None or len(player.queue) > 0
+        if snapshot:
+            player._restore(snapshot)
+            session.restored = True
+            session.state = {'channel_id': snapshot.channel_id}
+            session.written(list(player.queue._entries), len(player.queue))
+            session.rewrite = snapshot.current is not None or changed
+            session.state = self._state(player, session)
+        session.dirty = False
+        if session.handle:
+            session.handle.cancel()
+            session.handle = None
+        if changed:
+            self.mark(player)
+
+    async def loaded(self, player: Any) -> bool:
+        '''
+        Waits until the saved session of a player is restored.
+
+        Args:
+            player: The :class:`Player` to wait for.
+
+        Returns:
+            bool: Whether a saved session was restored.
+        '''
+        if not (session := self._sessions.get(player)):
+            return False
+        if session.loading:
+            await asyncio.wait([session.loading])
+        return session.restored
+
+    async def detach(self, player: Any) -> None:
+        '''
+        Saves a player one last time and stops saving it. The saved session is kept, so the next player of the guild restores it.
+
+        Args:
+            player: The :class:`Player` to stop saving.
+        '''
+        if session := self._sessions.get(player):
+            if session.loading:
+                session.loading.cancel()
+            else:
+                await self.save(player)
+            if session.handle:
+                session.handle.cancel()
+            self._sessions.pop(player, None)
+
+    async def discard(self, player: Any) -> None:
+        '''
+        Stops saving a player and deletes its saved session, for example because it was disconnected on purpose.
+
+        Args:
+            player: The :class:`Player` to stop saving.
+        '''
+        if session := self._sessions.pop(player, None):
+            if session.loading:
+                session.loading.cancel()
+            if session.handle:
+                session.handle.cancel()
+            await self.resolver.run(self.delete, session.guild_id)
+
+    def mark(self, player: Any) -> None:
+        '''
+        Schedules a save of a player after :attr:`delay` seconds, collecting all changes made until then.
+
+        Args:
+            player: The :class:`Player` that changed.
+        '''
+        if not (session := self._sessions.get(player)) or session.dirty:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        session.dirty = True
+        session.handle = loop.call_later(self.delay, lambda: asyncio.ensure_future(self.save(player)))
+
+    def _state(self, player: Any, session: _Session) -> dict:
+        '''Gets the player state to save. The last known channel is kept after a disconnect, so the session can be resumed there.'''
+        current = player.current
+        if current is not None:
+            position = player.position
+        else:
+            position = player._resume_at[1] if player._resume_at and player._resume_at[0] is player.queue.next_track else 0
+        return {
+            'channel_id': getattr(player.channel, 'id', None) or (session.state or {}).get('channel_id'),
+            'current': encode_track(current) if current is not None else None,
+            'position': position,
+            'loop': player.loop,
+        }
+
+    def _diff(self, session: _Session, entries: List[Any]) -> Optional[Tuple[int, List[Any]]]:
+        '''Finds how many entries were taken from the front and which were added at the end since the last save. If the queue changed in any other way, :class:`None` is returned.'''
+        if session.rewrite:
+            return
+        written = session.entries
+        if not entries:
+            return len(written), []
+        start = session.index.get(entries[0])
+        if start is None:
+            if any(entry in session.index for entry in entries):
+                return
+            return len(written), entries
+        kept = len(written) - start
+        if len(entries) < kept or any(entries[position] is not written[start + position] for position in range(kept)):
+            return
+        return start, entries[kept:]
+
+    async def save(self, player: Any) -> None:
+        '''
+        Saves the changes of a player now. If the player has nothing left to play, its saved session is deleted instead.
+
+        Args:
+            player: The :class:`Player` to save.
+        '''
+        if not (session := self._sessions.get(player)) or session.loading:
+            return
+        session.dirty = False
+        if session.handle:
+            session.handle.cancel()
+            session.handle = None
+        entries = list(player.queue._entries)
+        if not entries and player.current is None:
+            if session.state is not None:
+                session.written([], 0)
+                session.rewrite = True
+                session.state = None
+                await self.resolver.run(self.delete, session.guild_id)
+            return
+        state = self._state(player, session)
+        diff = self._diff(session, entries)
+        rewrite = diff is None or session.logged + len(diff[1]) > 2 * len(entries) + ADD_CHUNK_SIZE
+        if not rewrite and not diff[0] and not diff[1] and state == session.state:
+            return
+        tracks = [player.queue._peek(entry) for entry in (entries if rewrite else diff[1])]
+        popped = 0 if rewrite else diff[0]
+        session.written(entries, len(entries) if rewrite else session.logged + len(diff[1]))
+        session.state = state
+        try:
+            await self.resolver.run(self._write, session.guild_id, state, popped, tracks, rewrite)
+        except:
+            session.rewrite = True
+
+    def _write(self, guild_id: int, state: dict, popped: int, tracks: List[Playable], rewrite: bool) -> None:
+        '''Writes a save to disk in a worker thread. The state file is replaced atomically and the queue log is appended to or replaced.'''
+        log = self._path(guild_id, 'jsonl')
+        lines = [json.dumps({'pop': popped}) + '\n'] if popped else []
+        for start in range(0, len(tracks), ADD_CHUNK_SIZE):
+            lines.append(json.dumps({'add': [encode_track(track) for track in tracks[start:start + ADD_CHUNK_SIZE]]}, ensure_ascii=False, separators=(',', ':')) + '\n')
+        if rewrite:
+            with open(f'{log}.tmp', 'w', encoding='utf-8') as file:
+                file.writelines(lines)
+            os.replace(f'{log}.tmp', log)
+        elif lines:
+            with open(log, 'a', encoding='utf-8') as file:
+                file.writelines(lines)
+        with open(self._path(guild_id, 'json.tmp'), 'w', encoding='utf-8') as file:
+            json.dump({**state, 'saved_at': time.time()}, file, ensure_ascii=False)
+        os.replace(self._path(guild_id, 'json.tmp'), self._path(guild_id, 'json'))
+
+    def _wake(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self.interval > 0 and (not self._task or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        '''Saves the playhead of playing players every :attr:`interval` seconds. This method should not be called directly.'''
+        while self._sessions:
+            await asyncio.sleep(self.interval)
+            for player in list(self._sessions):
+                if player.current is not None:
+                    await self.save(player)
+
+    async def flush(self) -> None:
+        '''Saves every player now, for example before the bot shuts down.'''
+        for player in list(self._sessions):
+            await self.save(player)
+
+    def stop(self) -> None:
+        '''Stops the background task that saves the playhead.'''
+        if self._task:
+            self._task.cancel()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import threading
+
+from typing import Optional, Dict, Tuple
+
+import discord
+
+FRAME_LENGTH = 20
+'''The length in milliseconds of one frame read from an audio source.'''
+
+def seek_options(position: int) -> Dict[str, str]:
+    '''
+    Creates the FFmpeg options that start a source at an offset. The offset is passed as an input option, so FFmpeg seeks the input with range requests instead of reading it from the start.
+
+    Args:
+        position: The offset in milliseconds.
+
+    Returns:
+        dict: The keyword arguments to pass to :class:`FFmpegOpusAudio` or :class:`FFmpegPCMAudio`.
+    '''
+    return {'before_options': f'-ss {position / 1000:.3f}'} if position > 0 else {}
+
+class PlaybackSource(discord.AudioSource):
+    '''
+    The audio source played by a :class:`Player`. It counts the frames read by the voice client to track the playhead, which does not advance while paused, and lets :method:`Player.seek` swap the underlying source without ending the track.
+    This class should not be created manually but is created by :method:`Player.play`.
+
+    Args:
+        source: The audio source to play.
+        position: The position in milliseconds at which :param:`source` starts.
+    '''
+
+    def __init__(self, source: discord.AudioSource, position: int = 0) -> None:
+        self.source: discord.AudioSource = source
+        self.start: int = position
+        self.frames: int = 0
+        self._pending: Optional[Tuple[discord.AudioSource, int]] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def position(self) -> int:
+        '''
+        Gets the playhead.
+
+        Returns:
+            int: The position in milliseconds within the track.
+        '''
+        pending = self._pending
+        return pending[1] if pending else self.start + self.frames * FRAME_LENGTH
+
+    def swap(self, source: discord.AudioSource, position: int) -> None:
+        '''
+        Replaces the underlying source. The swap happens in the voice thread before the next frame is read, so a read in progress is never interrupted.
+
+        Args:
+            source: The new audio source.
+            position: The position in milliseconds at which :param:`source` starts.
+        '''
+        with self._lock:
+            replaced, self._pending = self._pending, (source, position)
+        if replaced:
+            replaced[0].cleanup()
+
+    def read(self) -> bytes:
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if pending:
+                previous = self.source
+                self.source, self.start = pending
+                self.frames = 0
+        if pending:
+            previous.cleanup()
+        data = self.source.read()
+        if data:
+            self.frames += 1
+        return data
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending:
+            pending[0].cleanup()
+        self.source.cleanup()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import sqlite3
+import threading
+import time
+
+from typing import Optional, Dict, Iterable, Tuple
+
+from .tracks import Track
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS spotify_tracks (
+    spotify_id TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    thumbnail TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS local_files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    title TEXT NOT NULL,
+    duration INTEGER NOT NULL
+);
+'''
+
+class MetadataStore:
+    '''
+    A persistent SQLite store for resolution results that survive restarts. This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    The store keeps the YouTube video that each Spotify track was matched to, the metadata of resolved videos and the probe results of local files. Stream endpoints are never stored because they expire.
+
+    Args:
+        path: The path to the database file. Use ``:memory:`` for a store that only lives as long as the process.
+    '''
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.executescript(SCHEMA)
+
+    def _fetchone(self, query: str, parameters: tuple) -> Optional[tuple]:
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchone()
+
+    def _write(self, query: str, parameters: tuple) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(query, parameters)
+
+    def get_spotify_video(self, spotify_id: str) -> Optional[str]:
+        '''
+        Gets the YouTube video a Spotify track was matched to.
+
+        Args:
+            spotify_id: The Spotify track ID.
+
+        Returns:
+            str: The YouTube video ID, if the track was never matched, :class:`None` is returned.
+        '''
+        row = self._fetchone('SELECT video_id FROM spotify_tracks WHERE spotify_id = ?', (spotify_id,))
+        return row[0] if row else None
+
+    def get_spotify_videos(self, spotify_ids: Iterable[str]) -> Dict[str, str]:
+        '''
+        Gets the YouTube videos a batch of Spotify tracks were matched to.
+
+        Args:
+            spotify_ids: The Spotify track IDs.
+
+        Returns:
+            dict: A mapping of Spotify track ID to YouTube video ID for every track that was matched before.
+        '''
+        spotify_ids = [spotify_id for spotify_id in spotify_ids if spotify_id]
+        matches = {}
+        with self._lock:
+            for start in range(0, len(spotify_ids), 500):
+                batch = spotify_ids[start:start + 500]
+                query = f'SELECT spotify_id, video_id FROM spotify_tracks WHERE spotify_id IN ({",".join("?" * len(batch))})'
+                matches.update(self._connection.execute(query, batch).fetchall())
+        return matches
+
+    def put_spotify_video(self, spotify_id: str, video_id: str) -> None:
+        '''
+        Stores the YouTube video a Spotify track was matched to.
+
+        Args:
+            spotify_id: The Spotify track ID.
+            video_id: The YouTube video ID.
+        '''
+        self._write('INSERT OR REPLACE INTO spotify_tracks (spotify_id, video_id) VALUES (?, ?)', (spotify_id, video_id))
+
+    def get_video(self, video_id: str) -> Optional[Tuple[str, int, Optional[str]]]:
+        '''
+        Gets the stored metadata of a YouTube video.
+
+        Args:
+            video_id: The YouTube video ID.
+
+        Returns:
+            tuple: The title, duration in seconds and thumbnail of the video, if the video is unknown, :class:`None` is returned.
+        '''
+        return self._fetchone('SELECT title, duration, thumbnail FROM videos WHERE video_id = ?', (video_id,))
+
+    def get_durations(self, video_ids: Iterable[str]) -> Dict[str, int]:
+        '''
+        Gets the stored durations of a batch of YouTube videos.
+
+        Args:
+            video_ids: The YouTube video IDs.
+
+        Returns:
+            dict: A mapping of video ID to duration in seconds for every known video.
+        '''
+        video_ids = [video_id for video_id in video_ids if video_id]
+        durations = {}
+        with self._lock:
+            for start in range(0, len(video_ids), 500):
+                batch = video_ids[start:start + 500]
+                query = f'SELECT video_id, duration FROM videos WHERE video_id IN ({",".join("?" * len(batch))})'
+                durations.update(self._connection.execute(query, batch).fetchall())
+        return durations
+
+    def put_video(self, track: Track) -> None:
+        '''
+        Stores the metadata of a resolved :class:`Track`.
+
+        Args:
+            track: The resolved track.
+        '''
+        if track.url:
+            self._write('INSERT OR REPLACE INTO videos (video_id, title, duration, thumbnail, updated_at) VALUES (?, ?, ?, ?, ?)', (track.identifier, track.title, track.duration // 1000, track.thumbnail, time.time()))
+
+    def get_local(self, path: str, mtime: float) -> Optional[Tuple[str, int]]:
+        '''
+        Gets the stored probe result of a local file.
+
+        Args:
+            path: The path to the file.
+            mtime: The modification time of the file. Results of older versions of the file are ignored.
+
+        Returns:
+            tuple: The title and duration in seconds of the file, if the file was never probed or changed since, :class:`None` is returned.
+        '''
+        return self._fetchone('SELECT title, duration FROM local_files WHERE path = ? AND mtime = ?', (path, mtime))
+
+    def put_local(self, path: str, mtime: float, title: str, duration: int) -> None:
+        '''
+        Stores the probe result of a local file.
+
+        Args:
+            path: The path to the file.
+            mtime: The modification time of the file.
+            title: The title of the file.
+            duration: The duration of the file in seconds.
+        '''
+        self._write('INSERT OR REPLACE INTO local_files (path, mtime, title, duration) VALUES (?, ?, ?, ?)', (path, mtime, title, duration))
+
+    def close(self) -> None:
+        '''Closes the database connection.'''
+        with self._lock:
+            self._connection.close()
\ No newline at end of file
@@ -1,21 +1,74 @@
-from typing import Optional, List
+import asyncio
+import copy
+import sys
+import time
+
+from array import array
+from collections.abc import Sequence
+from typing import Optional, List, Dict, Union, Iterator, Any
+from urllib.parse import urlparse, parse_qs
+
+def parse_expiry(endpoint: Optional[str]) -> Optional[float]:
+    '''
+    Parses the expiry of a signed googlevideo URL. The expiry is either stored in the ``expire`` query parameter or, for manifests, in an ``/expire/<timestamp>/`` path segment.
+
+    Args:
+        endpoint: The URL to parse.
+
+    Returns:
+        float: The UNIX timestamp at which the URL expires, if the URL has no expiry, :class:`None` is returned.
+    '''
+    if not endpoint:
+        return
+    url = urlparse(endpoint)
+    try:
+        if expire := parse_qs(url.query).get('expire'):
+            return float(expire[0])
+        segments = url.path.split('/')
+        if 'expire' in segments:
+            return float(segments[segments.index('expire') + 1])
+    except (ValueError, IndexError):
+        return
+
+WATCH_URL = 'https://www.youtube.com/watch?v='
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
 
 class Playable:
     '''An abstract base class for all playable objects.'''
-    pass
+
+    __slots__ = ()
 
 class PartialTrack(Playable):
     '''
     A track that only has a title, duration and optionally a url. This track is used to later fetch the full track.
+    Tracks created from Spotify also carry the Spotify track ID so the YouTube video they resolve to can be remembered, and the ISRC of the recording if Spotify provided one.
 
     Args:
-        data: The raw data of the track.
+        data: The raw data of the track. YouTube videos can be given by ``id`` instead of ``url``, which avoids storing the full url.
     '''
 
+    __slots__ = ('title', 'duration', 'identifier', 'spotify_id', 'isrc', '_url')
+
     def __init__(self, data: dict) -> None:
-        self.title: str = data['title']
+        url = data.get('url', None)
+        self.title: str = _intern(data['title'])
         self.duration: int = data.get('duration', 0) * 1000
-        self.url: Optional[str] = data.get('url', None)
+        self.identifier: Optional[str] = _intern(data.get('id', None) or (url[len(WATCH_URL):] if url and url.startswith(WATCH_URL) else None))
+        self.spotify_id: Optional[str] = data.get('spotify_id', None)
+        self.isrc: Optional[str] = data.get('isrc', None)
+        self._url: Optional[str] = None if self.identifier else url
+
+    @property
+    def url(self) -> Optional[str]:
+        '''
+        Gets the url of the track.
+
+        Returns:
+            str: The url of the track, if the track only has a title, :class:`None` is returned.
+        '''
+        return f'{WATCH_URL}{self.identifier}' if self.identifier else self._url
 
 class Track(Playable):
     '''
@@ -29,16 +82,63 @@ class Track(Playable):
         url: The url of the track.
         thumbnail: The thumbnail of the track.
         endpoint: The endpoint of the track.
+        resolved_at: The UNIX timestamp at which the track was resolved.
+        expires_at: The UNIX timestamp at which :attr:`endpoint` expires, if known.
+        codec: The audio codec of :attr:`endpoint`, such as ``opus``, if known.
+        container: The container of :attr:`endpoint`, such as ``webm``, if known.
+        start: The position in milliseconds at which the track starts by default, given by a ``t`` or ``start`` parameter of the url it was retrieved with.
     '''
 
+    __slots__ = ('title', 'identifier', 'duration', 'is_stream', 'thumbnail', 'endpoint', 'resolved_at', 'expires_at', 'codec', 'container', 'start')
+
     def __init__(self, data: dict) -> None:
-        self.title: str = data['title']
-        self.identifier: str = data['id']
+        self.title: str = _intern(data['title'])
+        self.identifier: str = _intern(data['id'])
         self.duration: int = data.get('duration', 0) * 1000
         self.is_stream: bool = data.get('is_live', None) if data.get('is_live', None) else False
-        self.url: Optional[str] = f'https://www.youtube.com/watch?v={self.identifier}' if self.identifier and self.identifier != '_playlisttrack' else None
         self.thumbnail: Optional[str] = data.get('thumbnail', None)
         self.endpoint: Optional[str] = data.get('url', None)
+        self.resolved_at: float = time.time()
+        self.expires_at: Optional[float] = parse_expiry(self.endpoint)
+        self.codec: Optional[str] = _intern(data.get('acodec', None))
+        self.container: Optional[str] = _intern(data.get('ext', None))
+        self.start: int = 0
+
+    @property
+    def url(self) -> Optional[str]:
+        '''
+        Gets the url of the track.
+
+        Returns:
+            str: The YouTube url of the track, if the track has no valid identifier, :class:`None` is returned.
+        '''
+        return f'{WATCH_URL}{self.identifier}' if self.identifier and self.identifier != '_playlisttrack' else None
+
+    def expires_within(self, seconds: float) -> bool:
+        '''
+        Shows whether :attr:`endpoint` expires within the given amount of seconds.
+
+        Args:
+            seconds: The amount of seconds from now.
+
+        Returns:
+            bool: Whether the endpoint expires within the given time. Endpoints without a known expiry never expire.
+        '''
+        return self.expires_at is not None and self.expires_at - time.time() <= seconds
+
+    def at(self, position: int) -> 'Track':
+        '''
+        Creates a copy of the track that starts at a later position. The track itself is not changed, since it may be shared through the track cache.
+
+        Args:
+            position: The position in milliseconds to start at.
+
+        Returns:
+            :class:`Track`: The copy.
+        '''
+        track = copy.copy(self)
+        track.start = position
+        return track
 
 class LocalTrack(Playable):
     '''
@@ -50,20 +150,117 @@ class LocalTrack(Playable):
         path: The path to the file.
     '''
 
+    __slots__ = ('title', 'duration', 'path')
+
     def __init__(self, data: dict) -> None:
-        self.title: str = data['title']
+        self.title: str = _intern(data['title'])
         self.duration: int = data.get('duration', 0) * 1000
         self.path: str = data['path']
 
+class TrackStore(Sequence):
+    '''
+    A compact list of :class:`PartialTrack` entries for large playlists. Titles, durations and video identifiers are kept in flat arrays and :class:`PartialTrack` objects are only created when an entry is accessed.
+    '''
+
+    __slots__ = ('_titles', '_durations', '_identifiers', '_spotify_ids', '_isrcs')
+
+    def __init__(self) -> None:
+        self._titles: List[str] = []
+        self._durations: array = array('L')
+        self._identifiers: List[Optional[str]] = []
+        self._spotify_ids: List[Optional[str]] = []
+        self._isrcs: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[PartialTrack, List[PartialTrack]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return PartialTrack({'title': self._titles[index], 'duration': self._durations[index], 'id': self._identifiers[index], 'spotify_id': self._spotify_ids[index], 'isrc': self._isrcs.get(index % len(self))})
+
+    def __iter__(self) -> Iterator[PartialTrack]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def duration(self, index: int) -> int:
+        '''
+        Gets the duration of an entry without creating a :class:`PartialTrack`.
+
+        Args:
+            index: The position of the entry.
+
+        Returns:
+            int: The duration of the entry in milliseconds.
+        '''
+        return self._durations[index] * 1000
+
+    def append(self, title: str, duration: int = 0, identifier: Optional[str] = None, spotify_id: Optional[str] = None, isrc: Optional[str] = None) -> None:
+        '''
+        Adds an entry to the store.
+
+        Args:
+            title: The title of the track.
+            duration: The duration of the track in seconds.
+            identifier: The YouTube video identifier of the track, if known.
+            spotify_id: The Spotify track ID the entry was created from, if any.
+            isrc: The ISRC of the recording, if known. Only stored for entries that have one.
+        '''
+        if isrc:
+            self._isrcs[len(self._titles)] = isrc
+        self._titles.append(_intern(title))
+        self._durations.append(max(0, int(duration or 0)))
+        self._identifiers.append(_intern(identifier))
+        self._spotify_ids.append(spotify_id)
+
 class Playlist:
     '''
     A playlist that contains a list of :class:`PartialTrack` objects and the name of a playlist.
 
+    Playlists retrieved with ``stream=True`` are returned after their first page. The remaining pages are loaded in the background and inserted after the previous page in every :class:`Queue` the playlist was added to. Loading stops once neither a queue nor your code references the playlist anymore.
+
     Attributes:
         title: The name of the playlist.
-        tracks: The list of :class:`PartialTrack` objects.
+        tracks: The list of :class:`PartialTrack` objects, or a :class:`TrackStore` that creates them when accessed.
+        complete: Whether all pages of the playlist are loaded.
     '''
 
+    __slots__ = ('title', 'tracks', 'complete', '_queues', '_loader', '__weakref__')
+
     def __init__(self, data: dict) -> None:
         self.title: str = data['title']
-        self.tracks: List[PartialTrack] = data['tracks']
\ No newline at end of file
+        self.tracks: Sequence[PartialTrack] = data['tracks']
+        self.complete: bool = data.get('complete', True)
+        self._queues: list = []
+        self._loader: Optional[asyncio.Task] = None
+
+    async def wait(self) -> None:
+        '''Waits until all pages of the playlist are loaded.'''
+        if self._loader and not self.complete:
+            await asyncio.shield(self._loader)
+
+    def _attach(self, queue: Any) -> None:
+        '''Registers a :class:`Queue` that receives the pages loaded after it added the playlist.'''
+        if not self.complete:
+            self._queues.append(queue)
+
+    def _detach(self, queue: Any) -> None:
+        '''Stops feeding pages to a :class:`Queue`.'''
+        if queue in self._queues:
+            self._queues.remove(queue)
+
+    def _append(self, entries: List[tuple]) -> None:
+        '''Adds a page of ``(title, duration, identifier, spotify_id, isrc)`` entries and forwards it to the attached queues, which insert it right after the previous page.'''
+        start = len(self.tracks)
+        for entry in entries:
+            self.tracks.append(*entry)
+        if self._queues and len(self.tracks) > start:
+            for queue in list(self._queues):
+                queue._feed(self, start)
+
+    def _finish(self) -> None:
+        '''Marks the playlist as completely loaded.'''
+        self.complete = True
+        for queue in self._queues:
+            queue._feeds.pop(self, None)
+        self._queues.clear()
\ No newline at end of file
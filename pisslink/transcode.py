@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import os
+
+import ffmpeg
+
+from typing import Optional, Dict
+
+from .resolver import Resolver
+
+class TranscodeCache:
+    '''
+    A size bounded on-disk cache of local files converted to Ogg/Opus. Cached files are played with ``codec='copy'`` so local tracks no longer have to be decoded to PCM and encoded to Opus on every play.
+    This class should not be created manually but is an attribute of :class:`Pool` that is shared by all players.
+
+    Files are keyed by path, size and modification time, so changed files are converted again. When the cache grows beyond :attr:`max_size`, the least recently played files are removed.
+
+    Args:
+        directory: The directory to store converted files in.
+        max_size: The maximum total size of the cache in bytes.
+        concurrency: The maximum amount of files that are converted at the same time.
+        bitrate: The Opus bitrate to convert to.
+    '''
+
+    def __init__(self, directory: str, max_size: int = 1024 ** 3, concurrency: int = 1, bitrate: str = '128k') -> None:
+        self.directory: str = directory
+        self.max_size: int = max_size
+        self.bitrate: str = bitrate
+        self.resolver: Resolver = Resolver(concurrency)
+        self._pending: Dict[str, asyncio.Future] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def _cache_path(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        digest = hashlib.sha1(f'{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}'.encode()).hexdigest()
+        return os.path.join(self.directory, f'{digest}.ogg')
+
+    def lookup(self, path: str) -> Optional[str]:
+        '''
+        Gets the converted version of a local file and marks it as recently used.
+
+        Args:
+            path: The path to the original file.
+
+        Returns:
+            str: The path to the converted file, if the file is not converted yet, :class:`None` is returned.
+        '''
+        cache_path = self._cache_path(path)
+        if not cache_path or not os.path.isfile(cache_path):
+            return
+        try:
+            os.utime(cache_path)
+        except OSError:
+            return
+        return cache_path
+
+    async def ensure(self, path: str) -> Optional[str]:
+        '''
+        Converts a local file unless it is already cached. Concurrent calls for the same file share one conversion.
+
+        Args:
+            path: The path to the original file.
+
+        Returns:
+            str: The path to the converted file, if the conversion fails, :class:`None` is returned.
+        '''
+        if cached := self.lookup(path):
+            return cached
+        try:
+            return await asyncio.shield(self.schedule(path))
+        except asyncio.CancelledError:
+            raise
+        except:
+            return
+
+    def schedule(self, path: str) -> asyncio.Future:
+        '''
+        Starts converting a local file in the background unless a conversion is already running.
+
+        Args:
+            path: The path to the original file.
+
+        Returns:
+            :class:`Future`: The running conversion, resolving to the path of the converted file, or :class:`None` if the file can no longer be read.
+        '''
+        if not (future := self._pending.get(path)):
+            future = asyncio.ensure_future(self.resolver.run(self._transcode, path))
+            self._pending[path] = future
+            future.add_done_callback(lambda _: self._pending.pop(path, None))
+            future.add_done_callback(lambda future: future.cancelled() or future.exception())
+        return future
+
+    def _transcode(self, path: str) -> Optional[str]:
+        '''Converts a file to Ogg/Opus in a worker thread and evicts old files afterwards. Files that can no longer be read are skipped and counted as failures.'''
+        if (cache_path := self._cache_path(path)) is None:
+            self.resolver.metrics.increment('transcode.failures', reason='missing')
+            return
+        temporary = f'{cache_path}.part'
+        try:
+            ffmpeg.input(path).output(temporary, format='ogg', acodec='libopus', audio_bitrate=self.bitrate, ar=48000, ac=2, vn=None).run(quiet=True, overwrite_output=True)
+            os.replace(temporary, cache_path)
+        except:
+            self.resolver.metrics.increment('transcode.failures', reason='ffmpeg')
+            raise
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._evict()
+        return cache_path
+
+    def _evict(self) -> None:
+        '''Removes the least recently used files until the cache fits in :attr:`max_size`.'''
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.ogg'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(file)
+                total -= size
+            except OSError:
+                continue
\ No newline at end of file
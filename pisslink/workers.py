@@ -0,0 +1,389 @@
+import asyncio
+import itertools
+import multiprocessing
+import threading
+import time
+import warnings
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, List, Tuple, Iterator
+from youtube_dl import YoutubeDL
+
+from .library import probe_duration
+from .resolver import Resolver, ResolverStats, FUNCTIONS
+from .metrics import MetricsCollector
+
+class Logger(object):
+    '''A base logger that outputs nothing.'''
+
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+class WorkerError(Exception):
+    '''Raised when a call in a worker process failed with an exception that could not be sent back.'''
+    pass
+
+class WorkerExited(WorkerError):
+    '''Raised when a worker process exited before it answered a call.'''
+    pass
+
+PROCESS_NAME = 'pisslink-worker'
+'''The name prefix of worker processes.'''
+
+MAX_RESTARTS = 3
+'''The amount of times in a row a worker process may exit before a :class:`WorkerShard` runs its calls on its fallback instead.'''
+
+_extractors: Dict[Tuple, YoutubeDL] = {}
+_playlists: Dict[int, Iterator[dict]] = {}
+_tokens = itertools.count()
+_lock = threading.Lock()
+
+def get_extractor(options: dict) -> YoutubeDL:
+    '''
+    Gets the :class:`YoutubeDL` instance of this process for the given options, creating it if needed.
+
+    Args:
+        options: The extractor options, without a logger.
+
+    Returns:
+        :class:`YoutubeDL`: The cached extractor.
+    '''
+    key = tuple(sorted(options.items()))
+    with _lock:
+        if not (extractor := _extractors.get(key)):
+            extractor = _extractors[key] = YoutubeDL({**options, 'logger': Logger()})
+        return extractor
+
+def extract_info(options: dict, query: str, process: bool = True) -> Optional[dict]:
+    '''
+    Extracts the info of a video or search without downloading it.
+
+    Args:
+        options: The extractor options.
+        query: The url or ``ytsearch:`` query.
+        process: Whether to resolve stream formats. Unprocessed results of playlists must be read with :func:`open_playlist` instead.
+
+    Returns:
+        dict: The extracted info.
+    '''
+    result = get_extractor(options).extract_info(query, download=False, process=process)
+    if result and not process and 'entries' in result:
+        result = {**result, 'entries': list(result['entries'])}
+    return result
+
+def open_playlist(options: dict, query: str) -> Optional[Tuple[int, str]]:
+    '''
+    Starts reading a playlist page by page. The remaining entries are kept in this process until they are read with :func:`read_playlist`.
+
+    Args:
+        options: The extractor options.
+        query: The playlist url.
+
+    Returns:
+        tuple: A token to read the entries with and the title of the playlist, if the playlist is not found, :class:`None` is returned.
+    '''
+    result = get_extractor(options).extract_info(query, download=False, process=False)
+    if not result:
+        return
+    token = next(_tokens)
+    _playlists[token] = iter(result.get('entries') or [])
+    return token, result.get('title')
+
+def read_playlist(token: int, amount: int) -> Optional[List[dict]]:
+    '''
+    Reads the next flat entries of a playlist opened with :func:`open_playlist`.
+
+    Args:
+        token: The token returned by :func:`open_playlist`.
+        amount: The maximum amount of entries to read.
+
+    Returns:
+        list: The flat entries, if the playlist is exhausted, :class:`None` is returned and the playlist is closed.
+    '''
+    if not (entries := _playlists.get(token)):
+        return
+    page = list(itertools.islice(entries, amount))
+    if not page:
+        _playlists.pop(token, None)
+        return
+    return page
+
+def close_playlist(token: int) -> None:
+    '''
+    Discards a playlist opened with :func:`open_playlist` before it was read completely.
+
+    Args:
+        token: The token returned by :func:`open_playlist`.
+    '''
+    _playlists.pop(token, None)
+
+FUNCTIONS.update({
+    'extract_info': extract_info,
+    'open_playlist': open_playlist,
+    'read_playlist': read_playlist,
+    'close_playlist': close_playlist,
+    'probe_duration': probe_duration,
+})
+
+def worker_main(connection: Any, concurrency: int) -> None:
+    '''
+    The entry point of a worker process. Calls received over :param:`connection` run on a pool of threads and their results are sent back in completion order.
+
+    Messages are ``(call_id, name, args, kwargs)`` tuples, answers are ``(call_id, ok, value)`` tuples. Any duplex connection with ``send`` and ``recv``, such as a pipe or a local socket, can be used. ``None`` shuts the worker down.
+
+    Args:
+        connection: The connection to the parent process.
+        concurrency: The maximum amount of calls that run at the same time.
+    '''
+    executor = ThreadPoolExecutor(concurrency, thread_name_prefix='pisslink-worker')
+    send_lock = threading.Lock()
+
+    def handle(call_id: int, name: str, args: tuple, kwargs: dict) -> None:
+        try:
+            answer = (call_id, True, FUNCTIONS[name](*args, **kwargs))
+        except Exception as error:
+            answer = (call_id, False, error)
+        with send_lock:
+            try:
+                connection.send(answer)
+            except Exception as error:
+                connection.send((call_id, False, WorkerError(f'{type(error).__name__}: {error}')))
+
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        executor.submit(handle, *message)
+    executor.shutdown(wait=True)
+
+class WorkerShard:
+    '''
+    A worker process that runs extractor calls for the guilds placed on it, so extractor parsing of different shards no longer competes for one GIL.
+    This class should not be created manually but is created by :class:`Pool` when worker processes are enabled.
+
+    The process is started on the first call and started again if it exits. Worker processes are spawned, so they import the main module of the bot again: the bot must only be started under an ``if __name__ == '__main__':`` guard. If the process keeps exiting, for example because that guard is missing, calls run on :param:`fallback` instead.
+
+    Args:
+        concurrency: The maximum amount of calls that run at the same time in the worker process.
+        fallback: The :class:`Resolver` that runs calls in worker threads once the process failed to start :data:`MAX_RESTARTS` times in a row. If not given, calls raise :class:`WorkerError` instead.
+
+    Raises:
+        RuntimeError: If the shard is created inside a worker process, which happens when the main module starts the bot without a ``__main__`` guard.
+    '''
+
+    def __init__(self, concurrency: int = 4, fallback: Optional[Resolver] = None) -> None:
+        if multiprocessing.current_process().name.startswith(PROCESS_NAME):
+            raise RuntimeError('Worker processes import the main module again. Start the bot under an if __name__ == \'__main__\': guard.')
+        self.concurrency: int = max(1, concurrency)
+        self.fallback: Optional[Resolver] = fallback
+        self.stats: ResolverStats = ResolverStats()
+        self.metrics: MetricsCollector = MetricsCollector()
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.restarts: int = 0
+        self._connection: Optional[Any] = None
+        self._generation: int = 0
+        self._failures: int = 0
+        self._warned: bool = False
+        self._ids = itertools.count()
+        self._futures: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future, float, int]] = {}
+        self._send_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._spawning: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = None
+
+    @property
+    def active(self) -> int:
+        '''
+        Gets the amount of calls sent to the worker that did not finish yet.
+
+        Returns:
+            int: The amount of unfinished calls.
+        '''
+        return len(self._futures) + (self.fallback.active if self.failed else 0)
+
+    @property
+    def pending(self) -> int:
+        '''
+        Gets the amount of calls waiting for a free thread in the worker process.
+
+        Returns:
+            int: The amount of waiting calls.
+        '''
+        return max(0, len(self._futures) - self.concurrency) + (self.fallback.pending if self.failed else 0)
+
+    @property
+    def failed(self) -> bool:
+        '''
+        Gets whether the process failed to start too often and calls run on :attr:`fallback`.
+
+        Returns:
+            bool: Whether the worker process is given up on.
+        '''
+        return self._failures >= MAX_RESTARTS
+
+    def _running(self) -> Optional[Tuple[Any, int]]:
+        '''Gets the connection to the worker process and its generation if the process is running. This method should not be called directly.'''
+        if self.process is not None and self.process.is_alive() and self._connection is not None:
+            return self._connection, self._generation
+
+    async def _ensure(self) -> Tuple[Any, int]:
+        '''
+        Starts the worker process unless it is running. Spawning blocks until the child interpreter started, so it runs in a thread and concurrent callers wait for the same start. This method should not be called directly.
+
+        Returns:
+            tuple: The connection to the running process and its generation, which identifies the calls sent to it.
+        '''
+        if running := self._running():
+            return running
+        loop = asyncio.get_running_loop()
+        if self._spawning is None or self._spawning[0] is not loop:
+            self._spawning = (loop, asyncio.Lock())
+        async with self._spawning[1]:
+            return await loop.run_in_executor(None, self._start)
+
+    def _start(self) -> Tuple[Any, int]:
+        '''Starts a new worker process unless one is running. This method runs in a thread and should not be called directly.'''
+        with self._start_lock:
+            if running := self._running():
+                return running
+            self._stop(self._generation)
+            if self._generation:
+                self.restarts += 1
+                self.metrics.increment('worker.restarts')
+            self._generation += 1
+            context = multiprocessing.get_context('spawn')
+            connection, child = context.Pipe()
+            process = context.Process(target=worker_main, args=(child, self.concurrency), name=f'{PROCESS_NAME}-{self._generation}', daemon=True)
+            process.start()
+            child.close()
+            self.process, self._connection = process, connection
+            threading.Thread(target=self._read, args=(connection, process, self._generation), name='pisslink-shard-reader', daemon=True).start()
+            return connection, self._generation
+
+    async def call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        '''
+        Runs one of the worker functions in the worker process. Calls interrupted because the process exited are sent once more to a new process.
+
+        Args:
+            name: The name of the registered function.
+            *args: The positional arguments to pass to the function.
+            **kwargs: The keyword arguments to pass to the function.
+
+        Returns:
+            The return value of the function.
+
+        Raises:
+            WorkerError: If the call failed in a way that could not be sent back, or the process exited and no :attr:`fallback` is set.
+        '''
+        for attempt in range(2):
+            if self.failed:
+                if not self.fallback:
+                    raise WorkerError('The worker process failed to start.')
+                if not self._warned:
+                    self._warned = True
+                    warnings.warn(f'The worker process exited {MAX_RESTARTS} times in a row, calls now run in worker threads. Make sure the bot is started under an if __name__ == \'__main__\': guard.', RuntimeWarning)
+                self.metrics.increment('worker.fallbacks', function=name)
+                return await self.fallback.call(name, *args, **kwargs)
+            try:
+                return await self._send(name, args, kwargs)
+            except WorkerExited:
+                if attempt:
+                    raise
+
+    async def _send(self, name: str, args: tuple, kwargs: dict) -> Any:
+        '''Sends one call to the worker process and waits for its answer. This method should not be called directly.'''
+        connection, generation = await self._ensure()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        call_id = next(self._ids)
+        started = time.perf_counter()
+        self._futures[call_id] = (loop, future, started, generation)
+        self.stats.submitted += 1
+        try:
+            with self._send_lock:
+                connection.send((call_id, name, args, kwargs))
+        except (EOFError, OSError):
+            self._futures.pop(call_id, None)
+            self.stats.failed += 1
+            raise WorkerExited('The worker process exited.')
+        except Exception:
+            self._futures.pop(call_id, None)
+            self.stats.failed += 1
+            raise
+        try:
+            return await future
+        finally:
+            self.metrics.observe('worker.call', time.perf_counter() - started, function=name)
+
+    def _read(self, connection: Any, process: multiprocessing.process.BaseProcess, generation: int) -> None:
+        '''Receives answers from one worker process and completes the matching futures. Once the process exits, its unfinished calls fail with :class:`WorkerExited`. This method runs in its own thread.'''
+        answered = False
+        while True:
+            try:
+                call_id, ok, value = connection.recv()
+            except (EOFError, OSError):
+                break
+            if not answered:
+                answered, self._failures = True, 0
+            if not (pending := self._futures.pop(call_id, None)):
+                continue
+            loop, future, started, _ = pending
+            elapsed = time.perf_counter() - started
+            self.stats.execution += elapsed
+            self.stats.max_execution = max(self.stats.max_execution, elapsed)
+            if ok:
+                self.stats.completed += 1
+            else:
+                self.stats.failed += 1
+            loop.call_soon_threadsafe(self._complete, future, ok, value)
+        with self._start_lock:
+            current = self.process is process
+            self._stop(generation)
+            if current and not answered:
+                self._failures += 1
+        for call_id in [call_id for call_id, pending in list(self._futures.items()) if pending[3] == generation]:
+            if pending := self._futures.pop(call_id, None):
+                loop, future, _, _ = pending
+                self.stats.failed += 1
+                loop.call_soon_threadsafe(self._complete, future, False, WorkerExited('The worker process exited.'))
+
+    def _stop(self, generation: int) -> None:
+        '''Forgets the current process so the next call starts a new one. The caller must hold the start lock. This method should not be called directly.'''
+        if self._generation != generation or self.process is None:
+            return
+        if self._connection is not None:
+            self._connection.close()
+        self.process.join(timeout=0)
+        self.process, self._connection = None, None
+
+    @staticmethod
+    def _complete(future: asyncio.Future, ok: bool, value: Any) -> None:
+        if future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def shutdown(self) -> None:
+        '''Stops the worker process after the calls it already received are finished.'''
+        with self._start_lock:
+            process, connection = self.process, self._connection
+            self.process, self._connection = None, None
+        if process is None:
+            return
+        try:
+            with self._send_lock:
+                connection.send(None)
+        except Exception:
+            pass
+        process.join(timeout=5)
+        connection.close()
\ No newline at end of file
@@ -0,0 +1,33 @@
+import asyncio
+import os
+import sys
+import time
+
+import discord
+import pytest
+
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import fakes
+import pisslink.workers
+
+@pytest.fixture
+def youtube(monkeypatch: pytest.MonkeyPatch) -> type:
+    '''Replaces the extractor and the FFmpeg sources with the fakes of the offline benchmarks. Calls do not sleep and never fail unless a test configures it.'''
+    monkeypatch.setattr(fakes.FakeYoutubeDL, 'latency', 0)
+    monkeypatch.setattr(fakes.FakeYoutubeDL, 'failure_rate', 0.0)
+    monkeypatch.setattr(fakes.FakeYoutubeDL, 'calls', fakes.Counter())
+    monkeypatch.setattr(pisslink.workers, 'YoutubeDL', fakes.FakeYoutubeDL)
+    monkeypatch.setattr(pisslink.workers, '_extractors', {})
+    monkeypatch.setattr(discord, 'FFmpegOpusAudio', fakes.FakeSource)
+    monkeypatch.setattr(discord, 'FFmpegPCMAudio', fakes.FakeSource)
+    return fakes.FakeYoutubeDL
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 2) -> None:
+    '''Waits until :param:`condition` holds, failing the test after :param:`timeout` seconds.'''
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, 'timed out'
+        await asyncio.sleep(0.005)
\ No newline at end of file
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import fakes
+import offline
+import pytest
+
+@pytest.fixture
+def benchmark(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    '''Restores the fake extractor settings that :func:`fakes.install` changes.'''
+    monkeypatch.setattr(fakes.FakeYoutubeDL, 'playlist_size', fakes.FakeYoutubeDL.playlist_size)
+    monkeypatch.setattr(fakes.FakeYoutubeDL, 'seed', fakes.FakeYoutubeDL.seed)
+
+@pytest.mark.parametrize('scenario', list(offline.SCENARIOS))
+def test_scenarios_run_offline(scenario: str, benchmark: None, capsys: pytest.CaptureFixture) -> None:
+    options = offline.create_parser().parse_args([scenario, '--guilds', '3', '--tracks', '20', '--plays', '2', '--latency', '0', '--spotify-latency', '0', '--track-length', '0.02', '--timeout', '10'])
+    asyncio.run(offline.run(scenario, options))
+    output = capsys.readouterr().out
+    assert output.startswith(scenario)
+    assert 'memory per guild' in output and 'event loop stalled' in output
+
+def test_playback_plays_every_track(benchmark: None, capsys: pytest.CaptureFixture) -> None:
+    options = offline.create_parser().parse_args(['playback', '--guilds', '2', '--plays', '3', '--latency', '0', '--track-length', '0.02', '--timeout', '10', '--no-memory'])
+    asyncio.run(offline.run('playback', options))
+    assert 'tracks played: 6' in capsys.readouterr().out
+
+def test_the_script_runs_from_any_directory(tmp_path) -> None:
+    script = os.path.abspath(offline.__file__)
+    environment = {key: value for key, value in os.environ.items() if key != 'PYTHONPATH'}
+    result = subprocess.run([sys.executable, script, 'search', '--guilds', '1', '--tracks', '5', '--latency', '0', '--no-memory'], cwd=tmp_path, env=environment, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith('search')
\ No newline at end of file
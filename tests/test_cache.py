@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import fakes
+import pytest
+
+from pisslink import Pool
+from pisslink.cache import TrackCache
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class Expiring:
+
+    def __init__(self, expires_at: float) -> None:
+        self.expires_at = expires_at
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, 'monotonic', clock)
+    return clock
+
+def test_least_recently_used_entries_are_evicted(clock: Clock) -> None:
+    cache = TrackCache(max_size=2)
+    cache.put('a', 'key:a')
+    cache.put('b', 'key:b')
+    assert cache.get('key:a') == 'a'
+    cache.put('c', 'key:c')
+    assert 'key:b' not in cache
+    assert cache.get('key:a') == 'a' and cache.get('key:c') == 'c'
+    assert cache.stats.evictions == 1
+
+def test_entries_expire_after_the_ttl(clock: Clock) -> None:
+    cache = TrackCache(ttl=60)
+    cache.put('a', 'key:a')
+    clock.now += 59
+    assert cache.get('key:a') == 'a'
+    clock.now += 1
+    assert cache.get('key:a') is None
+    assert len(cache) == 0
+    assert cache.stats.expirations == 1 and cache.stats.misses == 1
+
+def test_entries_never_outlive_their_stream(clock: Clock) -> None:
+    cache = TrackCache(ttl=3600)
+    cache.put(Expiring(time.time() + 10), 'key:a')
+    clock.now += 11
+    assert cache.get('key:a') is None
+    cache.put(Expiring(time.time() - 1), 'key:b')
+    assert 'key:b' not in cache
+
+def test_one_value_is_stored_under_every_key(clock: Clock) -> None:
+    cache = TrackCache()
+    cache.put('a', 'query:a', 'youtube:a', None)
+    assert cache.get('query:a') == cache.get('youtube:a') == 'a'
+    cache.invalidate('query:a')
+    assert cache.get('query:a') is None and cache.get('youtube:a') == 'a'
+
+def test_size_zero_disables_caching() -> None:
+    cache = TrackCache(max_size=0)
+    cache.put('a', 'key:a')
+    assert len(cache) == 0
+
+def test_players_share_the_pool_cache(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+        first = await pool.get_player(fakes.FakeGuild(1)).get_tracks(url)
+        second = await pool.get_player(fakes.FakeGuild(2)).get_tracks(url)
+        assert first is second
+        assert youtube.calls.get('video') == 1
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,67 @@
+import asyncio
+
+import fakes
+import pytest
+
+from pisslink import Pool
+from pisslink.resolver import Resolver
+
+def test_identical_resolutions_share_one_call() -> None:
+    calls = []
+
+    async def resolve(value: str) -> str:
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value.upper()
+
+    async def main() -> None:
+        resolver = Resolver(1)
+        results = await asyncio.gather(*[resolver.coalesce('key', resolve, 'a') for _ in range(5)])
+        assert results == ['A'] * 5
+        assert calls == ['a']
+        assert resolver.stats.coalesced == 4
+        assert await resolver.coalesce('key', resolve, 'b') == 'B'
+        assert await resolver.coalesce(None, resolve, 'c') == 'C'
+        assert calls == ['a', 'b', 'c']
+
+    asyncio.run(main())
+
+def test_failures_reach_every_waiter() -> None:
+    async def resolve() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError('broken')
+
+    async def main() -> None:
+        resolver = Resolver(1)
+        results = await asyncio.gather(*[resolver.coalesce('key', resolve) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert not resolver._inflight
+
+    asyncio.run(main())
+
+def test_cancelled_waiter_does_not_cancel_the_resolution() -> None:
+    async def resolve() -> str:
+        await asyncio.sleep(0.02)
+        return 'done'
+
+    async def main() -> None:
+        resolver = Resolver(1)
+        first = asyncio.ensure_future(resolver.coalesce('key', resolve))
+        second = asyncio.ensure_future(resolver.coalesce('key', resolve))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 'done'
+
+    asyncio.run(main())
+
+def test_concurrent_get_tracks_extract_once(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(youtube, 'latency', 0.02)
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        players = [pool.get_player(fakes.FakeGuild(index)) for index in range(4)]
+        results = await asyncio.gather(*[player.get_tracks('never gonna give you up') for player in players])
+        assert all(result is results[0] for result in results)
+        assert youtube.calls.get('search') == 1
+
+    asyncio.run(main())
\ No newline at end of file
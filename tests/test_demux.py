@@ -0,0 +1,111 @@
+import asyncio
+import io
+
+import discord
+import fakes
+import pytest
+
+from pisslink import Pool, Track
+from pisslink.demux import OGG_PAGE, DemuxError, OpusReaderSource, ogg_packets, webm_packets, _block_frames
+
+def element(identifier: int, data: bytes) -> bytes:
+    return identifier.to_bytes((identifier.bit_length() + 7) // 8, 'big') + b'\x01' + len(data).to_bytes(7, 'big') + data
+
+def uint(identifier: int, value: int) -> bytes:
+    return element(identifier, value.to_bytes(4, 'big'))
+
+def simple_block(timecode: int, frame: bytes) -> bytes:
+    return element(0xA3, b'\x81' + timecode.to_bytes(2, 'big', signed=True) + b'\x80' + frame)
+
+def packet(position: int) -> bytes:
+    return f'frame {position}'.encode()
+
+def webm(clusters: int = 3, frames: int = 50, cues: bool = True) -> bytes:
+    '''Builds a WebM file with one Opus track, clusters of one second and optionally a cue index before the first cluster.'''
+    info = element(0x1549A966, uint(0x2AD7B1, 1000000))
+    tracks = element(0x1654AE6B, element(0xAE, uint(0xD7, 2) + element(0x86, b'V_VP9')) + element(0xAE, uint(0xD7, 1) + element(0x86, b'A_OPUS')))
+    bodies = [element(0x1F43B675, uint(0xE7, index * 1000) + b''.join(simple_block(frame * 20, packet(index * 1000 + frame * 20)) for frame in range(frames))) for index in range(clusters)]
+    index = b''
+    if cues:
+        size = len(element(0x1C53BB6B, b''.join(element(0xBB, uint(0xB3, 0) + element(0xB7, uint(0xF1, 0))) for _ in bodies)))
+        offset = len(info) + len(tracks) + size
+        points = []
+        for number, body in enumerate(bodies):
+            points.append(element(0xBB, uint(0xB3, number * 1000) + element(0xB7, uint(0xF1, offset))))
+            offset += len(body)
+        index = element(0x1C53BB6B, b''.join(points))
+    return element(0x1A45DFA3, b'') + element(0x18538067, info + tracks + index + b''.join(bodies))
+
+def ogg(frames: int = 100, pre_skip: int = 312) -> bytes:
+    '''Builds an Ogg Opus file with one packet per page.'''
+    def page(granule: int, data: bytes) -> bytes:
+        lacing = bytes([255] * (len(data) // 255) + [len(data) % 255])
+        return OGG_PAGE.pack(b'OggS', 0, 0, granule, 1, 0, 0, len(lacing)) + lacing + data
+
+    head = b'OpusHead' + bytes([1, 2]) + pre_skip.to_bytes(2, 'little') + bytes(7)
+    return page(0, head) + page(0, b'OpusTags' + bytes(300)) + b''.join(page(pre_skip + (frame + 1) * 960, packet(frame * 20)) for frame in range(frames))
+
+class Seekable(io.BytesIO):
+
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data)
+        self.seeks = []
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self.seeks.append(offset)
+        return super().seek(offset, whence)
+
+def test_webm_packets_of_the_opus_track_are_read_in_order() -> None:
+    packets = list(webm_packets(io.BufferedReader(io.BytesIO(webm()))))
+    assert packets == [packet(position) for position in range(0, 3000, 20)]
+
+def test_webm_offsets_jump_to_the_indexed_cluster() -> None:
+    raw = Seekable(webm())
+    packets = list(webm_packets(io.BufferedReader(raw, 256), 2050))
+    assert packets[0] == packet(2040) and len(packets) == 48
+    assert raw.seeks
+    assert list(webm_packets(io.BufferedReader(io.BytesIO(webm(cues=False))), 2050))[0] == packet(2040)
+
+def test_laced_blocks_are_split_into_frames() -> None:
+    frames = [b'a' * 300, b'b' * 10, b'c' * 20]
+    xiph = b'\x81\x00\x00\x02' + b'\x02' + bytes([255, 45, 10]) + b''.join(frames)
+    ebml = b'\x81\x00\x00\x06' + b'\x02' + b'\x41\x2c' + b'\x5e\xdd' + b''.join(frames)
+    fixed = b'\x81\x00\x00\x04' + b'\x02' + b'x' * 30
+    assert _block_frames(xiph, 1) == _block_frames(ebml, 1) == frames
+    assert _block_frames(fixed, 1) == [b'x' * 10] * 3
+    assert _block_frames(xiph, 2) == []
+
+def test_ogg_headers_are_skipped_and_offsets_use_granules() -> None:
+    assert list(ogg_packets(io.BufferedReader(io.BytesIO(ogg())))) == [packet(position) for position in range(0, 2000, 20)]
+    assert list(ogg_packets(io.BufferedReader(io.BytesIO(ogg())), 1000))[0] == packet(1000)
+
+def test_other_formats_are_rejected() -> None:
+    with pytest.raises(DemuxError):
+        list(webm_packets(io.BufferedReader(io.BytesIO(b'RIFF' + bytes(100)))))
+    with pytest.raises(DemuxError):
+        list(ogg_packets(io.BufferedReader(io.BytesIO(b'OggX' + bytes(100)))))
+
+def test_sources_guess_the_container_and_fall_back_to_ffmpeg(tmp_path, youtube: type) -> None:
+    (tmp_path / 'a.ogg').write_bytes(ogg(frames=3))
+    (tmp_path / 'a.webm').write_bytes(webm(clusters=1, frames=3))
+    (tmp_path / 'a.mp3').write_bytes(b'ID3' + bytes(100))
+    for name in ('a.ogg', 'a.webm'):
+        source = OpusReaderSource(str(tmp_path / name))
+        assert [source.read() for _ in range(4)] == [packet(0), packet(20), packet(40), b'']
+        source.cleanup()
+    source = OpusReaderSource(str(tmp_path / 'a.mp3'))
+    assert source.read() == b'' and isinstance(source._fallback, fakes.FakeSource)
+    source.cleanup()
+    assert source._fallback.cleaned_up
+
+def test_players_demux_opus_streams_when_enabled(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), demux_opus=True)
+        player = pool.get_player(fakes.FakeGuild(1))
+        track = await player.get_tracks('https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        assert isinstance(player._open_stream(track), OpusReaderSource)
+        assert OpusReaderSource.supports('opus', 'webm') and not OpusReaderSource.supports('mp4a.40.2', 'm4a')
+        player.demux_opus = False
+        assert isinstance(player._open_stream(track), fakes.FakeSource)
+
+    asyncio.run(main())
\ No newline at end of file
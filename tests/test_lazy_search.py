@@ -0,0 +1,57 @@
+import asyncio
+
+import fakes
+import pytest
+
+from pisslink import Pool, Track, PartialTrack
+from pisslink.query import parse_query
+
+def test_lazy_searches_skip_the_full_extraction(youtube: type) -> None:
+    async def main() -> None:
+        player = Pool(fakes.FakeClient(), lazy_search=True).get_player(fakes.FakeGuild(1))
+        track = await player.get_tracks('never gonna give you up')
+        assert isinstance(track, PartialTrack) and track.identifier
+        assert track.title == 'never gonna give you up' and track.duration > 0
+        assert await player.get_tracks('Never  Gonna Give You Up') is track
+        assert youtube.calls.get('search') == youtube.calls.get('flat') == 1
+
+    asyncio.run(main())
+
+def test_lazy_results_resolve_by_video_id_when_converted(youtube: type) -> None:
+    async def main() -> None:
+        player = Pool(fakes.FakeClient(), lazy_search=True, track_conversion_interval=0).get_player(fakes.FakeGuild(1))
+        partial = await player.get_tracks('never gonna give you up')
+        player.queue.add(partial)
+        await player._start_conversion(partial)
+        track = player.queue.next_track
+        assert isinstance(track, Track) and track.identifier == partial.identifier
+        assert youtube.calls.get('search') == 1 and youtube.calls.get('video') == 1
+
+    asyncio.run(main())
+
+def test_lazy_searches_return_resolved_videos_from_the_cache(youtube: type) -> None:
+    async def main() -> None:
+        player = Pool(fakes.FakeClient(), lazy_search=True).get_player(fakes.FakeGuild(1))
+        partial = await player.get_tracks('never gonna give you up')
+        track = await player.get_tracks(partial.url)
+        player.cache.invalidate(parse_query('never gonna give you up').key)
+        assert await player.get_tracks('never gonna give you up') is track
+
+    asyncio.run(main())
+
+def test_full_searches_return_tracks(youtube: type) -> None:
+    async def main() -> None:
+        player = Pool(fakes.FakeClient()).get_player(fakes.FakeGuild(1))
+        assert isinstance(await player.get_tracks('never gonna give you up'), Track)
+        assert youtube.calls.get('flat') == 0
+
+    asyncio.run(main())
+
+def test_failed_lazy_searches_find_nothing(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(youtube, 'failure_rate', 1.0)
+
+    async def main() -> None:
+        player = Pool(fakes.FakeClient(), lazy_search=True).get_player(fakes.FakeGuild(1))
+        assert await player.get_tracks('never gonna give you up') is None
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,111 @@
+import asyncio
+import os
+
+import pytest
+
+import pisslink.library
+
+from pisslink import MetadataStore
+from pisslink.library import LocalLibrary, local_title
+
+class Prober:
+    '''Replaces the FFmpeg probe, reporting the size of a file as its duration.'''
+
+    def __init__(self) -> None:
+        self.probed = []
+
+    def __call__(self, path: str) -> int:
+        self.probed.append(path)
+        if path.endswith('broken.mp3'):
+            raise RuntimeError('invalid data')
+        return os.path.getsize(path)
+
+@pytest.fixture
+def prober(monkeypatch: pytest.MonkeyPatch) -> Prober:
+    prober = Prober()
+    monkeypatch.setattr(pisslink.library, 'probe_duration', prober)
+    return prober
+
+def write(path, data: bytes = b'audio') -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+def test_titles_are_built_from_file_names() -> None:
+    assert local_title('/music/Never_Gonna_Give_You_Up - Rick Astley.mp3') == 'Never Gonna Give You Up'
+    assert local_title('song.flac') == 'song'
+
+def test_scans_only_probe_changed_files(tmp_path, prober: Prober) -> None:
+    async def main() -> None:
+        library = LocalLibrary()
+        first = write(tmp_path / 'First Song.mp3')
+        second = write(tmp_path / 'nested' / 'Second Song.ogg')
+        write(tmp_path / 'cover.jpg')
+        result = await library.scan(str(tmp_path))
+        assert (result.added, result.updated, result.removed, result.unchanged) == (2, 0, 0, 0)
+        assert library.get(second).title == 'Second Song'
+        write(tmp_path / 'First Song.mp3', b'remastered')
+        os.utime(first, (0, 0))
+        os.remove(second)
+        result = await library.scan(str(tmp_path))
+        assert (result.added, result.updated, result.removed, result.unchanged) == (0, 1, 1, 0)
+        assert library.get(first).duration == len(b'remastered') * 1000
+        assert library.get(second) is None
+        assert len(prober.probed) == 3
+
+    asyncio.run(main())
+
+def test_non_recursive_scans_skip_subdirectories(tmp_path, prober: Prober) -> None:
+    async def main() -> None:
+        library = LocalLibrary()
+        write(tmp_path / 'top.mp3')
+        write(tmp_path / 'nested' / 'deep.mp3')
+        result = await library.scan(str(tmp_path), recursive=False)
+        assert result.added == 1 and len(library) == 1
+
+    asyncio.run(main())
+
+def test_files_that_fail_to_probe_are_not_indexed(tmp_path, prober: Prober) -> None:
+    async def main() -> None:
+        library = LocalLibrary()
+        write(tmp_path / 'broken.mp3')
+        write(tmp_path / 'fine.mp3')
+        result = await library.scan(str(tmp_path))
+        assert result.added == 1 and result.failed == 1
+        assert [track.title for track in library.tracks] == ['fine']
+
+    asyncio.run(main())
+
+def test_changed_files_are_not_returned_until_rescanned(tmp_path, prober: Prober) -> None:
+    async def main() -> None:
+        library = LocalLibrary()
+        path = write(tmp_path / 'song.mp3')
+        await library.scan(str(tmp_path))
+        os.utime(path, (0, 0))
+        assert library.get(path) is None
+
+    asyncio.run(main())
+
+def test_search_matches_every_word_and_ranks_prefixes_first(tmp_path, prober: Prober) -> None:
+    async def main() -> None:
+        library = LocalLibrary()
+        for name in ('Blue Monday', 'Love Will Tear Us Apart', 'Monday Blues Extended', 'Blue Monday 88'):
+            write(tmp_path / f'{name}.mp3')
+        await library.scan(str(tmp_path))
+        assert [track.title for track in library.search('blue MONDAY')] == ['Blue Monday', 'Blue Monday 88', 'Monday Blues Extended']
+        assert [track.title for track in library.search('monday', limit=1)] == ['Monday Blues Extended']
+        assert library.search('   ') == []
+
+    asyncio.run(main())
+
+def test_probe_results_are_reused_from_the_store(tmp_path, prober: Prober) -> None:
+    async def main() -> None:
+        store = MetadataStore(':memory:')
+        write(tmp_path / 'music' / 'song.mp3')
+        await LocalLibrary(store=store).scan(str(tmp_path / 'music'))
+        library = LocalLibrary(store=store)
+        result = await library.scan(str(tmp_path / 'music'))
+        assert result.added == 1 and len(prober.probed) == 1
+        assert library.tracks[0].title == 'song'
+
+    asyncio.run(main())
\ No newline at end of file
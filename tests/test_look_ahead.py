@@ -0,0 +1,52 @@
+import asyncio
+
+import fakes
+
+from conftest import wait_until
+from pisslink import Pool, Track, PartialTrack
+
+async def connected_player(pool: Pool, track_length: float = 0.2):
+    guild = fakes.FakeGuild(1)
+    player = pool.get_player(guild)
+    await player.connect(fakes.FakeChannel(guild, track_length))
+    return player
+
+def test_next_track_is_resolved_while_playing(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        player = await connected_player(pool)
+        player.queue.add(await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x3'))
+        await player.advance()
+        assert isinstance(player.current, Track)
+        await wait_until(lambda: isinstance(player.queue.next_track, Track))
+        assert player._preloaded is None
+        assert isinstance(list(player.queue)[1], PartialTrack)
+
+    asyncio.run(main())
+
+def test_preloaded_source_starts_the_next_track(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, preload_sources=True)
+        player = await connected_player(pool, 0.05)
+        player.queue.add(await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x2'))
+        await player.advance()
+        await wait_until(lambda: player._preloaded is not None)
+        upcoming = player.queue.next_track
+        assert player._preloaded[0] is upcoming
+        await wait_until(lambda: player.current is upcoming)
+        assert pool.metrics.snapshot()['counters']['player.preloaded_sources{guild=1}'] == 1
+
+    asyncio.run(main())
+
+def test_nothing_is_preloaded_while_looping(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, preload_sources=True)
+        player = await connected_player(pool)
+        player.queue.add(await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x2'))
+        await player.advance()
+        player.loop = True
+        await wait_until(lambda: isinstance(player.queue.next_track, Track))
+        await asyncio.sleep(0.01)
+        assert player._preloaded is None
+
+    asyncio.run(main())
\ No newline at end of file
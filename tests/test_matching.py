@@ -0,0 +1,93 @@
+import asyncio
+
+from typing import Any, List, Dict
+
+from pisslink import MetadataStore, PartialTrack
+from pisslink.matching import SpotifyMatcher, normalize, score_candidate
+from pisslink.resolver import Resolver
+
+class Search:
+    '''Replaces the extractor, answering flat searches with fixed candidates per query.'''
+
+    def __init__(self, results: Dict[str, List[dict]], delay: float = 0) -> None:
+        self.results = results
+        self.delay = delay
+        self.queries = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, name: str, query: str, process: bool = True) -> Any:
+        assert name == 'extract_info' and not process
+        self.queries.append(query)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return {'entries': self.results.get(query.split(':', 1)[1], [])}
+
+def spotify_track(spotify_id: str = 'sp1', isrc: Any = None) -> PartialTrack:
+    return PartialTrack({'title': 'Daft Punk - One More Time', 'duration': 320, 'spotify_id': spotify_id, 'isrc': isrc})
+
+CANDIDATES = [
+    {'id': 'live', 'title': 'Daft Punk - One More Time (Live)', 'duration': 410},
+    {'id': 'topic', 'title': 'One More Time', 'uploader': 'Daft Punk - Topic', 'duration': 321},
+    {'id': 'cover', 'title': 'One More Time cover', 'duration': 318},
+]
+
+def test_titles_are_compared_without_noise() -> None:
+    assert normalize('Daft Punk - One More Time (Official Video) [HD]') == 'daft punk one more time'
+
+def test_the_recording_outscores_other_versions() -> None:
+    scores = {candidate['id']: score_candidate(candidate, 'Daft Punk - One More Time', 320) for candidate in CANDIDATES}
+    assert max(scores, key=scores.get) == 'topic'
+    assert score_candidate({'id': 'x', 'title': 'upload', 'description': 'ISRC GBDUW0000059'}, 'Daft Punk - One More Time', 320, 'GBDUW0000059') > scores['topic']
+
+def test_matches_are_searched_once_and_stored() -> None:
+    async def main() -> None:
+        store = MetadataStore(':memory:')
+        search = Search({'Daft Punk - One More Time': CANDIDATES})
+        matcher = SpotifyMatcher(store, Resolver(2))
+        assert await matcher.match(spotify_track(), search) == 'topic'
+        assert await matcher.match(spotify_track(), search) == 'topic'
+        assert len(search.queries) == 1 and search.queries[0].startswith('ytsearch5:')
+        assert store.get_spotify_video('sp1') == 'topic'
+        assert await SpotifyMatcher(store, Resolver(2)).lookup(['sp1', 'sp2']) == {'sp1': 'topic'}
+
+    asyncio.run(main())
+
+def test_concurrent_matches_share_one_search() -> None:
+    async def main() -> None:
+        search = Search({'Daft Punk - One More Time': CANDIDATES}, delay=0.02)
+        matcher = SpotifyMatcher(resolver=Resolver(2))
+        assert await asyncio.gather(*[matcher.match(spotify_track(), search) for _ in range(5)]) == ['topic'] * 5
+        assert len(search.queries) == 1
+
+    asyncio.run(main())
+
+def test_the_isrc_is_searched_when_no_candidate_convinces() -> None:
+    async def main() -> None:
+        search = Search({'Daft Punk - One More Time': [{'id': 'wrong', 'title': 'Something Else', 'duration': 100}], '"GBDUW0000059"': [{'id': 'isrc', 'title': 'One More Time', 'duration': 320}]})
+        matcher = SpotifyMatcher(resolver=Resolver(2))
+        assert await matcher.match(spotify_track(isrc='GBDUW0000059'), search) == 'isrc'
+        assert len(search.queries) == 2
+
+    asyncio.run(main())
+
+def test_batches_fill_in_identifiers_with_bounded_searches() -> None:
+    async def main() -> None:
+        search = Search({'Daft Punk - One More Time': CANDIDATES}, delay=0.01)
+        matcher = SpotifyMatcher(resolver=Resolver(4), concurrency=2)
+        matcher.remember('known', 'cached')
+        tracks = [spotify_track(f'sp{index}') for index in range(6)] + [spotify_track('known'), PartialTrack({'title': 'no spotify id'})]
+        assert await matcher.match_many(tracks, search) == 7
+        assert [track.identifier for track in tracks] == ['topic'] * 6 + ['cached', None]
+        assert len(search.queries) == 6 and search.peak == 2
+        assert await matcher.match_many(tracks, search) == 0
+
+    asyncio.run(main())
+
+def test_only_recent_matches_are_remembered() -> None:
+    matcher = SpotifyMatcher(memo_size=2)
+    for index in range(3):
+        matcher.remember(f'sp{index}', f'video{index}')
+    assert matcher.recall('sp0') is None and matcher.recall('sp2') == 'video2'
\ No newline at end of file
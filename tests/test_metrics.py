@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import fakes
+
+from typing import Any
+
+from pisslink import Pool, MetricsCollector, InMemoryMetrics, Histogram
+
+def test_histograms_summarize_without_keeping_values() -> None:
+    histogram = Histogram()
+    for value in [0.001 * index for index in range(1, 101)]:
+        histogram.add(value)
+    summary = histogram.summary()
+    assert summary['count'] == 100 and summary['min'] == 0.001 and summary['max'] == 0.1
+    assert 0.05 <= summary['p50'] <= 0.064 and summary['p99'] == 0.1
+    assert Histogram().percentile(50) == 0.0
+
+def test_series_are_keyed_by_name_and_labels() -> None:
+    metrics = InMemoryMetrics()
+    metrics.increment('player.skips', guild=1)
+    metrics.increment('player.skips', 2, guild=1)
+    metrics.gauge('pool.players', 3)
+    with metrics.timer('player.resolve', kind='video'):
+        pass
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'player.skips{guild=1}': 3}
+    assert snapshot['gauges'] == {'pool.players': 3}
+    assert snapshot['histograms']['player.resolve{kind=video}']['count'] == 1
+
+def test_removing_a_series_drops_every_kind_with_the_labels() -> None:
+    metrics = InMemoryMetrics()
+    for guild in (1, 2):
+        metrics.observe('player.gap', 0.1, guild=guild)
+        metrics.increment('player.recoveries', guild=guild)
+        metrics.gauge('player.queue_length', 5, guild=guild)
+    metrics.increment('resolver.calls')
+    metrics.remove_series(guild=1)
+    snapshot = metrics.snapshot()
+    assert not any('guild=1' in key for kind in snapshot.values() for key in kind)
+    assert len(snapshot['histograms']) == len(snapshot['counters']) - 1 == len(snapshot['gauges']) == 1
+
+def test_collectors_that_only_remove_gauges_keep_working() -> None:
+    removed = []
+
+    class Collector(MetricsCollector):
+
+        def remove_gauges(self, **labels: Any) -> None:
+            removed.append(labels)
+
+    Collector().remove_series(guild=1)
+    assert removed == [{'guild': 1}]
+
+def test_measurements_from_many_threads_are_not_lost() -> None:
+    metrics = InMemoryMetrics()
+
+    def record() -> None:
+        for _ in range(2000):
+            metrics.increment('calls')
+            metrics.observe('latency', 0.01)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.snapshot()['counters']['calls'] == 16000
+    assert metrics.histogram('latency').count == 16000
+
+def test_destroyed_players_leave_no_series_behind(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        player = pool.get_player(fakes.FakeGuild(1))
+        await player.get_tracks('https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        pool.metrics.increment('player.recoveries', guild=1)
+        pool.collect_metrics()
+        await pool._destroy_player(player)
+        snapshot = pool.metrics.snapshot()
+        assert not any('guild=1' in key for kind in snapshot.values() for key in kind)
+        assert snapshot['gauges']['pool.players'] == 1
+
+    asyncio.run(main())
\ No newline at end of file
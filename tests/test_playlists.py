@@ -0,0 +1,100 @@
+import asyncio
+import gc
+import time
+
+import fakes
+import pytest
+
+from typing import Any
+
+from conftest import wait_until
+from pisslink import Pool, Playlist, PartialTrack, TrackStore
+from pisslink.queue import Queue
+from pisslink.resolver import FUNCTIONS
+
+def page(name: str, size: int) -> list:
+    return [(f'{name}{index}', 10, f'{name}{index}') for index in range(size)]
+
+def streaming_playlist() -> Playlist:
+    playlist = Playlist({'title': 'playlist', 'tracks': TrackStore(), 'complete': False})
+    playlist._append(page('a', 2))
+    return playlist
+
+def titles(queue: Queue) -> list:
+    return [track.title for track in queue]
+
+def test_later_pages_follow_a_playlist_added_to_the_top() -> None:
+    queue = Queue()
+    queue.add(PartialTrack({'title': 'x'}))
+    queue.add(PartialTrack({'title': 'y'}))
+    playlist = streaming_playlist()
+    queue.add(playlist, top=True)
+    playlist._append(page('b', 2))
+    playlist._append(page('c', 1))
+    playlist._finish()
+    assert titles(queue) == ['a0', 'a1', 'b0', 'b1', 'c0', 'x', 'y']
+    assert not queue._feeds and not playlist._queues
+    for track, offset in zip(queue, [0, 10, 20, 30, 40, 50, 50]):
+        assert queue.duration_until(track) == offset * 1000
+
+def test_later_pages_stay_before_tracks_added_after_the_playlist() -> None:
+    queue = Queue()
+    playlist = streaming_playlist()
+    queue.add(playlist)
+    queue.add(PartialTrack({'title': 'x'}))
+    playlist._append(page('b', 1))
+    assert titles(queue) == ['a0', 'a1', 'b0', 'x']
+
+def test_pages_go_to_the_top_once_the_previous_page_played() -> None:
+    queue = Queue()
+    queue.add(PartialTrack({'title': 'x'}))
+    playlist = streaming_playlist()
+    queue.add(playlist, top=True)
+    queue.get()
+    queue.get()
+    playlist._append(page('b', 1))
+    assert titles(queue) == ['b0', 'x']
+
+def test_cleared_queues_stop_receiving_pages() -> None:
+    queue = Queue()
+    playlist = streaming_playlist()
+    queue.add(playlist)
+    queue.clear()
+    playlist._append(page('b', 1))
+    assert queue.is_empty and not playlist._queues
+
+def test_loader_stops_once_the_playlist_is_abandoned(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    read_playlist = FUNCTIONS['read_playlist']
+
+    def slow_read_playlist(*args: Any) -> Any:
+        time.sleep(0.01)
+        return read_playlist(*args)
+
+    monkeypatch.setitem(FUNCTIONS, 'read_playlist', slow_read_playlist)
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        player = pool.get_player(fakes.FakeGuild(1))
+        playlist = await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x5000', stream=True)
+        player.queue.add(playlist)
+        loader = playlist._loader
+        player.queue.clear()
+        await asyncio.sleep(0.05)
+        assert not loader.done()
+        del playlist
+        gc.collect()
+        await wait_until(loader.done)
+        assert loader.cancelled()
+
+    asyncio.run(main())
+
+def test_loader_finishes_while_the_playlist_is_queued(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        player = pool.get_player(fakes.FakeGuild(1))
+        player.queue.add(await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x250', stream=True))
+        gc.collect()
+        await wait_until(lambda: len(player.queue) == 250 and not player.queue._feeds)
+        assert [track.title for track in player.queue.upcoming(3)] == [f'BENCH1x250 track {index}' for index in range(3)]
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,32 @@
+import asyncio
+import inspect
+
+import fakes
+
+from pisslink import Pool, Player
+
+def test_players_receive_every_pool_setting(tmp_path) -> None:
+    async def main() -> None:
+        pool = Pool(
+            fakes.FakeClient(),
+            track_conversion_interval=7,
+            prefetch_count=3,
+            prefetch_concurrency=4,
+            preload_sources=True,
+            store_path=str(tmp_path / 'metadata.db'),
+            transcode_cache_path=str(tmp_path / 'transcodes'),
+            lazy_search=True,
+            segment_cache_size=1024,
+            demux_opus=True,
+            session_path=str(tmp_path / 'sessions'),
+            recover_interrupted=False
+        )
+        player = pool.get_player(fakes.FakeGuild(1))
+        shared = [name for name in inspect.signature(Player).parameters if hasattr(pool, name) and hasattr(player, name)]
+        assert len(shared) >= 20
+        for name in shared:
+            assert getattr(player, name) == getattr(pool, name), name
+        assert player.extractor is pool.resolver
+        assert pool.get_player(fakes.FakeGuild(1)) is player
+
+    asyncio.run(main())
\ No newline at end of file
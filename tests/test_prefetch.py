@@ -0,0 +1,48 @@
+import asyncio
+
+import fakes
+import pytest
+
+from conftest import wait_until
+from pisslink import Pool, Track, PartialTrack
+
+def test_only_the_first_entries_are_prefetched(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), prefetch_count=3)
+        player = pool.get_player(fakes.FakeGuild(1))
+        player.queue.add(await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x10'))
+        await wait_until(lambda: all(isinstance(track, Track) for track in player.queue.upcoming(3)))
+        await asyncio.sleep(0.05)
+        assert all(isinstance(track, PartialTrack) for track in list(player.queue)[3:])
+        assert player.conversion_backlog == 0
+        player.queue.get()
+        await wait_until(lambda: all(isinstance(track, Track) for track in player.queue.upcoming(3)))
+
+    asyncio.run(main())
+
+def test_prefetch_concurrency_is_bounded(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(youtube, 'latency', 0.02)
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), prefetch_count=6, prefetch_concurrency=2)
+        player = pool.get_player(fakes.FakeGuild(1))
+        player.queue.add(await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x10'))
+        peak = 0
+        while player.conversion_backlog:
+            peak = max(peak, len(player._conversions))
+            await asyncio.sleep(0.002)
+        assert peak == 2
+
+    asyncio.run(main())
+
+def test_unresolvable_entries_are_removed(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(youtube, 'failure_rate', 1.0)
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        player = pool.get_player(fakes.FakeGuild(1))
+        player.queue.add(PartialTrack({'title': 'missing', 'duration': 100, 'id': 'missing'}))
+        await wait_until(lambda: player.queue.is_empty)
+        assert pool.metrics.snapshot()['counters']['player.failed_conversions'] == 1
+
+    asyncio.run(main())
\ No newline at end of file
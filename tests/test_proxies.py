@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import fakes
+import pytest
+
+from pisslink import Pool, Player, ProxyManager
+from pisslink.proxies import classify_error
+from pisslink.resolver import Resolver, FUNCTIONS
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, 'monotonic', clock)
+    return clock
+
+def test_only_proxy_errors_are_held_against_proxies() -> None:
+    assert classify_error(Exception('HTTP Error 429: Too Many Requests')) == 'rate_limited'
+    assert classify_error(Exception('<urlopen error timed out>')) == 'network'
+    assert classify_error(ConnectionResetError()) == 'network'
+    assert classify_error(Exception('Video unavailable')) is None
+
+def test_calls_go_through_the_healthiest_proxy(clock: Clock) -> None:
+    manager = ProxyManager(['a', 'b'])
+    slow, fast = manager._proxies['a'], manager._proxies['b']
+    manager.record(slow, 2.0)
+    manager.record(fast, 0.1)
+    assert manager._select() is fast
+    assert [proxy.url for proxy in manager.proxies] == ['b', 'a']
+
+def test_failing_proxies_are_cooled_down_and_ejected(clock: Clock) -> None:
+    manager = ProxyManager(['a', 'b'], cooldown=10, max_failures=2, max_strikes=2)
+    proxy = manager._proxies['a']
+    manager.record(proxy, 0.1, 'network')
+    assert proxy.is_available()
+    manager.record(proxy, 0.1, 'network')
+    assert not proxy.is_available() and proxy.strikes == 1
+    clock.now += 10
+    assert proxy.is_available()
+    manager.record(proxy, 0.1, 'rate_limited')
+    assert proxy.ejected and proxy.cooldown_until == clock.now + 20
+    manager.reset('a')
+    assert proxy.is_available() and proxy.strikes == 0
+
+def test_unavailable_proxies_are_used_when_no_other_is_left(clock: Clock) -> None:
+    manager = ProxyManager(['a', 'b'], cooldown=10, max_failures=1)
+    manager.record(manager._proxies['a'], 0.1, 'network')
+    clock.now += 5
+    manager.record(manager._proxies['b'], 0.1, 'network')
+    assert manager._select() is manager._proxies['a']
+
+def test_calls_wait_for_a_free_proxy(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = []
+
+    def lookup(options: dict) -> str:
+        time.sleep(0.02)
+        seen.append(options['proxy'])
+        return options['proxy']
+
+    monkeypatch.setitem(FUNCTIONS, 'lookup', lookup)
+
+    async def main() -> None:
+        manager = ProxyManager(['a'], concurrency=1)
+        resolver = Resolver(4)
+        results = await asyncio.gather(*[manager.call(resolver, 'lookup', {'format': 'bestaudio'}) for _ in range(3)])
+        assert results == ['a'] * 3
+        assert resolver.stats.submitted == 3 and manager.pending == 0
+        assert manager._proxies['a'].requests == 3 and manager._proxies['a'].active == 0
+
+    asyncio.run(main())
+
+def test_proxy_rotation_interval_is_deprecated() -> None:
+    async def main() -> None:
+        with pytest.warns(DeprecationWarning):
+            pool = Pool(fakes.FakeClient(), None, None, 30, None, ['http://proxy'], 600, 2)
+        assert pool.resolver.concurrency == 2
+        with pytest.warns(DeprecationWarning):
+            Player(fakes.FakeClient(), None, None, 30, None, ['http://proxy'], 600)
+        pool = Pool(fakes.FakeClient(), proxies=['http://proxy'], proxy_concurrency=1, proxy_cooldown=5)
+        assert pool.proxy_manager.concurrency == 1 and pool.proxy_manager.cooldown == 5
+
+    asyncio.run(main())
\ No newline at end of file
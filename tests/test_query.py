@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import fakes
+import pytest
+
+from pisslink import Pool, parse_query
+from pisslink.query import parse_timestamp
+
+WATCH = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+@pytest.mark.parametrize('query', [
+    WATCH,
+    '<https://www.youtube.com/watch?v=dQw4w9WgXcQ>',
+    'youtube.com/watch?v=dQw4w9WgXcQ&list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG',
+    'https://youtu.be/dQw4w9WgXcQ?t=43',
+    'https://www.youtube.com/shorts/dQw4w9WgXcQ',
+    'https://music.youtube.com/watch?v=dQw4w9WgXcQ&feature=share',
+    'https://www.youtube.com/embed/dQw4w9WgXcQ?start=10',
+])
+def test_every_spelling_of_a_video_shares_a_key(query: str) -> None:
+    parsed = parse_query(query)
+    assert parsed.kind == 'video' and parsed.url == WATCH and parsed.key == 'youtube:dQw4w9WgXcQ'
+
+@pytest.mark.parametrize('query', [
+    'https://www.youtube.com/playlist?list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG',
+    'https://www.youtube.com/watch?list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG',
+    'https://www.youtube.com/embed/videoseries?list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG',
+])
+def test_playlist_urls(query: str) -> None:
+    parsed = parse_query(query)
+    assert parsed.kind == 'playlist' and parsed.is_playlist
+    assert parsed.url == 'https://www.youtube.com/playlist?list=PLx0sYbCqOb8TBPRdmBHs5Iftvv9TPboYG'
+
+def test_spotify_urls_and_uris() -> None:
+    assert parse_query('spotify:track:4uLU6hMCjMI75M1A2tKUQC').key == parse_query('https://open.spotify.com/intl-de/track/4uLU6hMCjMI75M1A2tKUQC?si=x').key
+    assert parse_query('https://open.spotify.com/album/1ATL5GLyefJaxhQzSPVrLX').kind == 'spotify_album'
+    assert parse_query('spotify:artist:0gxyHStUsqpMadRV0Di1Qt').kind == 'url'
+
+def test_timestamps() -> None:
+    assert parse_timestamp('1m30s') == parse_timestamp('90') == parse_timestamp('90s') == 90
+    assert parse_timestamp('1h') == 3600 and parse_timestamp('soon') is None
+    assert parse_query('https://youtu.be/dQw4w9WgXcQ?t=1m30s').start == 90
+    assert parse_query(WATCH).start is None
+
+def test_searches_keep_their_text_and_share_a_folded_key() -> None:
+    first, second = parse_query('  Daft   Punk  '), parse_query('daft punk')
+    assert first.kind == 'search' and first.identifier == 'Daft Punk'
+    assert first.key == second.key == 'ytsearch:daft punk'
+    assert parse_query('   ').key is None
+    assert parse_query('https://example.com/song.mp3').kind == 'url'
+
+def test_paths_are_only_local_when_allowed_and_present(tmp_path) -> None:
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(b'audio')
+    assert parse_query(str(path), local=True).kind == 'local'
+    assert parse_query(str(path), local=True).identifier == str(path)
+    assert parse_query(str(path)).kind == 'search'
+    assert parse_query(str(tmp_path / 'missing.mp3'), local=True).kind == 'search'
+    assert parse_query('/r/music', local=True).key == 'ytsearch:/r/music'
+    assert parse_query(path.as_uri()).kind == 'local'
+
+def test_windows_paths_are_not_joined_to_the_working_directory(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(os.path, 'exists', lambda path: True)
+    parsed = parse_query('C:\\music\\a.mp3', local=True)
+    assert parsed.kind == 'local' and parsed.identifier == 'C:\\music\\a.mp3'
+
+def test_searches_are_sent_as_typed(youtube: type) -> None:
+    async def main() -> None:
+        player = Pool(fakes.FakeClient()).get_player(fakes.FakeGuild(1))
+        track = await player.get_tracks('AC/DC  Back In Black')
+        assert track.title == 'AC/DC Back In Black'
+        assert await player.get_tracks('ac/dc back in black') is track
+        assert youtube.calls.get('search') == 1
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,161 @@
+import random
+
+import pytest
+
+from pisslink import PartialTrack, Playlist, TrackStore
+from pisslink.queue import Queue
+
+def track(name: str, duration: int = 10) -> PartialTrack:
+    return PartialTrack({'title': name, 'duration': duration})
+
+def titles(queue: Queue) -> list:
+    return [item.title for item in queue]
+
+def expected_offsets(queue: Queue) -> dict:
+    offsets, elapsed = {}, 0
+    for item in queue:
+        offsets.setdefault(item, elapsed)
+        elapsed += item.duration
+    return offsets
+
+def test_offsets_follow_every_change() -> None:
+    queue = Queue()
+    tracks = [track(str(index), index + 1) for index in range(8)]
+    queue.add(Playlist({'title': 'playlist', 'tracks': tracks[:4]}))
+    queue.add(tracks[4], top=True)
+    queue.add(tracks[5])
+    queue.insert(2, tracks[6])
+    queue.get()
+    queue.remove(tracks[2])
+    queue.replace(tracks[1], track('longer', 100))
+    queue.move(0, 3)
+    random.seed(1)
+    queue.shuffle()
+    queue.add(tracks[7])
+    for item, offset in expected_offsets(queue).items():
+        assert queue.duration_until(item) == offset
+    assert queue.duration == sum(item.duration for item in queue)
+    assert queue.duration_until(track('missing')) == queue.duration
+
+def test_tracks_is_a_live_read_only_view() -> None:
+    queue = Queue()
+    first, second = track('a'), track('b')
+    queue.add(first)
+    view = queue.tracks
+    queue.add(second)
+    assert view == [first, second] and len(view) == 2 and view[-1] is second and view[:1] == [first]
+    assert second in view
+    for mutate in (lambda: view.append(first), lambda: view.remove(first), lambda: view.pop(), lambda: view.insert(0, first), lambda: view.clear()):
+        with pytest.raises(TypeError):
+            mutate()
+    with pytest.raises(TypeError):
+        view[0] = second
+    with pytest.raises(TypeError):
+        del view[0]
+    assert titles(queue) == ['a', 'b']
+
+def test_insert_remove_at_and_move() -> None:
+    queue = Queue()
+    for name in 'abc':
+        queue.add(track(name))
+    queue.insert(1, track('x'))
+    queue.insert(-1, track('y'))
+    queue.insert(100, track('z'))
+    assert titles(queue) == ['a', 'x', 'b', 'y', 'c', 'z']
+    assert queue.remove_at(1).title == 'x'
+    assert queue.remove_at(-1).title == 'z'
+    queue.move(0, -1)
+    queue.move(-1, 100)
+    queue.move(2, 0)
+    assert titles(queue) == ['a', 'b', 'y', 'c']
+    with pytest.raises(IndexError):
+        queue.remove_at(10)
+    with pytest.raises(IndexError):
+        queue.move(10, 0)
+    assert len(queue) == 4
+
+def test_duplicates_are_removed_and_replaced_in_playing_order() -> None:
+    queue = Queue()
+    shared, other = track('shared'), track('other')
+    queue.add(shared)
+    queue.add(other)
+    queue.add(shared)
+    queue.add(track('marker'), top=True)
+    queue.add(shared, top=True)
+    assert titles(queue) == ['shared', 'marker', 'shared', 'other', 'shared']
+    queue.replace(shared, track('first'))
+    assert titles(queue) == ['first', 'marker', 'shared', 'other', 'shared']
+    queue.remove(shared)
+    assert titles(queue) == ['first', 'marker', 'other', 'shared']
+    assert queue.duration_until(shared) == 30000
+    assert shared in queue
+    queue.remove(shared)
+    assert shared not in queue
+
+def test_get_takes_tracks_in_order() -> None:
+    queue = Queue()
+    queue.add(Playlist({'title': 'playlist', 'tracks': [track(name) for name in 'abc']}))
+    queue.add(track('top'), top=True)
+    assert [queue.get().title for _ in range(4)] == ['top', 'a', 'b', 'c']
+    assert queue.get() is None and queue.is_empty and queue.duration == 0
+
+def stored_playlist(names: str) -> Playlist:
+    store = TrackStore()
+    for index, name in enumerate(names):
+        store.append(name, index + 1, f'video{name}')
+    return Playlist({'title': 'playlist', 'tracks': store})
+
+def check_offsets(queue: Queue) -> None:
+    elapsed = 0
+    for entry in list(queue._entries):
+        if entry.track is not None and queue._first(entry.track) is entry:
+            assert queue.duration_until(entry.track) == elapsed
+        elapsed += queue._length(entry)
+    assert queue.duration == elapsed
+
+def test_store_entries_are_created_when_accessed() -> None:
+    queue = Queue()
+    queue.add(stored_playlist('abcdef'))
+    assert not queue._index and all(entry.track is None for entry in queue._entries)
+    assert queue.duration == 21000
+    upcoming = queue.upcoming(2)
+    assert [item.title for item in upcoming] == ['a', 'b']
+    assert queue.upcoming(2) == upcoming and queue.next_track is upcoming[0]
+    assert upcoming[1] in queue and len(queue._index) == 2
+    assert queue.duration_until(upcoming[1]) == 1000
+    assert queue.tracks[-1].title == 'f' and len(queue._index) == 3
+    check_offsets(queue)
+    assert queue.remove(upcoming[1])
+    assert queue.get() is upcoming[0]
+    assert [queue.get().title for _ in range(4)] == ['c', 'd', 'e', 'f']
+    assert queue.is_empty and queue.duration == 0 and not queue._index
+
+def test_offsets_of_partly_created_store_entries() -> None:
+    random.seed(2)
+    queue = Queue()
+    for step in range(60):
+        action = random.randrange(7)
+        if action == 0:
+            queue.add(stored_playlist('abcd'), top=random.random() < 0.5)
+        elif action == 1:
+            queue.add(track(f'plain{step}', step % 5 + 1), top=random.random() < 0.5)
+        elif action == 2 and len(queue):
+            queue.upcoming(random.randrange(1, len(queue) + 1))
+        elif action == 3 and len(queue):
+            queue.tracks[random.randrange(len(queue))]
+        elif action == 4 and len(queue):
+            queue.get()
+        elif action == 5 and len(queue):
+            queue.move(random.randrange(len(queue)), random.randrange(len(queue)))
+        elif action == 6 and len(queue):
+            queue.remove_at(random.randrange(len(queue)))
+        check_offsets(queue)
+
+def test_converted_store_entries_keep_their_place() -> None:
+    queue = Queue()
+    queue.add(stored_playlist('abc'))
+    partial = queue.upcoming(2)[1]
+    converted = track('converted', 30)
+    assert queue.replace(partial, converted)
+    assert [item.title for item in queue] == ['a', 'converted', 'c']
+    assert queue.duration_until(queue.tracks[2]) == 31000
\ No newline at end of file
@@ -0,0 +1,125 @@
+import asyncio
+
+import discord
+import fakes
+import pytest
+
+from conftest import wait_until
+from pisslink import Pool, LocalTrack
+from pisslink.transcode import TranscodeCache
+
+URL = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+async def playing_player(pool: Pool, track_length: float = 10):
+    guild = fakes.FakeGuild(1)
+    player = pool.get_player(guild)
+    await player.connect(fakes.FakeChannel(guild, track_length))
+    await player.play(await player.get_tracks(URL))
+    return player
+
+def interrupt(player, error: Exception = None) -> None:
+    voice_client = player.guild.voice_client
+    voice_client._handle.cancel()
+    voice_client._handle = None
+    voice_client._after(error)
+
+def test_interrupted_track_resumes_on_the_same_endpoint(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        player = await playing_player(pool)
+        track = player.current
+        player._source.frames = 1500
+        interrupt(player)
+        await wait_until(lambda: player.guild.voice_client.played == 2)
+        assert player.current is track and player.position == 30000
+        assert youtube.calls.get('video') == 1
+        assert 'track_end' not in pool.client.events
+        assert pool.metrics.snapshot()['counters']['player.recoveries{guild=1}'] == 1
+
+    asyncio.run(main())
+
+def test_failed_track_is_resolved_again(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        player = await playing_player(pool)
+        track = player.current
+        interrupt(player, RuntimeError('connection reset'))
+        await wait_until(lambda: player.guild.voice_client.played == 2)
+        assert player.current is not track and player.current.identifier == track.identifier
+        assert youtube.calls.get('video') == 2
+        assert 'track_end' not in pool.client.events
+
+    asyncio.run(main())
+
+def test_finished_track_fires_track_end(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        player = await playing_player(pool, 0.02)
+        await wait_until(lambda: player.current is None)
+        assert pool.client.events['track_end'] == 1
+        assert player.guild.voice_client.played == 1
+
+    asyncio.run(main())
+
+def test_recovery_gives_up_after_repeated_interruptions(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        player = await playing_player(pool)
+        for played in (2, 3):
+            interrupt(player)
+            await wait_until(lambda: player.guild.voice_client.played == played)
+        interrupt(player)
+        await wait_until(lambda: player.current is None)
+        assert pool.client.events['track_end'] == 1
+
+    asyncio.run(main())
+
+def test_timestamped_urls_start_at_the_timestamp(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        guild = fakes.FakeGuild(1)
+        player = pool.get_player(guild)
+        await player.connect(fakes.FakeChannel(guild, 10))
+        track = await player.get_tracks(f'{URL}&t=1m30s')
+        assert track.start == 90000
+        assert (await player.get_tracks(URL)).start == 0
+        await player.play(track)
+        assert player.position == 90000
+
+    asyncio.run(main())
+
+class Opus(fakes.FakeSource):
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__()
+        self.args = args
+        self.kwargs = kwargs
+
+class Pcm(Opus):
+
+    def is_opus(self) -> bool:
+        return False
+
+@pytest.mark.parametrize('transcoded', [False, True])
+def test_seeking_keeps_the_kind_of_the_playing_source(tmp_path, monkeypatch: pytest.MonkeyPatch, transcoded: bool) -> None:
+    monkeypatch.setattr(discord, 'FFmpegOpusAudio', Opus)
+    monkeypatch.setattr(discord, 'FFmpegPCMAudio', Pcm)
+    monkeypatch.setattr(TranscodeCache, 'schedule', lambda self, path: None)
+    converted = {'path': str(tmp_path / 'song.ogg') if transcoded else None}
+    monkeypatch.setattr(TranscodeCache, 'lookup', lambda self, path: converted['path'])
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), transcode_cache_path=str(tmp_path / 'transcodes'))
+        guild = fakes.FakeGuild(1)
+        player = pool.get_player(guild)
+        await player.connect(fakes.FakeChannel(guild, 10))
+        track = LocalTrack({'path': str(tmp_path / 'song.mp3'), 'title': 'song', 'duration': 60})
+        await player.play(track)
+        assert player._source.is_opus() is transcoded
+        converted['path'] = None if transcoded else str(tmp_path / 'song.ogg')
+        await player.seek(30000)
+        source, position = player._source._pending
+        assert position == 30000 and source.is_opus() is transcoded
+        assert source.args == (track.path,) and 'codec' not in source.kwargs
+
+    asyncio.run(main())
\ No newline at end of file
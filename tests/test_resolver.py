@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import fakes
+import pytest
+
+from pisslink import Pool
+from pisslink.resolver import Resolver, FUNCTIONS
+
+def test_run_is_bounded_by_concurrency() -> None:
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work() -> None:
+        with lock:
+            running.append(None)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    async def main() -> None:
+        resolver = Resolver(2)
+        await asyncio.gather(*[resolver.run(work) for _ in range(8)])
+        assert max(peak) == 2
+        assert resolver.stats.submitted == resolver.stats.completed == 8
+        assert resolver.active == resolver.pending == 0
+
+    asyncio.run(main())
+
+def test_run_does_not_block_the_event_loop() -> None:
+    async def main() -> None:
+        resolver = Resolver(1)
+        started = time.perf_counter()
+        task = asyncio.ensure_future(resolver.run(time.sleep, 0.1))
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - started < 0.05
+        await task
+
+    asyncio.run(main())
+
+def test_run_counts_failures() -> None:
+    def fail() -> None:
+        raise ValueError('broken')
+
+    async def main() -> None:
+        resolver = Resolver(1)
+        with pytest.raises(ValueError):
+            await resolver.run(fail)
+        assert resolver.stats.failed == 1
+        assert await resolver.run(lambda: 'ok') == 'ok'
+
+    asyncio.run(main())
+
+def test_call_runs_registered_functions(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(FUNCTIONS, 'double', lambda value: value * 2)
+    assert asyncio.run(Resolver(1).call('double', 21)) == 42
+
+def test_player_lookups_run_on_the_resolver(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        track = await pool.get_player(fakes.FakeGuild(1)).get_tracks('https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        assert track.identifier == 'dQw4w9WgXcQ'
+        assert pool.resolver.stats.completed == 1
+
+    asyncio.run(main())
+
+def test_cancelled_callers_keep_their_worker_until_the_call_finishes() -> None:
+    release = threading.Event()
+
+    async def main() -> None:
+        resolver = Resolver(2)
+        tasks = [asyncio.ensure_future(resolver.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        waiting = asyncio.ensure_future(resolver.run(lambda: 'ok'))
+        await asyncio.sleep(0.01)
+        assert resolver.active == 2 and resolver.pending == 1
+        assert not waiting.done()
+        release.set()
+        assert await waiting == 'ok'
+        assert resolver.active == 0 and resolver.stats.completed == 3
+
+    asyncio.run(main())
\ No newline at end of file
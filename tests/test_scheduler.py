@@ -0,0 +1,100 @@
+import asyncio
+
+from typing import Any, List, Dict, Optional
+
+from conftest import wait_until
+from pisslink.scheduler import ConversionScheduler
+
+class Player:
+    '''Implements the part of :class:`Player` the scheduler talks to.'''
+
+    def __init__(self, name: str, starts_in: Dict[str, float], started: List[str], pending: int = 0, duration: float = 0.02) -> None:
+        self.name = name
+        self.starts_in = starts_in
+        self.started = started
+        self.pending = pending
+        self.duration = duration
+        self.converting = set()
+
+    def _pending_conversion(self) -> Optional[str]:
+        return next((track for track in self.starts_in if track not in self.converting), None)
+
+    def _time_until(self, track: str) -> float:
+        return self.starts_in[track]
+
+    def _extractor_pending(self) -> int:
+        return self.pending
+
+    def _start_conversion(self, track: str) -> asyncio.Task:
+        self.converting.add(track)
+        self.started.append(track)
+
+        async def convert() -> None:
+            await asyncio.sleep(self.duration)
+            del self.starts_in[track]
+
+        return asyncio.create_task(convert())
+
+def add(scheduler: ConversionScheduler, player: Player) -> None:
+    scheduler.register(player)
+    scheduler.notify(player)
+
+def test_entries_that_play_first_are_converted_first_across_players() -> None:
+    async def main() -> None:
+        started = []
+        scheduler = ConversionScheduler(concurrency=1, interval=0)
+        add(scheduler, Player('a', {'a1': 100, 'a2': 200}, started))
+        add(scheduler, Player('b', {'b1': 10, 'b2': 150}, started))
+        await wait_until(lambda: len(started) == 4)
+        assert started == ['b1', 'a1', 'b2', 'a2']
+        await wait_until(lambda: scheduler.active == 0)
+        assert scheduler.backlog == 0
+        scheduler.stop()
+
+    asyncio.run(main())
+
+def test_conversions_are_bounded_by_concurrency() -> None:
+    async def main() -> None:
+        started = []
+        scheduler = ConversionScheduler(concurrency=2, interval=0)
+        players = [Player(str(index), {f'{index}:{track}': track for track in range(3)}, started, duration=0.05) for index in range(3)]
+        for player in players:
+            add(scheduler, player)
+        peak = 0
+        while len(started) < 9 or scheduler.active:
+            peak = max(peak, scheduler.active)
+            await asyncio.sleep(0.005)
+        assert peak == 2
+        scheduler.stop()
+
+    asyncio.run(main())
+
+def test_prefetching_waits_while_the_extractor_is_busy() -> None:
+    async def main() -> None:
+        started = []
+        scheduler = ConversionScheduler(concurrency=4, interval=0, urgency=30)
+        player = Player('a', {'soon': 5, 'later': 60}, started, pending=3)
+        add(scheduler, player)
+        await wait_until(lambda: started == ['soon'])
+        await asyncio.sleep(0.05)
+        assert started == ['soon'] and scheduler.backlog == 1
+        player.pending = 0
+        scheduler.notify(player)
+        await wait_until(lambda: started == ['soon', 'later'] and scheduler.active == 0)
+        scheduler.stop()
+
+    asyncio.run(main())
+
+def test_unregistered_players_are_not_converted() -> None:
+    async def main() -> None:
+        started = []
+        scheduler = ConversionScheduler(concurrency=1, interval=0)
+        player = Player('a', {'a1': 10}, started)
+        scheduler.register(player)
+        scheduler.unregister(player)
+        scheduler.notify(player)
+        await asyncio.sleep(0.02)
+        assert started == [] and scheduler.backlog == 0
+        scheduler.stop()
+
+    asyncio.run(main())
\ No newline at end of file
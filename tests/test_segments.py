@@ -0,0 +1,133 @@
+import threading
+import time
+
+import discord
+
+from typing import Any, List
+
+from pisslink import InMemoryMetrics
+from pisslink.segments import SegmentCache
+
+class Remote:
+    '''Implements the part of :class:`Track` the segment cache reads.'''
+
+    def __init__(self, identifier: str, duration: int = 10000, is_stream: bool = False) -> None:
+        self.identifier = identifier
+        self.duration = duration
+        self.is_stream = is_stream
+        self.endpoint = f'https://example.com/{identifier}'
+
+class Download(discord.AudioSource):
+    '''Replaces the FFmpeg process a track is downloaded with.'''
+
+    def __init__(self, packets: List[bytes], delay: float = 0) -> None:
+        self.packets = list(packets)
+        self.delay = delay
+        self.read_packets = 0
+        self.cleaned_up = threading.Event()
+
+    def read(self) -> bytes:
+        time.sleep(self.delay)
+        if not self.packets:
+            return b''
+        self.read_packets += 1
+        return self.packets.pop(0)
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        self.cleaned_up.set()
+
+class Downloads:
+
+    def __init__(self, packets: List[bytes], delay: float = 0) -> None:
+        self.packets = packets
+        self.delay = delay
+        self.created = []
+
+    def __call__(self, track: Any) -> Download:
+        download = Download(self.packets, self.delay)
+        self.created.append(download)
+        return download
+
+PACKETS = [bytes([index]) * 10 for index in range(50)]
+
+def read_all(source: discord.AudioSource) -> List[bytes]:
+    packets = []
+    while packet := source.read():
+        packets.append(packet)
+    source.cleanup()
+    return packets
+
+def test_guilds_share_one_download() -> None:
+    cache = SegmentCache(1024 ** 2)
+    cache.metrics = InMemoryMetrics()
+    downloads = Downloads(PACKETS, delay=0.001)
+    first = cache.open(Remote('a'), downloads)
+    second = cache.open(Remote('a'), downloads)
+    assert read_all(first) == read_all(second) == PACKETS
+    assert read_all(cache.open(Remote('a'), downloads)) == PACKETS
+    assert len(downloads.created) == 1
+    assert cache.metrics.snapshot()['counters'] == {'segments.misses': 1, 'segments.hits': 2}
+
+def test_offsets_are_served_from_downloaded_packets_only() -> None:
+    cache = SegmentCache(1024 ** 2)
+    downloads = Downloads(PACKETS)
+    assert cache.open(Remote('a'), downloads, position=200) is None
+    read_all(cache.open(Remote('a'), downloads))
+    assert read_all(cache.open(Remote('a'), downloads, position=200)) == PACKETS[10:]
+    assert len(downloads.created) == 1
+
+def test_abandoned_downloads_are_stopped_and_dropped() -> None:
+    cache = SegmentCache(1024 ** 2)
+    downloads = Downloads(PACKETS * 100, delay=0.001)
+    source = cache.open(Remote('a'), downloads)
+    source.read()
+    source.cleanup()
+    assert downloads.created[0].cleaned_up.wait(2)
+    assert downloads.created[0].read_packets < len(PACKETS) * 100
+    assert len(cache) == 0
+
+def test_least_recently_played_entries_are_evicted() -> None:
+    cache = SegmentCache(2000, max_entry_size=1000)
+    downloads = Downloads(PACKETS)
+    for identifier in ('a', 'b', 'a', 'c'):
+        read_all(cache.open(Remote(identifier, 40), downloads))
+    assert len(downloads.created) == 3
+    deadline = time.perf_counter() + 2
+    while cache.size > 2000 and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    assert len(cache) == 2 and cache.size <= 2000
+    assert cache.open(Remote('b', 40), downloads, position=20) is None
+    assert read_all(cache.open(Remote('a', 40), downloads, position=20)) == PACKETS[1:]
+
+def test_running_downloads_never_exceed_the_ceiling() -> None:
+    cache = SegmentCache(100_000, max_entry_size=25_000)
+    cache.metrics = InMemoryMetrics()
+    downloads = Downloads(PACKETS, delay=0.01)
+    sources = [cache.open(Remote(str(index), 1000), downloads) for index in range(20)]
+    admitted = [source for source in sources if source is not None]
+    assert len(admitted) == 4 and len(downloads.created) == 4
+    assert cache.metrics.snapshot()['counters']['segments.bypasses'] == 16
+    for source in admitted:
+        assert read_all(source) == PACKETS
+        assert cache.size <= cache.max_size
+    assert cache.open(Remote('late', 1000), downloads) is not None
+
+def test_live_streams_and_long_tracks_are_played_directly() -> None:
+    cache = SegmentCache(1024 ** 2)
+    downloads = Downloads(PACKETS)
+    assert cache.open(Remote('live', is_stream=True), downloads) is None
+    assert cache.open(Remote('long', duration=3600 * 1000), downloads) is None
+    assert SegmentCache(0).open(Remote('a'), downloads) is None
+    assert downloads.created == []
+
+def test_failed_downloads_are_not_cached() -> None:
+    def fail(track: Any) -> None:
+        raise OSError('ffmpeg not found')
+
+    cache = SegmentCache(1024 ** 2)
+    assert cache.open(Remote('a'), fail) is None
+    assert len(cache) == 0
+    assert read_all(cache.open(Remote('a'), Downloads(PACKETS))) == PACKETS
\ No newline at end of file
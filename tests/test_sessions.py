@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+import threading
+
+import fakes
+import pytest
+
+from conftest import wait_until
+from pisslink import Pool, PartialTrack
+from pisslink.sessions import SessionStore, encode_track, decode_track
+
+PLAYLIST = 'https://www.youtube.com/playlist?list=BENCH{}x3'
+
+def titles(player) -> list:
+    return [track.title for track in player.queue]
+
+def test_tracks_survive_encoding() -> None:
+    track = PartialTrack({'title': 'Song', 'duration': 90, 'id': 'abc', 'spotify_id': 'sp1'})
+    assert encode_track(track) == ['Song', 90, 'abc', 'sp1']
+    decoded = decode_track(encode_track(track))
+    assert (decoded.title, decoded.duration, decoded.identifier, decoded.spotify_id, decoded.isrc) == ('Song', 90000, 'abc', 'sp1', None)
+
+def test_saves_append_to_the_queue_log(tmp_path, youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        player = pool.get_player(fakes.FakeGuild(1))
+        await pool.sessions.loaded(player)
+        player.queue.add(await player.get_tracks(PLAYLIST.format(1)))
+        await pool.sessions.save(player)
+        player.queue.get()
+        player.queue.add(await player.get_tracks(PLAYLIST.format(2)))
+        await pool.sessions.save(player)
+        with open(tmp_path / '1.jsonl', encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        assert [list(record) for record in records] == [['add'], ['pop'], ['add']]
+        assert records[1]['pop'] == 1
+        snapshot = SessionStore(str(tmp_path)).load(1)
+        assert [track.title for track in snapshot.tracks] == titles(player)
+
+    asyncio.run(main())
+
+def test_sessions_are_restored_off_the_event_loop(tmp_path, youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    threads = []
+    load = SessionStore.load
+
+    def recording_load(self, guild_id: int):
+        threads.append(threading.current_thread())
+        return load(self, guild_id)
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        player = pool.get_player(fakes.FakeGuild(1))
+        player.queue.add(await player.get_tracks(PLAYLIST.format(1)))
+        await pool.sessions.save(player)
+        monkeypatch.setattr(SessionStore, 'load', recording_load)
+        restored_pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        restored = restored_pool.get_player(fakes.FakeGuild(1))
+        assert not threads and restored.queue.is_empty
+        assert await restored_pool.sessions.loaded(restored)
+        assert threads and threading.main_thread() not in threads
+        assert titles(restored) == titles(player)
+
+    asyncio.run(main())
+
+def test_changes_made_while_loading_are_kept(tmp_path, youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        player = pool.get_player(fakes.FakeGuild(1))
+        player.queue.add(await player.get_tracks(PLAYLIST.format(1)))
+        await pool.sessions.save(player)
+        restored_pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        restored = restored_pool.get_player(fakes.FakeGuild(1))
+        restored.queue.add(await restored.get_tracks(PLAYLIST.format(2)))
+        assert await restored_pool.sessions.loaded(restored)
+        assert titles(restored)[:3] == titles(player) and len(restored.queue) == 6
+        await restored_pool.sessions.save(restored)
+        snapshot = SessionStore(str(tmp_path)).load(1)
+        assert [track.title for track in snapshot.tracks] == titles(restored)
+
+    asyncio.run(main())
+
+def test_sessions_without_tracks_are_not_restored(tmp_path) -> None:
+    with open(tmp_path / '1.json', 'w', encoding='utf-8') as file:
+        json.dump({'channel_id': 5, 'current': None, 'position': 0, 'loop': False}, file)
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), session_path=str(tmp_path))
+        assert pool.sessions.load(1) is None
+        assert not await pool.sessions.loaded(pool.get_player(fakes.FakeGuild(1)))
+
+    asyncio.run(main())
+
+def test_session_is_deleted_when_the_queue_ends(tmp_path, youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        guild = fakes.FakeGuild(1)
+        player = pool.get_player(guild)
+        await player.connect(fakes.FakeChannel(guild, 0.02))
+        player.queue.add(await player.get_tracks(PLAYLIST.format(1)))
+        await player.advance()
+        await pool.sessions.save(player)
+        assert os.path.exists(tmp_path / '1.json')
+        await wait_until(lambda: player.current is None and not os.path.exists(tmp_path / '1.json'))
+        assert not os.path.exists(tmp_path / '1.jsonl')
+
+    asyncio.run(main())
+
+def test_session_is_deleted_on_disconnect(tmp_path, youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0, session_path=str(tmp_path))
+        guild = fakes.FakeGuild(1)
+        player = pool.get_player(guild)
+        await player.connect(fakes.FakeChannel(guild, 1))
+        player.queue.add(await player.get_tracks(PLAYLIST.format(1)))
+        await player.advance()
+        await pool.sessions.save(player)
+        await player.disconnect()
+        assert os.listdir(tmp_path) == []
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import fakes
+
+from conftest import wait_until
+from pisslink import Pool, Track
+from pisslink.tracks import parse_expiry
+
+def stale_track(identifier: str, expires_in: float) -> Track:
+    data = fakes.FakeYoutubeDL.video(identifier)
+    data['url'] = f'https://rr1.googlevideo.com/videoplayback?expire={int(time.time() + expires_in)}&id={identifier}'
+    return Track(data)
+
+def test_expiry_is_parsed_from_query_and_path() -> None:
+    assert parse_expiry('https://rr1.googlevideo.com/videoplayback?expire=1700000000&id=a') == 1700000000
+    assert parse_expiry('https://manifest.googlevideo.com/api/manifest/hls/expire/1700000000/id/a') == 1700000000
+    assert parse_expiry('https://example.com/audio.mp3') is None
+    assert parse_expiry(None) is None
+
+def test_tracks_are_stale_when_they_expire_before_their_end() -> None:
+    track = stale_track('a', 60)
+    assert track.expires_within(60) and not track.expires_within(30)
+    fresh = stale_track('b', 6 * 3600)
+    assert not fresh.expires_within(3600)
+
+def test_stale_tracks_are_resolved_again_before_playing(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), track_conversion_interval=0)
+        guild = fakes.FakeGuild(1)
+        player = pool.get_player(guild)
+        await player.connect(fakes.FakeChannel(guild, 1))
+        track = stale_track('abcdefghijk', 60)
+        pool.cache.put(track, f'youtube:{track.identifier}')
+        assert player._is_stale(track)
+        await player.play(track)
+        assert player.current is not track
+        assert player.current.identifier == track.identifier
+        assert not player._is_stale(player.current)
+        assert youtube.calls.get('video') == 1
+
+    asyncio.run(main())
+
+def test_stale_queue_entries_are_prefetched(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        player = pool.get_player(fakes.FakeGuild(1))
+        track = stale_track('abcdefghijk', 60)
+        player.queue.add(track)
+        await wait_until(lambda: player.queue.next_track is not track)
+        assert not player._is_stale(player.queue.next_track)
+
+    asyncio.run(main())
\ No newline at end of file
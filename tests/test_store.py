@@ -0,0 +1,55 @@
+import asyncio
+
+import fakes
+
+from pisslink import Pool, Track, PartialTrack, MetadataStore
+
+def test_matches_videos_and_local_files_survive_a_restart(tmp_path) -> None:
+    path = str(tmp_path / 'metadata.db')
+    store = MetadataStore(path)
+    store.put_spotify_video('spotify1', 'video1')
+    store.put_video(Track(fakes.FakeYoutubeDL.video('video1', 'Title')))
+    store.put_local('/music/a.mp3', 10.0, 'a', 180)
+    store.close()
+    store = MetadataStore(path)
+    assert store.get_spotify_video('spotify1') == 'video1'
+    assert store.get_spotify_videos(['spotify1', 'unknown', None]) == {'spotify1': 'video1'}
+    title, duration, thumbnail = store.get_video('video1')
+    assert title == 'Title' and duration == Track(fakes.FakeYoutubeDL.video('video1')).duration // 1000
+    assert store.get_durations(['video1', 'unknown']) == {'video1': duration}
+    assert store.get_local('/music/a.mp3', 10.0) == ('a', 180)
+    assert store.get_local('/music/a.mp3', 11.0) is None
+    store.close()
+
+def test_batches_larger_than_the_sqlite_limit() -> None:
+    store = MetadataStore(':memory:')
+    for index in range(1200):
+        store.put_spotify_video(f'spotify{index}', f'video{index}')
+    assert len(store.get_spotify_videos([f'spotify{index}' for index in range(1200)])) == 1200
+
+def test_players_fill_in_playlist_durations_from_the_store(youtube: type, tmp_path) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), store_path=str(tmp_path / 'metadata.db'))
+        player = pool.get_player(fakes.FakeGuild(1))
+        track = await player.get_tracks('https://www.youtube.com/watch?v=abcdefghijk')
+        assert pool.store.get_video('abcdefghijk')[0] == track.title
+        entries = await player._youtube_entries([{'title': 'no duration', 'id': 'abcdefghijk'}])
+        assert entries == [('no duration', track.duration // 1000, 'abcdefghijk')]
+
+    asyncio.run(main())
+
+def test_lazy_players_build_known_spotify_tracks_from_the_store(youtube: type, tmp_path) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient(), store_path=str(tmp_path / 'metadata.db'), lazy_search=True)
+        pool.spotify = fakes.FakeSpotify(0)
+        pool.store.put_spotify_video('4uLU6hMCjMI75M1A2tKUQC', 'abcdefghijk')
+        pool.store.put_video(Track(fakes.FakeYoutubeDL.video('abcdefghijk', 'Stored title')))
+        player = pool.get_player(fakes.FakeGuild(1))
+        track = await player.get_tracks('https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC')
+        assert isinstance(track, PartialTrack)
+        assert (track.title, track.identifier, track.spotify_id) == ('Stored title', 'abcdefghijk', '4uLU6hMCjMI75M1A2tKUQC')
+        assert not youtube.calls.get('video') and not pool.spotify.calls.get('track')
+        resolved = await player._resolve(track)
+        assert isinstance(resolved, Track) and resolved.identifier == 'abcdefghijk'
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+import pisslink.transcode
+
+from pisslink.metrics import InMemoryMetrics
+from pisslink.transcode import TranscodeCache
+
+class FakeFFmpeg:
+    '''Replaces ffmpeg-python, writing :attr:`size` bytes instead of converting the input.'''
+
+    def __init__(self, size: int = 100, delay: float = 0) -> None:
+        self.size = size
+        self.delay = delay
+        self.inputs = []
+        self.failing = False
+
+    def input(self, path: str) -> 'FakeFFmpeg':
+        self.inputs.append(path)
+        self.current = path
+        return self
+
+    def output(self, path: str, **options) -> 'FakeFFmpeg':
+        self.target = path
+        return self
+
+    def run(self, **options) -> None:
+        threading.Event().wait(self.delay)
+        with open(self.target, 'wb') as file:
+            file.write(b'\0' * self.size)
+        if self.failing:
+            raise RuntimeError('ffmpeg failed')
+
+@pytest.fixture
+def ffmpeg(monkeypatch: pytest.MonkeyPatch) -> FakeFFmpeg:
+    fake = FakeFFmpeg()
+    monkeypatch.setattr(pisslink.transcode, 'ffmpeg', fake)
+    return fake
+
+def write(path: str, data: bytes = b'audio') -> str:
+    with open(path, 'wb') as file:
+        file.write(data)
+    return str(path)
+
+def test_files_are_converted_once(tmp_path, ffmpeg: FakeFFmpeg) -> None:
+    async def main() -> None:
+        cache = TranscodeCache(str(tmp_path / 'cache'))
+        source = write(tmp_path / 'song.mp3')
+        assert cache.lookup(source) is None
+        converted = await cache.ensure(source)
+        assert converted.endswith('.ogg') and os.path.isfile(converted)
+        assert cache.lookup(source) == converted
+        assert await cache.ensure(source) == converted
+        assert ffmpeg.inputs == [source]
+
+    asyncio.run(main())
+
+def test_concurrent_calls_share_one_conversion(tmp_path, ffmpeg: FakeFFmpeg) -> None:
+    ffmpeg.delay = 0.05
+
+    async def main() -> None:
+        cache = TranscodeCache(str(tmp_path / 'cache'), concurrency=4)
+        source = write(tmp_path / 'song.mp3')
+        results = await asyncio.gather(*[cache.ensure(source) for _ in range(5)])
+        assert len(set(results)) == 1
+        assert ffmpeg.inputs == [source]
+
+    asyncio.run(main())
+
+def test_changed_files_are_converted_again(tmp_path, ffmpeg: FakeFFmpeg) -> None:
+    async def main() -> None:
+        cache = TranscodeCache(str(tmp_path / 'cache'))
+        source = write(tmp_path / 'song.mp3')
+        first = await cache.ensure(source)
+        write(source, b'a longer recording')
+        assert cache.lookup(source) is None
+        assert await cache.ensure(source) != first
+        assert len(ffmpeg.inputs) == 2
+
+    asyncio.run(main())
+
+def test_failed_conversions_leave_no_partial_files(tmp_path, ffmpeg: FakeFFmpeg) -> None:
+    ffmpeg.failing = True
+
+    async def main() -> None:
+        cache = TranscodeCache(str(tmp_path / 'cache'))
+        assert await cache.ensure(write(tmp_path / 'song.mp3')) is None
+        assert os.listdir(cache.directory) == []
+        assert await cache.ensure(str(tmp_path / 'missing.mp3')) is None
+
+    asyncio.run(main())
+
+def test_files_that_vanish_before_their_conversion_are_skipped(tmp_path, ffmpeg: FakeFFmpeg) -> None:
+    async def main() -> None:
+        cache = TranscodeCache(str(tmp_path / 'cache'))
+        cache.resolver.metrics = InMemoryMetrics()
+        source = write(tmp_path / 'song.mp3')
+        conversion = cache.schedule(source)
+        os.remove(source)
+        assert await conversion is None
+        assert ffmpeg.inputs == [] and os.listdir(cache.directory) == []
+        assert cache.resolver.metrics.snapshot()['counters']['transcode.failures{reason=missing}'] == 1
+        assert cache.resolver.stats.failed == 0
+
+    asyncio.run(main())
+
+def test_least_recently_played_files_are_evicted(tmp_path, ffmpeg: FakeFFmpeg) -> None:
+    async def main() -> None:
+        cache = TranscodeCache(str(tmp_path / 'cache'), max_size=250)
+        sources = [write(tmp_path / f'{name}.mp3', name.encode()) for name in ('a', 'b', 'c')]
+        first = await cache.ensure(sources[0])
+        second = await cache.ensure(sources[1])
+        os.utime(first, (0, 0))
+        os.utime(second, (1, 1))
+        assert cache.lookup(sources[0]) == first
+        await cache.ensure(sources[2])
+        assert cache.lookup(sources[1]) is None
+        assert cache.lookup(sources[0]) == first and cache.lookup(sources[2])
+
+    asyncio.run(main())
\ No newline at end of file
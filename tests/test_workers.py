@@ -0,0 +1,121 @@
+import asyncio
+import gc
+import multiprocessing
+import os
+import threading
+import time
+
+import fakes
+import pytest
+
+import pisslink.workers
+
+from typing import Any
+
+from conftest import wait_until
+from pisslink import Pool, WorkerShard, WorkerError
+from pisslink.resolver import Resolver, FUNCTIONS
+from pisslink.workers import MAX_RESTARTS
+
+def exit_immediately(connection: Any, concurrency: int) -> None:
+    '''Replaces the worker entry point with one that exits like a worker importing an unguarded main module.'''
+    os._exit(1)
+
+def test_workers_start_on_the_first_call() -> None:
+    async def main() -> None:
+        shard = WorkerShard(1)
+        assert shard.process is None
+        try:
+            assert await shard.call('read_playlist', 0, 10) is None
+            assert shard.process.is_alive() and shard.stats.completed == 1
+        finally:
+            shard.shutdown()
+
+    asyncio.run(main())
+
+def test_exited_workers_are_started_again() -> None:
+    async def main() -> None:
+        shard = WorkerShard(1)
+        try:
+            await shard.call('close_playlist', 0)
+            shard.process.kill()
+            shard.process.join()
+            assert await shard.call('close_playlist', 0) is None
+            assert shard.restarts == 1 and not shard.failed
+        finally:
+            shard.shutdown()
+
+    asyncio.run(main())
+
+def test_workers_are_spawned_once_off_the_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    threads = []
+    start = WorkerShard._start
+
+    def recording_start(self) -> Any:
+        threads.append(threading.current_thread())
+        return start(self)
+
+    monkeypatch.setattr(WorkerShard, '_start', recording_start)
+
+    async def main() -> None:
+        shard = WorkerShard(2)
+        try:
+            assert await asyncio.gather(*[shard.call('read_playlist', 0, 10) for _ in range(5)]) == [None] * 5
+            assert shard.process.name.endswith('-1') and shard.restarts == 0
+            assert threads and threading.main_thread() not in threads
+        finally:
+            shard.shutdown()
+
+    asyncio.run(main())
+
+def test_workers_that_keep_exiting_fall_back_to_threads(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pisslink.workers, 'worker_main', exit_immediately)
+    monkeypatch.setitem(FUNCTIONS, 'answer', lambda: 42)
+
+    async def main() -> None:
+        shard = WorkerShard(1, Resolver(1))
+        with pytest.raises(WorkerError):
+            await shard.call('answer')
+        with pytest.warns(RuntimeWarning, match='__main__'):
+            assert await shard.call('answer') == 42
+        assert shard.failed and shard.restarts == MAX_RESTARTS - 1
+        assert await shard.call('answer') == 42
+        assert WorkerShard(1).fallback is None
+
+    asyncio.run(main())
+
+def test_shards_are_not_created_inside_worker_processes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(multiprocessing.current_process(), 'name', 'pisslink-worker-1')
+    with pytest.raises(RuntimeError):
+        WorkerShard(1)
+
+def test_abandoned_playlists_are_closed(youtube: type, monkeypatch: pytest.MonkeyPatch) -> None:
+    read_playlist = FUNCTIONS['read_playlist']
+
+    def slow_read_playlist(*args: Any) -> Any:
+        time.sleep(0.01)
+        return read_playlist(*args)
+
+    monkeypatch.setitem(FUNCTIONS, 'read_playlist', slow_read_playlist)
+    monkeypatch.setattr(pisslink.workers, '_playlists', {})
+
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        player = pool.get_player(fakes.FakeGuild(1))
+        playlist = await player.get_tracks('https://www.youtube.com/playlist?list=BENCH1x5000', stream=True)
+        assert len(pisslink.workers._playlists) == 1
+        loader = playlist._loader
+        del playlist
+        gc.collect()
+        await wait_until(lambda: loader.done() and not pisslink.workers._playlists)
+
+    asyncio.run(main())
+
+def test_read_playlists_are_released(youtube: type) -> None:
+    async def main() -> None:
+        pool = Pool(fakes.FakeClient())
+        playlist = await pool.get_player(fakes.FakeGuild(1)).get_tracks('https://www.youtube.com/playlist?list=BENCH1x250')
+        assert len(playlist.tracks) == 250
+        assert not pisslink.workers._playlists
+
+    asyncio.run(main())
\ No newline at end of file